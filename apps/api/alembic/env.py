@@ -7,7 +7,7 @@ from pathlib import Path
 
 from alembic import context
 from dotenv import load_dotenv
-from sqlalchemy import engine_from_config, pool
+from sqlalchemy import Connection, engine_from_config, pool
 
 # Ensure the repo root and apps/api/src are importable for metadata discovery.
 REPO_ROOT = Path(__file__).resolve().parents[3]
@@ -68,7 +68,20 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def _run_migrations_on_connection(connection: Connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata, compare_type=True)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
 def run_migrations_online() -> None:
+    # Callers (e.g. tests) may hand over an already-open connection to avoid a second engine.
+    external_connection = config.attributes.get("connection")
+    if external_connection is not None:
+        _run_migrations_on_connection(external_connection)
+        return
+
     section = dict(config.get_section(config.config_ini_section, {}))
     section["sqlalchemy.url"] = _normalize_database_url(
         section.get("sqlalchemy.url") or config.get_main_option("sqlalchemy.url")
@@ -80,10 +93,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata, compare_type=True)
-
-        with context.begin_transaction():
-            context.run_migrations()
+        _run_migrations_on_connection(connection)
 
 
 if context.is_offline_mode():
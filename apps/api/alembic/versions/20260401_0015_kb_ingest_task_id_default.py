@@ -0,0 +1,25 @@
+"""Default kb_ingest_tasks.id to gen_random_uuid().
+
+Revision ID: 20260401_0015
+Revises: 20260330_0013
+Create Date: 2026-04-01
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20260401_0015"
+down_revision = "20260330_0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column("kb_ingest_tasks", "id", server_default=sa.text("gen_random_uuid()"))
+
+
+def downgrade() -> None:
+    op.alter_column("kb_ingest_tasks", "id", server_default=None)
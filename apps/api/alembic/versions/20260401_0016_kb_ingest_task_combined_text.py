@@ -0,0 +1,35 @@
+"""Store the embedded combined text on kb_ingest_tasks.
+
+Revision ID: 20260401_0016
+Revises: 20260401_0015
+Create Date: 2026-04-01
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20260401_0016"
+down_revision = "20260401_0015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("kb_ingest_tasks", sa.Column("combined_text", sa.Text(), nullable=True))
+    # Tasks embedded before this revision get the same layout as the worker's combined text; only the JSON
+    # indentation differs (jsonb_pretty), which is fine for the stored copy since the vector already exists.
+    op.execute(
+        """
+        UPDATE kb_ingest_tasks
+        SET combined_text = '## RAW_TEXT_CHUNK' || E'\\n' || btrim(raw_text, E' \\t\\n\\r') || E'\\n\\n'
+          || '## STRUCTURED_OUTPUT' || E'\\n' || jsonb_pretty(structured_json) || E'\\n'
+        WHERE embed_status = 'SUCCEEDED' AND structured_json IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("kb_ingest_tasks", "combined_text")
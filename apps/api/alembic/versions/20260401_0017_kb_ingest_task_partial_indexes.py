@@ -0,0 +1,40 @@
+"""Add partial indexes for the kb worker's resume and failure-sample queries.
+
+Revision ID: 20260401_0017
+Revises: 20260401_0016
+Create Date: 2026-04-01
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20260401_0017"
+down_revision = "20260401_0016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # queue_seed reads a run's unfinished tasks in (source_id, chunk_index) order and the run status payload
+    # samples its failed tasks in the same order. Completed tasks dominate finished runs, so both partial
+    # indexes stay small as kb_ingest_tasks accumulates history.
+    op.create_index(
+        "kb_ingest_tasks_run_unfinished_idx",
+        "kb_ingest_tasks",
+        ["run_id", "source_id", "chunk_index"],
+        postgresql_where=sa.text("final_status <> 'COMPLETED'"),
+    )
+    op.create_index(
+        "kb_ingest_tasks_run_failed_idx",
+        "kb_ingest_tasks",
+        ["run_id", "source_id", "chunk_index"],
+        postgresql_where=sa.text("final_status = 'FAILED'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("kb_ingest_tasks_run_failed_idx", table_name="kb_ingest_tasks")
+    op.drop_index("kb_ingest_tasks_run_unfinished_idx", table_name="kb_ingest_tasks")
@@ -0,0 +1,33 @@
+"""Add a GIN full-text index for lexical KB retrieval.
+
+Revision ID: 20260402_0018
+Revises: 20260401_0017
+Create Date: 2026-04-02
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20260402_0018"
+down_revision = "20260401_0017"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # KbVectorRetriever's lexical candidates filter kb_chunks with
+    # to_tsvector('english', combined_text) @@ websearch_to_tsquery(...). The expression must match the query
+    # exactly for the planner to use this index instead of re-parsing every selected source's chunks.
+    op.create_index(
+        "kb_chunks_combined_text_fts_idx",
+        "kb_chunks",
+        [sa.text("to_tsvector('english', combined_text)")],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("kb_chunks_combined_text_fts_idx", table_name="kb_chunks")
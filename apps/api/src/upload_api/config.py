@@ -90,6 +90,7 @@ def _require_env_list(name: str) -> tuple[str, ...]:
 @dataclass(frozen=True)
 class Settings:
     database_url: str
+    database_pool_max_size: int
     api_host: str
     api_port: int
     max_upload_mb: int
@@ -177,6 +178,7 @@ def load_settings() -> Settings:
 
     return Settings(
         database_url=_require_env("DATABASE_URL"),
+        database_pool_max_size=int(os.getenv("DATABASE_POOL_MAX_SIZE", "8")),
         api_host=_require_env("API_HOST"),
         api_port=_require_env_int("API_PORT"),
         max_upload_mb=int(os.getenv("MAX_UPLOAD_MB", "25")),
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import threading
 from contextlib import contextmanager
+from typing import TYPE_CHECKING
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
+if TYPE_CHECKING:
+    from psycopg_pool import ConnectionPool
+
+_raw_pools: dict[tuple[str, int], "ConnectionPool"] = {}
+_raw_pools_lock = threading.Lock()
+
 
 def build_session_factory(database_url: str) -> sessionmaker[Session]:
     if database_url.startswith("postgresql://") and "+psycopg" not in database_url:
@@ -24,3 +32,32 @@ def session_scope(session_factory: sessionmaker[Session]):
         raise
     finally:
         session.close()
+
+
+def raw_connection_pool(database_url: str, *, max_size: int) -> "ConnectionPool":
+    # One process-wide psycopg pool per URL for the raw-SQL retrievers, so each search checks out a warm
+    # connection instead of opening and authenticating a new one. Opened lazily on first use and closed by
+    # close_raw_connection_pools() on shutdown.
+    from psycopg.rows import dict_row
+    from psycopg_pool import ConnectionPool
+
+    key = (database_url.replace("postgresql+psycopg://", "postgresql://"), max(1, max_size))
+    with _raw_pools_lock:
+        pool = _raw_pools.get(key)
+        if pool is None:
+            pool = _raw_pools[key] = ConnectionPool(
+                key[0],
+                kwargs={"row_factory": dict_row},
+                min_size=1,
+                max_size=key[1],
+                open=True,
+            )
+        return pool
+
+
+def close_raw_connection_pools() -> None:
+    with _raw_pools_lock:
+        pools = list(_raw_pools.values())
+        _raw_pools.clear()
+    for pool in pools:
+        pool.close()
@@ -6,20 +6,20 @@ import uuid
 from dataclasses import dataclass
 from typing import Protocol
 
-import psycopg
 import tiktoken
 from openai import OpenAI
-from psycopg.rows import dict_row
-from sqlalchemy import delete
+from sqlalchemy import delete, insert
 from sqlalchemy.orm import Session, sessionmaker
 
 from db.models import DocumentChunk
 from dpa_schemas import EvidenceQuote, EvidenceSpan
 
 from .config import Settings
+from .db import raw_connection_pool
 
 
 _WS_RE = re.compile(r"\s+")
+_PARAGRAPH_BREAK_RE = re.compile(r"\n\s*\n")
 
 
 class _Tokenizer(Protocol):
@@ -71,17 +71,21 @@ class DocumentChunkIndexer:
 
         with self._session_factory() as session:
             session.execute(delete(DocumentChunk).where(DocumentChunk.document_id == document_id))
-            session.flush()
-            for plan, embedding in zip(plans, embeddings, strict=True):
-                session.add(
-                    DocumentChunk(
-                        document_id=document_id,
-                        chunk_text=plan.chunk_text,
-                        page_start=plan.page_start,
-                        page_end=plan.page_end,
-                        provenance_id=plan.provenance_id,
-                        embedding=embedding,
-                    )
+            if plans:
+                # ORM bulk INSERT: one batched executemany, no per-row identity map entries or RETURNING of ids.
+                session.execute(
+                    insert(DocumentChunk),
+                    [
+                        {
+                            "document_id": document_id,
+                            "chunk_text": plan.chunk_text,
+                            "page_start": plan.page_start,
+                            "page_end": plan.page_end,
+                            "provenance_id": plan.provenance_id,
+                            "embedding": embedding,
+                        }
+                        for plan, embedding in zip(plans, embeddings, strict=True)
+                    ],
                 )
             session.commit()
         return len(plans)
@@ -100,6 +104,7 @@ class DocumentVectorRetriever:
     def __init__(self, settings: Settings) -> None:
         self._settings = settings
         self._database_url = settings.database_url.replace("postgresql+psycopg://", "postgresql://")
+        self._pool_max_size = settings.database_pool_max_size
 
     def search_document(self, *, document_id: uuid.UUID, query: str, top_k: int = 6) -> list[RetrievedDpaSpan]:
         if not query.strip():
@@ -112,7 +117,7 @@ class DocumentVectorRetriever:
         limit = max(1, min(top_k, 12))
         candidate_limit = max(limit * 4, 12)
 
-        with psycopg.connect(self._database_url, row_factory=dict_row) as conn:
+        with raw_connection_pool(self._database_url, max_size=self._pool_max_size).connection() as conn:
             rows = conn.execute(
                 """
                 WITH vector_candidates AS (
@@ -208,7 +213,7 @@ class DocumentVectorRetriever:
         ]
 
     def fetch_span(self, *, document_id: uuid.UUID, provenance_id: str) -> RetrievedDpaSpan | None:
-        with psycopg.connect(self._database_url, row_factory=dict_row) as conn:
+        with raw_connection_pool(self._database_url, max_size=self._pool_max_size).connection() as conn:
             row = conn.execute(
                 """
                 SELECT provenance_id, page_start, page_end, chunk_text
@@ -310,7 +315,7 @@ def _overlap_units(units: list[_PageParagraph], overlap: int) -> tuple[list[_Pag
 def _paragraph_units(enc: _Tokenizer, pages: list[DpaPageRecord]) -> list[_PageParagraph]:
     units: list[_PageParagraph] = []
     for page in pages:
-        paragraphs = [part.strip() for part in re.split(r"\n\s*\n", page.text) if part.strip()]
+        paragraphs = [part for part in map(str.strip, _PARAGRAPH_BREAK_RE.split(page.text)) if part]
         if not paragraphs and page.text.strip():
             paragraphs = [page.text.strip()]
         for paragraph in paragraphs:
@@ -333,8 +338,8 @@ def _tokenizer() -> _Tokenizer:
 
 class _WhitespaceTokenizer:
     def encode(self, text: str) -> list[int]:
-        words = [part for part in re.split(r"\s+", text.strip()) if part]
-        return list(range(len(words)))
+        # str.split() with no separator splits on whitespace runs and drops empty parts, like the \s+ regex did.
+        return list(range(len(text.split())))
 
 
 def _match_quote_to_page(page_text: str, quote: str, page: int) -> EvidenceSpan | None:
@@ -815,25 +815,22 @@ class UploadPipelineService:
         )
 
     def _count_check_runs_for_user_alpha_quota(self, session: Session, *, actor_username: str) -> int:
-        checklist_count = int(
-            session.execute(
-                select(func.count(ChecklistDraftJob.id))
-                .join(Project, Project.id == ChecklistDraftJob.project_id)
-                .where(Project.owner_username == actor_username)
-                .where(Project.purged_at.is_(None))
-            ).scalar_one()
-            or 0
+        # Both counts as scalar subqueries of one SELECT: a single round trip per quota check.
+        checklist_count = (
+            select(func.count(ChecklistDraftJob.id))
+            .join(Project, Project.id == ChecklistDraftJob.project_id)
+            .where(Project.owner_username == actor_username)
+            .where(Project.purged_at.is_(None))
+            .scalar_subquery()
         )
-        analysis_count = int(
-            session.execute(
-                select(func.count(AnalysisRun.id))
-                .join(Project, Project.id == AnalysisRun.project_id)
-                .where(Project.owner_username == actor_username)
-                .where(Project.purged_at.is_(None))
-            ).scalar_one()
-            or 0
+        analysis_count = (
+            select(func.count(AnalysisRun.id))
+            .join(Project, Project.id == AnalysisRun.project_id)
+            .where(Project.owner_username == actor_username)
+            .where(Project.purged_at.is_(None))
+            .scalar_subquery()
         )
-        return checklist_count + analysis_count
+        return int(session.execute(select(checklist_count + analysis_count)).scalar_one() or 0)
 
     def _enforce_project_alpha_quota(
         self,
@@ -3077,7 +3074,7 @@ class UploadPipelineService:
             ).scalars().first()
             if checklist is None:
                 return None
-            document = ChecklistDocument.model_validate(checklist.checklist_json)
+            document = ChecklistDocument.from_trusted(checklist.checklist_json)
             return ApprovedChecklistResponse(
                 **self._build_approved_checklist_summary(checklist).model_dump(mode="python"),
                 checklist=document,
@@ -3249,8 +3246,8 @@ class UploadPipelineService:
                 run = session.get(AnalysisRun, run_id)
                 if run is None:
                     return None
-            finding_count = len(
-                session.execute(select(Finding.id).where(Finding.run_id == run.id)).scalars().all()
+            finding_count = int(
+                session.execute(select(func.count(Finding.id)).where(Finding.run_id == run.id)).scalar_one() or 0
             )
             return AnalysisRunSnapshot(
                 **self._build_analysis_run_summary(session, run).model_dump(mode="python"),
@@ -3264,7 +3261,7 @@ class UploadPipelineService:
             if report is None:
                 raise HTTPException(status_code=404, detail="Analysis report not found.")
             approved = session.get(ApprovedChecklist, run.approved_checklist_id)
-            approved_document = ChecklistDocument.model_validate(approved.checklist_json) if approved is not None else None
+            approved_document = ChecklistDocument.from_trusted(approved.checklist_json) if approved is not None else None
             title_map = {check.check_id: check.title for check in approved_document.checks} if approved_document else {}
             category_map = {check.check_id: check.category for check in approved_document.checks} if approved_document else {}
 
@@ -3540,13 +3537,14 @@ class UploadPipelineService:
                 if parse_job is not None and isinstance(parse_job.meta_json, dict)
                 else None
             )
-            chunk_count = len(
-                session.execute(select(DocumentChunk.id).where(DocumentChunk.document_id == document.id)).scalars().all()
+            chunk_count = int(
+                session.execute(select(func.count(DocumentChunk.id)).where(DocumentChunk.document_id == document.id)).scalar_one()
+                or 0
             )
             return {
                 "document_id": document.id,
                 "selected_source_ids": list(approved.selected_source_ids or []),
-                "approved_checklist": ChecklistDocument.model_validate(approved.checklist_json),
+                "approved_checklist": ChecklistDocument.from_trusted(approved.checklist_json),
                 "sources": self.review_agent.load_sources(list(approved.selected_source_ids or [])),
                 "dpa_pages": self._load_dpa_pages(document.extracted_text_uri, parsed_pages_uri),
                 "chunk_count": chunk_count,
@@ -3759,7 +3757,7 @@ class UploadPipelineService:
 
     def _count_findings_for_run(self, run_id: uuid.UUID) -> int:
         with self.session_factory() as session:
-            return len(session.execute(select(Finding.id).where(Finding.run_id == run_id)).scalars().all())
+            return int(session.execute(select(func.count(Finding.id)).where(Finding.run_id == run_id)).scalar_one() or 0)
 
     def _derive_review_required(self, assessment: CheckAssessmentOutput, evidence_spans: list) -> bool:
         if assessment.abstained:
@@ -3,11 +3,10 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any
 
-import psycopg
 from openai import OpenAI
-from psycopg.rows import dict_row
 
 from .config import Settings
+from .db import raw_connection_pool
 
 
 @dataclass(frozen=True)
@@ -25,6 +24,7 @@ class KbVectorRetriever:
     def __init__(self, settings: Settings) -> None:
         self._settings = settings
         self._database_url = settings.database_url.replace("postgresql+psycopg://", "postgresql://")
+        self._pool_max_size = settings.database_pool_max_size
 
     def search_selected_sources(self, *, query: str, selected_source_ids: list[str], top_k: int = 6) -> list[RetrievedKbChunk]:
         if not query.strip() or not selected_source_ids:
@@ -37,7 +37,7 @@ class KbVectorRetriever:
         limit = max(1, min(top_k, 12))
         candidate_limit = max(limit * 4, 12)
 
-        with psycopg.connect(self._database_url, row_factory=dict_row) as conn:
+        with raw_connection_pool(self._database_url, max_size=self._pool_max_size).connection() as conn:
             rows = conn.execute(
                 """
                 WITH vector_candidates AS (
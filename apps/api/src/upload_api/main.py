@@ -5,6 +5,8 @@ import io
 import logging
 import time
 import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, File, Form, HTTPException, Request, Response, UploadFile, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
@@ -12,7 +14,7 @@ from fastapi.responses import StreamingResponse
 
 from .auth import AuthManager, build_cookie_settings
 from .config import load_settings
-from .db import build_session_factory
+from .db import build_session_factory, close_raw_connection_pools
 from .events import JobEventBus
 from .jobs import UploadPipelineService
 from .logging_utils import configure_logging, log_event
@@ -46,8 +48,17 @@ service = UploadPipelineService(
 rate_limiter = InMemoryRateLimiter()
 
 
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    try:
+        yield
+    finally:
+        # The retrievers' psycopg pools are process-wide; hand their connections back to the server on shutdown.
+        await asyncio.to_thread(close_raw_connection_pools)
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="AI DPA Upload API", version="0.1.0")
+    app = FastAPI(title="AI DPA Upload API", version="0.1.0", lifespan=_lifespan)
 
     app.add_middleware(
         CORSMiddleware,
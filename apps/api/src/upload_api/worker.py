@@ -7,7 +7,7 @@ import signal
 import time
 
 from .config import load_settings
-from .db import build_session_factory
+from .db import build_session_factory, close_raw_connection_pools
 from .events import JobEventBus
 from .jobs import ClaimedJob, UploadPipelineService
 from .logging_utils import configure_logging, log_event
@@ -139,6 +139,7 @@ async def run_worker() -> None:
         task.cancel()
     if active:
         await asyncio.gather(*active, return_exceptions=True)
+    await asyncio.to_thread(close_raw_connection_pools)
 
 
 def main() -> None:
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+import uuid
+from collections.abc import Iterator
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.engine import make_url
+
+
+def _to_psycopg_url(connection_url: str) -> str:
+    return (
+        connection_url.replace("postgresql+psycopg2://", "postgresql+psycopg://")
+        .replace("postgresql://", "postgresql+psycopg://", 1)
+    )
+
+
+@pytest.fixture(scope="session")
+def pg_admin_url() -> Iterator[str]:
+    # Set PYTEST_PG_URL to reuse a long-lived local pgvector container across pytest sessions;
+    # otherwise a Testcontainers instance is started for the session.
+    external_url = (os.getenv("PYTEST_PG_URL") or "").strip()
+    if external_url:
+        yield _to_psycopg_url(external_url)
+        return
+
+    from docker.errors import APIError, DockerException, ImageNotFound
+    from testcontainers.postgres import PostgresContainer
+
+    try:
+        container = PostgresContainer("pgvector/pgvector:pg16")
+        container.start()
+    except (DockerException, APIError, ImageNotFound) as exc:
+        pytest.skip(f"Docker or pgvector image unavailable for Postgres-backed tests: {exc}")
+    try:
+        yield _to_psycopg_url(container.get_connection_url())
+    finally:
+        container.stop()
+
+
+@pytest.fixture
+def pg_database_url(pg_admin_url: str) -> Iterator[str]:
+    # Against a shared PYTEST_PG_URL server each test gets a fresh tst_<uuid> database that is
+    # dropped on teardown; a session-owned Testcontainers instance is used as-is.
+    if not (os.getenv("PYTEST_PG_URL") or "").strip():
+        yield pg_admin_url
+        return
+
+    db_name = f"tst_{uuid.uuid4().hex}"
+    admin_engine = sa.create_engine(pg_admin_url, future=True, isolation_level="AUTOCOMMIT", poolclass=sa.pool.NullPool)
+    with admin_engine.connect() as conn:
+        conn.execute(sa.text(f'CREATE DATABASE "{db_name}"'))
+    try:
+        yield make_url(pg_admin_url).set(database=db_name).render_as_string(hide_password=False)
+    finally:
+        with admin_engine.connect() as conn:
+            conn.execute(sa.text(f'DROP DATABASE IF EXISTS "{db_name}" WITH (FORCE)'))
+        admin_engine.dispose()
@@ -98,9 +98,9 @@ def test_normalize_draft_output_caps_verbose_fields() -> None:
     normalized = normalize_draft_output(_draft(verbose))
 
     assert normalized.checks[0].draft_rationale.count("\n") <= 2
-    assert normalized.checks[0].legal_basis == ["GDPR Art. 32"]
-    assert normalized.checks[0].pass_criteria == ["Maintain encryption at rest and in transit."]
-    assert normalized.checks[0].fail_criteria == ["No stated testing cadence."]
+    assert normalized.checks[0].legal_basis == ("GDPR Art. 32",)
+    assert normalized.checks[0].pass_criteria == ("Maintain encryption at rest and in transit.",)
+    assert normalized.checks[0].fail_criteria == ("No stated testing cadence.",)
 
 
 def test_collapse_exact_duplicate_candidates_only_removes_true_duplicates() -> None:
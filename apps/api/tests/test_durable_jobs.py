@@ -22,6 +22,7 @@ os.environ.setdefault("DATABASE_URL", "postgresql+psycopg://postgres:postgres@lo
 def _settings(tmp_path: Path) -> Settings:
     return Settings(
         database_url=os.environ["DATABASE_URL"],
+        database_pool_max_size=8,
         api_host="0.0.0.0",
         api_port=8001,
         max_upload_mb=25,
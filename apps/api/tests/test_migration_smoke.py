@@ -1,21 +1,15 @@
 from __future__ import annotations
 
+import uuid
 from pathlib import Path
 
-import pytest
 import sqlalchemy as sa
 from alembic import command
 from alembic.config import Config
-from docker.errors import APIError, DockerException, ImageNotFound
-from testcontainers.postgres import PostgresContainer
 
 REPO_ROOT = Path(__file__).resolve().parents[3]
 
 
-def _to_psycopg_url(connection_url: str) -> str:
-    return connection_url.replace("postgresql+psycopg2://", "postgresql+psycopg://")
-
-
 def _alembic_config(database_url: str) -> Config:
     cfg = Config(str(REPO_ROOT / "apps" / "api" / "alembic.ini"))
     cfg.set_main_option("script_location", str(REPO_ROOT / "apps" / "api" / "alembic"))
@@ -23,489 +17,487 @@ def _alembic_config(database_url: str) -> Config:
     return cfg
 
 
-def test_alembic_upgrade_and_downgrade_smoke() -> None:
-    try:
-        with PostgresContainer("pgvector/pgvector:pg16") as postgres:
-            database_url = _to_psycopg_url(postgres.get_connection_url())
-            alembic_cfg = _alembic_config(database_url)
-
-            # Local/test Postgres containers don't include Supabase-style roles by default.
-            bootstrap_engine = sa.create_engine(database_url, future=True)
-            with bootstrap_engine.begin() as bootstrap_conn:
-                bootstrap_conn.execute(sa.text("DO $$ BEGIN CREATE ROLE authenticated NOLOGIN; EXCEPTION WHEN duplicate_object THEN NULL; END $$;"))
-            bootstrap_engine.dispose()
-
-            command.upgrade(alembic_cfg, "head")
-
-            engine = sa.create_engine(database_url, future=True)
-            with engine.begin() as conn:
-                expected_tables = {
-                    "tenants",
-                    "users",
-                    "projects",
-                    "documents",
-                    "document_artifacts",
-                    "document_parse_jobs",
-                    "checklist_draft_jobs",
-                    "checklist_synthesis_runs",
-                    "checklist_synthesis_events",
-                    "approved_checklists",
-                    "document_chunks",
-                    "analysis_runs",
-                    "analysis_reports",
-                    "findings",
-                    "rule_hits",
-                    "review_actions",
-                    "billing_events",
-                    "audit_events",
-                    "kb_sources",
-                    "kb_ingest_runs",
-                    "kb_ingest_tasks",
-                    "kb_chunks",
-                }
-                absent_tables = {
-                    "registry_audit_events",
-                    "registry_checklist_synthesis_runs",
-                    "registry_diffs",
-                    "registry_extracted_obligations",
-                    "registry_extraction_chunks",
-                    "registry_extraction_runs",
-                    "registry_extraction_segments",
-                    "registry_snapshots",
-                    "registry_sources",
-                    "checklist_approvals",
-                    "checklist_item_sources",
-                    "checklist_items",
-                    "checklist_reviews",
-                    "checklist_versions",
-                }
-                table_names = set(
-                    conn.execute(
-                        sa.text("SELECT tablename FROM pg_tables WHERE schemaname = 'public'")
-                    ).scalars()
+def test_alembic_upgrade_and_downgrade_smoke(pg_database_url: str) -> None:
+    database_url = pg_database_url
+    alembic_cfg = _alembic_config(database_url)
+
+    engine = sa.create_engine(database_url, future=True, poolclass=sa.pool.NullPool)
+    with engine.begin() as conn:
+        # Local/test Postgres containers don't include Supabase-style roles by default.
+        conn.execute(sa.text("DO $$ BEGIN CREATE ROLE authenticated NOLOGIN; EXCEPTION WHEN duplicate_object THEN NULL; END $$;"))
+        alembic_cfg.attributes["connection"] = conn
+        command.upgrade(alembic_cfg, "head")
+
+    with engine.begin() as conn:
+        expected_tables = {
+            "tenants",
+            "users",
+            "projects",
+            "documents",
+            "document_artifacts",
+            "document_parse_jobs",
+            "checklist_draft_jobs",
+            "checklist_synthesis_runs",
+            "checklist_synthesis_events",
+            "approved_checklists",
+            "document_chunks",
+            "analysis_runs",
+            "analysis_reports",
+            "findings",
+            "rule_hits",
+            "review_actions",
+            "billing_events",
+            "audit_events",
+            "kb_sources",
+            "kb_ingest_runs",
+            "kb_ingest_tasks",
+            "kb_chunks",
+        }
+        absent_tables = {
+            "registry_audit_events",
+            "registry_checklist_synthesis_runs",
+            "registry_diffs",
+            "registry_extracted_obligations",
+            "registry_extraction_chunks",
+            "registry_extraction_runs",
+            "registry_extraction_segments",
+            "registry_snapshots",
+            "registry_sources",
+            "checklist_approvals",
+            "checklist_item_sources",
+            "checklist_items",
+            "checklist_reviews",
+            "checklist_versions",
+        }
+        table_names = set(
+            conn.execute(
+                sa.text("SELECT tablename FROM pg_tables WHERE schemaname = 'public'")
+            ).scalars()
+        )
+        assert expected_tables.issubset(table_names)
+        assert absent_tables.isdisjoint(table_names)
+
+        idx_names = set(
+            conn.execute(
+                sa.text("SELECT indexname FROM pg_indexes WHERE schemaname = 'public'")
+            ).scalars()
+        )
+        assert "documents_tenant_uploaded_idx" in idx_names
+        assert "projects_tenant_last_activity_idx" in idx_names
+        assert "projects_status_updated_idx" in idx_names
+        assert "projects_owner_status_updated_idx" in idx_names
+        assert "projects_deleted_purge_idx" in idx_names
+        assert "analysis_runs_tenant_status_started_idx" in idx_names
+        assert "rule_hits_run_severity_idx" in idx_names
+        assert "review_actions_run_finding_created_idx" in idx_names
+        assert "billing_events_tenant_created_idx" in idx_names
+        assert "audit_events_tenant_created_idx" in idx_names
+        assert "audit_events_trace_idx" in idx_names
+        assert "document_chunks_document_provenance_uidx" in idx_names
+        assert "findings_run_check_uidx" in idx_names
+        assert "kb_ingest_runs_status_created_idx" in idx_names
+        assert "kb_ingest_tasks_run_final_idx" in idx_names
+        assert "kb_ingest_tasks_run_unfinished_idx" in idx_names
+        assert "kb_ingest_tasks_run_failed_idx" in idx_names
+        assert "kb_chunks_source_idx" in idx_names
+        assert "kb_chunks_combined_text_fts_idx" in idx_names
+        assert "checklist_draft_jobs_tenant_created_idx" in idx_names
+        assert "checklist_draft_jobs_document_created_idx" in idx_names
+        assert "checklist_draft_jobs_status_updated_idx" in idx_names
+        assert "documents_project_uidx" in idx_names
+        assert "document_artifacts_document_type_created_idx" in idx_names
+        assert "document_artifacts_tenant_created_idx" in idx_names
+        assert "document_parse_jobs_project_created_idx" in idx_names
+        assert "checklist_draft_jobs_project_created_idx" in idx_names
+        assert "checklist_synthesis_runs_draft_started_idx" in idx_names
+        assert "checklist_synthesis_events_run_created_idx" in idx_names
+        assert "analysis_runs_project_started_idx" in idx_names
+        assert "approved_checklists_project_created_idx" in idx_names
+        assert "analysis_runs_status_started_idx" in idx_names
+
+        rls_rows = conn.execute(
+            sa.text(
+                """
+                SELECT relname, relrowsecurity
+                FROM pg_class
+                WHERE relname IN (
+                  'tenants', 'users', 'documents', 'document_chunks',
+                  'document_artifacts',
+                  'projects', 'document_parse_jobs', 'checklist_draft_jobs', 'analysis_runs', 'findings', 'rule_hits',
+                  'review_actions', 'billing_events', 'audit_events', 'checklist_synthesis_runs', 'checklist_synthesis_events'
                 )
-                assert expected_tables.issubset(table_names)
-                assert absent_tables.isdisjoint(table_names)
-
-                idx_names = set(
-                    conn.execute(
-                        sa.text("SELECT indexname FROM pg_indexes WHERE schemaname = 'public'")
-                    ).scalars()
+                """
+            )
+        ).all()
+        assert all(row.relrowsecurity for row in rls_rows)
+
+        embedding_type = conn.execute(
+            sa.text(
+                """
+                SELECT format_type(a.atttypid, a.atttypmod)
+                FROM pg_attribute a
+                JOIN pg_class c ON a.attrelid = c.oid
+                WHERE c.relname = 'document_chunks'
+                  AND a.attname = 'embedding'
+                  AND a.attnum > 0
+                """
+            )
+        ).scalar_one()
+        assert embedding_type == "vector(1536)"
+        kb_embedding_type = conn.execute(
+            sa.text(
+                """
+                SELECT format_type(a.atttypid, a.atttypmod)
+                FROM pg_attribute a
+                JOIN pg_class c ON a.attrelid = c.oid
+                WHERE c.relname = 'kb_chunks'
+                  AND a.attname = 'embedding'
+                  AND a.attnum > 0
+                """
+            )
+        ).scalar_one()
+        assert kb_embedding_type == "vector(1536)"
+
+        # Client-side ids remove the RETURNING round-trip dependency between fixture inserts.
+        tenant_id = uuid.uuid4()
+        user_id = uuid.uuid4()
+        project_id = uuid.uuid4()
+        document_id = uuid.uuid4()
+        artifact_id = uuid.uuid4()
+        run_id = uuid.uuid4()
+        finding_id = uuid.uuid4()
+        kb_source_id = uuid.uuid4()
+        kb_run_id = uuid.uuid4()
+        kb_task_id = uuid.uuid4()
+
+        conn.execute(
+            sa.text(
+                """
+                INSERT INTO tenants (id, name, region, status)
+                VALUES (:id, :name, :region, :status)
+                """
+            ),
+            {"id": tenant_id, "name": "Acme", "region": "eu-west-1", "status": "ACTIVE"},
+        )
+
+        conn.execute(
+            sa.text(
+                """
+                INSERT INTO users (id, tenant_id, email, role)
+                VALUES (:id, :tenant_id, :email, :role)
+                """
+            ),
+            {"id": user_id, "tenant_id": tenant_id, "email": "reviewer@example.com", "role": "REVIEWER"},
+        )
+
+        conn.execute(
+            sa.text(
+                """
+                INSERT INTO projects (id, tenant_id, owner_username, name, status)
+                VALUES (:id, :tenant_id, :owner_username, :name, :status)
+                """
+            ),
+            {
+                "id": project_id,
+                "tenant_id": tenant_id,
+                "owner_username": "local-dev",
+                "name": "Untitled analysis",
+                "status": "EMPTY",
+            },
+        )
+
+        conn.execute(
+            sa.text(
+                """
+                UPDATE projects
+                SET status = :status
+                WHERE id = :project_id
+                """
+            ),
+            {"status": "DELETED", "project_id": project_id},
+        )
+
+        deleted_status = conn.execute(
+            sa.text("SELECT status FROM projects WHERE id = :project_id"),
+            {"project_id": project_id},
+        ).scalar_one()
+        assert deleted_status == "DELETED"
+
+        conn.execute(
+            sa.text(
+                """
+                UPDATE projects
+                SET status = :status
+                WHERE id = :project_id
+                """
+            ),
+            {"status": "EMPTY", "project_id": project_id},
+        )
+
+        conn.execute(
+            sa.text(
+                """
+                INSERT INTO documents (id, tenant_id, project_id, filename, mime_type, page_count, storage_uri)
+                VALUES (:id, :tenant_id, :project_id, :filename, :mime_type, :page_count, :storage_uri)
+                """
+            ),
+            {
+                "id": document_id,
+                "tenant_id": tenant_id,
+                "project_id": project_id,
+                "filename": "sample-dpa.pdf",
+                "mime_type": "application/pdf",
+                "page_count": 12,
+                "storage_uri": "supabase://bucket/path/sample-dpa.pdf",
+            },
+        )
+
+        conn.execute(
+            sa.text(
+                """
+                INSERT INTO document_artifacts (
+                  id, tenant_id, project_id, document_id, artifact_type, storage_provider, bucket,
+                  object_key, object_uri, content_type, byte_size, sha256, active
                 )
-                assert "documents_tenant_uploaded_idx" in idx_names
-                assert "projects_tenant_last_activity_idx" in idx_names
-                assert "projects_status_updated_idx" in idx_names
-                assert "projects_owner_status_updated_idx" in idx_names
-                assert "projects_deleted_purge_idx" in idx_names
-                assert "analysis_runs_tenant_status_started_idx" in idx_names
-                assert "rule_hits_run_severity_idx" in idx_names
-                assert "review_actions_run_finding_created_idx" in idx_names
-                assert "billing_events_tenant_created_idx" in idx_names
-                assert "audit_events_tenant_created_idx" in idx_names
-                assert "audit_events_trace_idx" in idx_names
-                assert "document_chunks_document_provenance_uidx" in idx_names
-                assert "findings_run_check_uidx" in idx_names
-                assert "kb_ingest_runs_status_created_idx" in idx_names
-                assert "kb_ingest_tasks_run_final_idx" in idx_names
-                assert "kb_chunks_source_idx" in idx_names
-                assert "checklist_draft_jobs_tenant_created_idx" in idx_names
-                assert "checklist_draft_jobs_document_created_idx" in idx_names
-                assert "checklist_draft_jobs_status_updated_idx" in idx_names
-                assert "documents_project_uidx" in idx_names
-                assert "document_artifacts_document_type_created_idx" in idx_names
-                assert "document_artifacts_tenant_created_idx" in idx_names
-                assert "document_parse_jobs_project_created_idx" in idx_names
-                assert "checklist_draft_jobs_project_created_idx" in idx_names
-                assert "checklist_synthesis_runs_draft_started_idx" in idx_names
-                assert "checklist_synthesis_events_run_created_idx" in idx_names
-                assert "analysis_runs_project_started_idx" in idx_names
-                assert "approved_checklists_project_created_idx" in idx_names
-                assert "analysis_runs_status_started_idx" in idx_names
-
-                rls_rows = conn.execute(
-                    sa.text(
-                        """
-                        SELECT relname, relrowsecurity
-                        FROM pg_class
-                        WHERE relname IN (
-                          'tenants', 'users', 'documents', 'document_chunks',
-                          'document_artifacts',
-                          'projects', 'document_parse_jobs', 'checklist_draft_jobs', 'analysis_runs', 'findings', 'rule_hits',
-                          'review_actions', 'billing_events', 'audit_events', 'checklist_synthesis_runs', 'checklist_synthesis_events'
-                        )
-                        """
-                    )
-                ).all()
-                assert all(row.relrowsecurity for row in rls_rows)
-
-                embedding_type = conn.execute(
-                    sa.text(
-                        """
-                        SELECT format_type(a.atttypid, a.atttypmod)
-                        FROM pg_attribute a
-                        JOIN pg_class c ON a.attrelid = c.oid
-                        WHERE c.relname = 'document_chunks'
-                          AND a.attname = 'embedding'
-                          AND a.attnum > 0
-                        """
-                    )
-                ).scalar_one()
-                assert embedding_type == "vector(1536)"
-                kb_embedding_type = conn.execute(
-                    sa.text(
-                        """
-                        SELECT format_type(a.atttypid, a.atttypmod)
-                        FROM pg_attribute a
-                        JOIN pg_class c ON a.attrelid = c.oid
-                        WHERE c.relname = 'kb_chunks'
-                          AND a.attname = 'embedding'
-                          AND a.attnum > 0
-                        """
-                    )
-                ).scalar_one()
-                assert kb_embedding_type == "vector(1536)"
-
-                tenant_id = conn.execute(
-                    sa.text(
-                        """
-                        INSERT INTO tenants (name, region, status)
-                        VALUES (:name, :region, :status)
-                        RETURNING id
-                        """
-                    ),
-                    {"name": "Acme", "region": "eu-west-1", "status": "ACTIVE"},
-                ).scalar_one()
-
-                user_id = conn.execute(
-                    sa.text(
-                        """
-                        INSERT INTO users (tenant_id, email, role)
-                        VALUES (:tenant_id, :email, :role)
-                        RETURNING id
-                        """
-                    ),
-                    {"tenant_id": tenant_id, "email": "reviewer@example.com", "role": "REVIEWER"},
-                ).scalar_one()
-
-                project_id = conn.execute(
-                    sa.text(
-                        """
-                        INSERT INTO projects (tenant_id, owner_username, name, status)
-                        VALUES (:tenant_id, :owner_username, :name, :status)
-                        RETURNING id
-                        """
-                    ),
-                    {
-                        "tenant_id": tenant_id,
-                        "owner_username": "local-dev",
-                        "name": "Untitled analysis",
-                        "status": "EMPTY",
-                    },
-                ).scalar_one()
-
-                conn.execute(
-                    sa.text(
-                        """
-                        UPDATE projects
-                        SET status = :status
-                        WHERE id = :project_id
-                        """
-                    ),
-                    {"status": "DELETED", "project_id": project_id},
+                VALUES (
+                  :id, :tenant_id, :project_id, :document_id, :artifact_type, :storage_provider, :bucket,
+                  :object_key, :object_uri, :content_type, :byte_size, :sha256, :active
                 )
-
-                deleted_status = conn.execute(
-                    sa.text("SELECT status FROM projects WHERE id = :project_id"),
-                    {"project_id": project_id},
-                ).scalar_one()
-                assert deleted_status == "DELETED"
-
-                conn.execute(
-                    sa.text(
-                        """
-                        UPDATE projects
-                        SET status = :status
-                        WHERE id = :project_id
-                        """
-                    ),
-                    {"status": "EMPTY", "project_id": project_id},
+                """
+            ),
+            {
+                "id": artifact_id,
+                "tenant_id": tenant_id,
+                "project_id": project_id,
+                "document_id": document_id,
+                "artifact_type": "SOURCE_PDF",
+                "storage_provider": "r2",
+                "bucket": "docs",
+                "object_key": "tenants/acme/projects/demo/documents/sample/source/original.pdf",
+                "object_uri": "r2://docs/tenants/acme/projects/demo/documents/sample/source/original.pdf",
+                "content_type": "application/pdf",
+                "byte_size": 1024,
+                "sha256": "f" * 64,
+                "active": True,
+            },
+        )
+
+        conn.execute(
+            sa.text(
+                """
+                INSERT INTO analysis_runs (id, tenant_id, project_id, document_id, status, model_version, policy_version)
+                VALUES (:id, :tenant_id, :project_id, :document_id, :status, :model_version, :policy_version)
+                """
+            ),
+            {
+                "id": run_id,
+                "tenant_id": tenant_id,
+                "project_id": project_id,
+                "document_id": document_id,
+                "status": "QUEUED",
+                "model_version": "managed-1.0",
+                "policy_version": "policy-2026-02-16",
+            },
+        )
+
+        conn.execute(
+            sa.text(
+                """
+                INSERT INTO findings (
+                  id, run_id, check_id, category, status, risk, confidence, abstained, risk_rationale
                 )
-
-                document_id = conn.execute(
-                    sa.text(
-                        """
-                        INSERT INTO documents (tenant_id, project_id, filename, mime_type, page_count, storage_uri)
-                        VALUES (:tenant_id, :project_id, :filename, :mime_type, :page_count, :storage_uri)
-                        RETURNING id
-                        """
-                    ),
-                    {
-                        "tenant_id": tenant_id,
-                        "project_id": project_id,
-                        "filename": "sample-dpa.pdf",
-                        "mime_type": "application/pdf",
-                        "page_count": 12,
-                        "storage_uri": "supabase://bucket/path/sample-dpa.pdf",
-                    },
-                ).scalar_one()
-
-                artifact_id = conn.execute(
-                    sa.text(
-                        """
-                        INSERT INTO document_artifacts (
-                          tenant_id, project_id, document_id, artifact_type, storage_provider, bucket,
-                          object_key, object_uri, content_type, byte_size, sha256, active
-                        )
-                        VALUES (
-                          :tenant_id, :project_id, :document_id, :artifact_type, :storage_provider, :bucket,
-                          :object_key, :object_uri, :content_type, :byte_size, :sha256, :active
-                        )
-                        RETURNING id
-                        """
-                    ),
-                    {
-                        "tenant_id": tenant_id,
-                        "project_id": project_id,
-                        "document_id": document_id,
-                        "artifact_type": "SOURCE_PDF",
-                        "storage_provider": "r2",
-                        "bucket": "docs",
-                        "object_key": "tenants/acme/projects/demo/documents/sample/source/original.pdf",
-                        "object_uri": "r2://docs/tenants/acme/projects/demo/documents/sample/source/original.pdf",
-                        "content_type": "application/pdf",
-                        "byte_size": 1024,
-                        "sha256": "f" * 64,
-                        "active": True,
-                    },
-                ).scalar_one()
-                assert artifact_id is not None
-
-                run_id = conn.execute(
-                    sa.text(
-                        """
-                        INSERT INTO analysis_runs (tenant_id, project_id, document_id, status, model_version, policy_version)
-                        VALUES (:tenant_id, :project_id, :document_id, :status, :model_version, :policy_version)
-                        RETURNING id
-                        """
-                    ),
-                    {
-                        "tenant_id": tenant_id,
-                        "project_id": project_id,
-                        "document_id": document_id,
-                        "status": "QUEUED",
-                        "model_version": "managed-1.0",
-                        "policy_version": "policy-2026-02-16",
-                    },
-                ).scalar_one()
-
-                finding_id = conn.execute(
-                    sa.text(
-                        """
-                        INSERT INTO findings (
-                          run_id, check_id, category, status, risk, confidence, abstained, risk_rationale
-                        )
-                        VALUES (
-                          :run_id, :check_id, :category, :status, :risk, :confidence, :abstained, :risk_rationale
-                        )
-                        RETURNING id
-                        """
-                    ),
-                    {
-                        "run_id": run_id,
-                        "check_id": "CHECK_001",
-                        "category": "Instructions",
-                        "status": "PARTIAL",
-                        "risk": "HIGH",
-                        "confidence": 0.91,
-                        "abstained": False,
-                        "risk_rationale": "Instruction language contains broad carve-outs.",
-                    },
-                ).scalar_one()
-
-                conn.execute(
-                    sa.text(
-                        """
-                        INSERT INTO review_actions (run_id, finding_id, reviewer_user_id, action, comment)
-                        VALUES (:run_id, :finding_id, :reviewer_user_id, :action, :comment)
-                        """
-                    ),
-                    {
-                        "run_id": run_id,
-                        "finding_id": finding_id,
-                        "reviewer_user_id": user_id,
-                        "action": "FLAGGED",
-                        "comment": "Needs legal follow-up",
-                    },
+                VALUES (
+                  :id, :run_id, :check_id, :category, :status, :risk, :confidence, :abstained, :risk_rationale
                 )
-
-                conn.execute(sa.text("SET enable_seqscan = off;"))
-                explain_plan = "\n".join(
-                    conn.execute(
-                        sa.text(
-                            """
-                            EXPLAIN (FORMAT TEXT)
-                            SELECT id
-                            FROM analysis_runs
-                            WHERE tenant_id = :tenant_id AND status = 'QUEUED'
-                            """
-                        ),
-                        {"tenant_id": tenant_id},
-                    ).scalars()
+                """
+            ),
+            {
+                "id": finding_id,
+                "run_id": run_id,
+                "check_id": "CHECK_001",
+                "category": "Instructions",
+                "status": "PARTIAL",
+                "risk": "HIGH",
+                "confidence": 0.91,
+                "abstained": False,
+                "risk_rationale": "Instruction language contains broad carve-outs.",
+            },
+        )
+
+        conn.execute(
+            sa.text(
+                """
+                INSERT INTO review_actions (run_id, finding_id, reviewer_user_id, action, comment)
+                VALUES (:run_id, :finding_id, :reviewer_user_id, :action, :comment)
+                """
+            ),
+            {
+                "run_id": run_id,
+                "finding_id": finding_id,
+                "reviewer_user_id": user_id,
+                "action": "FLAGGED",
+                "comment": "Needs legal follow-up",
+            },
+        )
+
+        # The tenant/status queue lookup is served by an index leading with exactly those columns.
+        tenant_status_indexdef = conn.execute(
+            sa.text(
+                """
+                SELECT pg_get_indexdef(i.indexrelid)
+                FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname = 'analysis_runs_tenant_status_started_idx'
+                """
+            )
+        ).scalar_one()
+        assert "ON public.analysis_runs" in tenant_status_indexdef
+        assert "(tenant_id, status, started_at DESC)" in tenant_status_indexdef
+
+        # kb_sources and kb_ingest_runs are independent; send both in one psycopg pipeline round-trip.
+        driver_conn = conn.connection.driver_connection
+        with driver_conn.pipeline():
+            driver_conn.execute(
+                """
+                INSERT INTO kb_sources (
+                  id, source_id, title, authority, source_kind, source_url, local_txt_path, local_md_path,
+                  content_sha256, char_count, token_count, active
                 )
-                assert "Index Scan" in explain_plan or "Bitmap Heap Scan" in explain_plan
-                assert (
-                    "analysis_runs_tenant_status_started_idx" in explain_plan
-                    or "analysis_runs_status_started_idx" in explain_plan
+                VALUES (
+                  %(id)s, %(source_id)s, %(title)s, %(authority)s, %(source_kind)s, %(source_url)s, %(local_txt_path)s,
+                  %(local_md_path)s, %(content_sha256)s, %(char_count)s, %(token_count)s, %(active)s
                 )
-
-                kb_source_id = conn.execute(
-                    sa.text(
-                        """
-                        INSERT INTO kb_sources (
-                          source_id, title, authority, source_kind, source_url, local_txt_path, local_md_path,
-                          content_sha256, char_count, token_count, active
-                        )
-                        VALUES (
-                          :source_id, :title, :authority, :source_kind, :source_url, :local_txt_path, :local_md_path,
-                          :content_sha256, :char_count, :token_count, :active
-                        )
-                        RETURNING id
-                        """
-                    ),
-                    {
-                        "source_id": "gdpr_regulation_2016_679",
-                        "title": "GDPR",
-                        "authority": "EUR-Lex",
-                        "source_kind": "HTML",
-                        "source_url": "https://example.com/gdpr",
-                        "local_txt_path": "kb/gdpr/content.txt",
-                        "local_md_path": "kb/gdpr/content.md",
-                        "content_sha256": "c" * 64,
-                        "char_count": 1234,
-                        "token_count": 456,
-                        "active": True,
-                    },
-                ).scalar_one()
-                assert kb_source_id is not None
-
-                kb_run_id = conn.execute(
-                    sa.text(
-                        """
-                        INSERT INTO kb_ingest_runs (
-                          id, status, kb_manifest_sha256, chunk_size, chunk_overlap, full_doc_threshold,
-                          llm_model, embedding_model, llm_concurrency, embed_concurrency, upsert_concurrency,
-                          request_retries, total_chunks
-                        )
-                        VALUES (
-                          gen_random_uuid(), :status, :kb_manifest_sha256, :chunk_size, :chunk_overlap, :full_doc_threshold,
-                          :llm_model, :embedding_model, :llm_concurrency, :embed_concurrency, :upsert_concurrency,
-                          :request_retries, :total_chunks
-                        )
-                        RETURNING id
-                        """
-                    ),
-                    {
-                        "status": "RUNNING",
-                        "kb_manifest_sha256": "d" * 64,
-                        "chunk_size": 800,
-                        "chunk_overlap": 300,
-                        "full_doc_threshold": 50000,
-                        "llm_model": "test-llm",
-                        "embedding_model": "test-embed",
-                        "llm_concurrency": 2,
-                        "embed_concurrency": 2,
-                        "upsert_concurrency": 2,
-                        "request_retries": 1,
-                        "total_chunks": 1,
-                    },
-                ).scalar_one()
-
-                kb_task_id = conn.execute(
-                    sa.text(
-                        """
-                        INSERT INTO kb_ingest_tasks (
-                          id, run_id, source_id, chunk_index, chunk_count, raw_text, raw_text_sha256,
-                          chunk_token_count, doc_token_count, context_mode, context_window_start, context_window_end,
-                          context_text, llm_status, embed_status, upsert_status, final_status,
-                          structured_json, structured_text, embedding_dim, embedding
-                        )
-                        VALUES (
-                          gen_random_uuid(), :run_id, :source_id, :chunk_index, :chunk_count, :raw_text, :raw_text_sha256,
-                          :chunk_token_count, :doc_token_count, :context_mode, :context_window_start, :context_window_end,
-                          :context_text, 'SUCCEEDED', 'SUCCEEDED', 'PENDING', 'PENDING',
-                          CAST(:structured_json AS jsonb), :structured_text, 1536, CAST(:embedding AS vector)
-                        )
-                        RETURNING id
-                        """
-                    ),
-                    {
-                        "run_id": kb_run_id,
-                        "source_id": "gdpr_regulation_2016_679",
-                        "chunk_index": 0,
-                        "chunk_count": 1,
-                        "raw_text": "Article 28 processor obligations",
-                        "raw_text_sha256": "e" * 64,
-                        "chunk_token_count": 10,
-                        "doc_token_count": 100,
-                        "context_mode": "FULL_DOC",
-                        "context_window_start": 0,
-                        "context_window_end": 0,
-                        "context_text": "Article 28 processor obligations",
-                        "structured_json": '{"source_title":"GDPR","source_url":"https://example.com/gdpr","article_no":"Article 28","short_description":"Processor clauses","consequences":null,"possible_reasons":["Missing instruction clause"],"citation_quote":"processor obligations","citation_section":"Article 28"}',
-                        "structured_text": '{"article_no":"Article 28"}',
-                        "embedding": "[" + ",".join(["0.0"] * 1536) + "]",
-                    },
-                ).scalar_one()
-
-                conn.execute(
-                    sa.text(
-                        """
-                        INSERT INTO kb_chunks (
-                          source_id, source_title, source_url, chunk_index, chunk_count, chunk_token_count, doc_token_count,
-                          context_mode, context_window_start, context_window_end, raw_text, structured_json, structured_text,
-                          combined_text, raw_text_sha256, llm_model, embedding_model, embedding
-                        )
-                        VALUES (
-                          :source_id, :source_title, :source_url, :chunk_index, :chunk_count, :chunk_token_count, :doc_token_count,
-                          :context_mode, :context_window_start, :context_window_end, :raw_text, CAST(:structured_json AS jsonb), :structured_text,
-                          :combined_text, :raw_text_sha256, :llm_model, :embedding_model, CAST(:embedding AS vector)
-                        )
-                        """
-                    ),
-                    {
-                        "source_id": "gdpr_regulation_2016_679",
-                        "source_title": "GDPR",
-                        "source_url": "https://example.com/gdpr",
-                        "chunk_index": 0,
-                        "chunk_count": 1,
-                        "chunk_token_count": 10,
-                        "doc_token_count": 100,
-                        "context_mode": "FULL_DOC",
-                        "context_window_start": 0,
-                        "context_window_end": 0,
-                        "raw_text": "Article 28 processor obligations",
-                        "structured_json": '{"source_title":"GDPR","source_url":"https://example.com/gdpr","article_no":"Article 28","short_description":"Processor clauses","consequences":null,"possible_reasons":["Missing instruction clause"],"citation_quote":"processor obligations","citation_section":"Article 28"}',
-                        "structured_text": '{"article_no":"Article 28"}',
-                        "combined_text": "## RAW_TEXT_CHUNK\\nArticle 28 processor obligations",
-                        "raw_text_sha256": "e" * 64,
-                        "llm_model": "test-llm",
-                        "embedding_model": "test-embed",
-                        "embedding": "[" + ",".join(["0.0"] * 1536) + "]",
-                    },
+                """,
+                {
+                    "id": kb_source_id,
+                    "source_id": "gdpr_regulation_2016_679",
+                    "title": "GDPR",
+                    "authority": "EUR-Lex",
+                    "source_kind": "HTML",
+                    "source_url": "https://example.com/gdpr",
+                    "local_txt_path": "kb/gdpr/content.txt",
+                    "local_md_path": "kb/gdpr/content.md",
+                    "content_sha256": "c" * 64,
+                    "char_count": 1234,
+                    "token_count": 456,
+                    "active": True,
+                },
+            )
+            driver_conn.execute(
+                """
+                INSERT INTO kb_ingest_runs (
+                  id, status, kb_manifest_sha256, chunk_size, chunk_overlap, full_doc_threshold,
+                  llm_model, embedding_model, llm_concurrency, embed_concurrency, upsert_concurrency,
+                  request_retries, total_chunks
                 )
-                assert kb_task_id is not None
-
-            command.downgrade(alembic_cfg, "base")
-
-            with engine.connect() as conn:
-                remaining_tables = set(
-                    conn.execute(
-                        sa.text("SELECT tablename FROM pg_tables WHERE schemaname = 'public'")
-                    ).scalars()
+                VALUES (
+                  %(id)s, %(status)s, %(kb_manifest_sha256)s, %(chunk_size)s, %(chunk_overlap)s,
+                  %(full_doc_threshold)s, %(llm_model)s, %(embedding_model)s, %(llm_concurrency)s,
+                  %(embed_concurrency)s, %(upsert_concurrency)s, %(request_retries)s, %(total_chunks)s
                 )
-                assert "analysis_runs" not in remaining_tables
-                assert "tenants" not in remaining_tables
-
-            engine.dispose()
-    except (DockerException, APIError, ImageNotFound) as exc:
-        pytest.skip(f"Docker or pgvector image unavailable for migration smoke test: {exc}")
+                """,
+                {
+                    "id": kb_run_id,
+                    "status": "RUNNING",
+                    "kb_manifest_sha256": "d" * 64,
+                    "chunk_size": 800,
+                    "chunk_overlap": 300,
+                    "full_doc_threshold": 50000,
+                    "llm_model": "test-llm",
+                    "embedding_model": "test-embed",
+                    "llm_concurrency": 2,
+                    "embed_concurrency": 2,
+                    "upsert_concurrency": 2,
+                    "request_retries": 1,
+                    "total_chunks": 1,
+                },
+            )
+
+        conn.execute(
+            sa.text(
+                """
+                INSERT INTO kb_ingest_tasks (
+                  id, run_id, source_id, chunk_index, chunk_count, raw_text, raw_text_sha256,
+                  chunk_token_count, doc_token_count, context_mode, context_window_start, context_window_end,
+                  context_text, llm_status, embed_status, upsert_status, final_status,
+                  structured_json, structured_text, embedding_dim, embedding
+                )
+                VALUES (
+                  :id, :run_id, :source_id, :chunk_index, :chunk_count, :raw_text, :raw_text_sha256,
+                  :chunk_token_count, :doc_token_count, :context_mode, :context_window_start, :context_window_end,
+                  :context_text, 'SUCCEEDED', 'SUCCEEDED', 'PENDING', 'PENDING',
+                  CAST(:structured_json AS jsonb), :structured_text, 1536, CAST(:embedding AS vector)
+                )
+                """
+            ),
+            {
+                "id": kb_task_id,
+                "run_id": kb_run_id,
+                "source_id": "gdpr_regulation_2016_679",
+                "chunk_index": 0,
+                "chunk_count": 1,
+                "raw_text": "Article 28 processor obligations",
+                "raw_text_sha256": "e" * 64,
+                "chunk_token_count": 10,
+                "doc_token_count": 100,
+                "context_mode": "FULL_DOC",
+                "context_window_start": 0,
+                "context_window_end": 0,
+                "context_text": "Article 28 processor obligations",
+                "structured_json": '{"source_title":"GDPR","source_url":"https://example.com/gdpr","article_no":"Article 28","short_description":"Processor clauses","consequences":null,"possible_reasons":["Missing instruction clause"],"citation_quote":"processor obligations","citation_section":"Article 28"}',
+                "structured_text": '{"article_no":"Article 28"}',
+                "embedding": "[" + ",".join(["0.0"] * 1536) + "]",
+            },
+        )
+
+        conn.execute(
+            sa.text(
+                """
+                INSERT INTO kb_chunks (
+                  source_id, source_title, source_url, chunk_index, chunk_count, chunk_token_count, doc_token_count,
+                  context_mode, context_window_start, context_window_end, raw_text, structured_json, structured_text,
+                  combined_text, raw_text_sha256, llm_model, embedding_model, embedding
+                )
+                VALUES (
+                  :source_id, :source_title, :source_url, :chunk_index, :chunk_count, :chunk_token_count, :doc_token_count,
+                  :context_mode, :context_window_start, :context_window_end, :raw_text, CAST(:structured_json AS jsonb), :structured_text,
+                  :combined_text, :raw_text_sha256, :llm_model, :embedding_model, CAST(:embedding AS vector)
+                )
+                """
+            ),
+            {
+                "source_id": "gdpr_regulation_2016_679",
+                "source_title": "GDPR",
+                "source_url": "https://example.com/gdpr",
+                "chunk_index": 0,
+                "chunk_count": 1,
+                "chunk_token_count": 10,
+                "doc_token_count": 100,
+                "context_mode": "FULL_DOC",
+                "context_window_start": 0,
+                "context_window_end": 0,
+                "raw_text": "Article 28 processor obligations",
+                "structured_json": '{"source_title":"GDPR","source_url":"https://example.com/gdpr","article_no":"Article 28","short_description":"Processor clauses","consequences":null,"possible_reasons":["Missing instruction clause"],"citation_quote":"processor obligations","citation_section":"Article 28"}',
+                "structured_text": '{"article_no":"Article 28"}',
+                "combined_text": "## RAW_TEXT_CHUNK\\nArticle 28 processor obligations",
+                "raw_text_sha256": "e" * 64,
+                "llm_model": "test-llm",
+                "embedding_model": "test-embed",
+                "embedding": "[" + ",".join(["0.0"] * 1536) + "]",
+            },
+        )
+
+    with engine.begin() as conn:
+        alembic_cfg.attributes["connection"] = conn
+        command.downgrade(alembic_cfg, "base")
+
+    with engine.connect() as conn:
+        remaining_tables = set(
+            conn.execute(
+                sa.text("SELECT tablename FROM pg_tables WHERE schemaname = 'public'")
+            ).scalars()
+        )
+        assert "analysis_runs" not in remaining_tables
+        assert "tenants" not in remaining_tables
+
+    engine.dispose()
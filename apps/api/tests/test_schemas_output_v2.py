@@ -193,6 +193,25 @@ def test_checklist_data_file_validates_against_schema() -> None:
     parsed = ChecklistDocument.model_validate(_valid_checklist_payload())
 
     assert len(parsed.checks) == 1
+    assert type(parsed.checks[0].severity) is str
+
+
+def test_checklist_from_trusted_matches_validated_document() -> None:
+    payload = _valid_checklist_payload()
+    payload["governance"] |= {"approval_status": "APPROVED", "approved_by": "reviewer", "approved_at": "2026-02-17T10:00:00+00:00"}
+    validated = ChecklistDocument.model_validate(payload)
+
+    trusted = ChecklistDocument.from_trusted(validated.model_dump(mode="json"))
+
+    assert trusted == validated
+    assert trusted.model_dump(mode="json", warnings="error") == validated.model_dump(mode="json")
+
+
+def test_checklist_from_trusted_rejects_purged_empty_document() -> None:
+    purged = _valid_checklist_payload() | {"checks": []}
+
+    with pytest.raises(ValidationError):
+        ChecklistDocument.from_trusted(purged)
 
 
 def test_checklist_item_requires_sources() -> None:
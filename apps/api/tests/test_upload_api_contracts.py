@@ -91,3 +91,20 @@ def test_checklist_draft_rejects_empty_selection_before_db_lookup() -> None:
     )
     assert resp.status_code == 400
     assert "At least one reference source" in resp.json()["detail"]
+
+
+def test_app_shutdown_closes_raw_connection_pools(monkeypatch: pytest.MonkeyPatch) -> None:
+    from upload_api import db
+
+    class _Pool:
+        closed = False
+
+        def close(self) -> None:
+            self.closed = True
+
+    pool = _Pool()
+    monkeypatch.setitem(db._raw_pools, ("postgresql://example/db", 8), pool)
+    with TestClient(app):
+        assert not pool.closed
+    assert pool.closed
+    assert db._raw_pools == {}
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import functools
 import hashlib
-import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import orjson
 import tiktoken
 
 from kb_pipeline.models import ChunkTaskPlan, PlanningResult, SourcePlan
 
+# Neighbouring chunks on each side used as context once a document exceeds the full-doc threshold.
+SURROUNDING_CHUNK_RADIUS = 3
 
+
+@functools.lru_cache(maxsize=1)
 def tokenizer() -> tiktoken.Encoding:
     try:
         return tiktoken.get_encoding("cl100k_base")
@@ -16,38 +23,109 @@ def tokenizer() -> tiktoken.Encoding:
         return tiktoken.encoding_for_model("gpt-4o-mini")
 
 
-def chunk_tokens(enc: tiktoken.Encoding, text: str, chunk_size: int, overlap: int) -> list[str]:
+def token_windows(tokens: list[int], chunk_size: int, overlap: int) -> list[list[int]]:
     if overlap >= chunk_size:
         raise ValueError("overlap must be smaller than chunk_size")
-    tokens = enc.encode(text)
     if not tokens:
         return []
-    chunks: list[str] = []
+    # Window starts in closed form: the last window is the first one that reaches the end of `tokens`,
+    # i.e. ceil((n - chunk_size) / step) + 1 windows for n > chunk_size and a single window otherwise.
     step = chunk_size - overlap
-    for start in range(0, len(tokens), step):
-        window = tokens[start : start + chunk_size]
-        if not window:
-            break
-        chunks.append(enc.decode(window))
-        if start + chunk_size >= len(tokens):
-            break
-    return chunks
+    return [tokens[start : start + chunk_size] for start in range(0, max(1, len(tokens) - overlap), step)]
+
+
+def chunk_tokens(enc: tiktoken.Encoding, text: str, chunk_size: int, overlap: int) -> list[str]:
+    return enc.decode_batch(token_windows(enc.encode(text), chunk_size, overlap))
 
 
+# Content fingerprints only; usedforsecurity=False keeps OpenSSL on its fastest (non-FIPS) path.
 def _sha256_text(text: str) -> str:
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return hashlib.sha256(text.encode("utf-8"), usedforsecurity=False).hexdigest()
 
 
 def _sha256_bytes(data: bytes) -> str:
-    return hashlib.sha256(data).hexdigest()
+    return hashlib.sha256(data, usedforsecurity=False).hexdigest()
+
 
+def _resolve_kb_path(kb_dir: Path, raw_path: str) -> Path:
+    path = Path(raw_path)
+    return path if path.is_absolute() else (kb_dir.parent / path).resolve()
 
-def _load_manifest(kb_dir: Path) -> tuple[dict, bytes]:
+
+def _load_manifest(kb_dir: Path) -> tuple[dict, str]:
     manifest_path = kb_dir / "manifest.json"
     if not manifest_path.exists():
         raise FileNotFoundError(f"{manifest_path} not found. Run scripts/build_kb.py first.")
+    # Single read: parse and fingerprint the same buffer, and hand back only the digest.
     raw = manifest_path.read_bytes()
-    return json.loads(raw.decode("utf-8")), raw
+    return orjson.loads(raw), _sha256_bytes(raw)
+
+
+def _plan_one_source(
+    item: dict,
+    *,
+    kb_dir: Path,
+    chunk_size: int,
+    overlap: int,
+    full_doc_threshold_tokens: int,
+) -> tuple[SourcePlan, list[ChunkTaskPlan], str | None]:
+    enc = tokenizer()
+    txt_path = _resolve_kb_path(kb_dir, item["txt_path"])
+    md_path = _resolve_kb_path(kb_dir, item["md_path"])
+    # Hash the bytes as read and decode once, rather than decoding and re-encoding for the digest. Newlines
+    # are normalized the way read_text() does, so CRLF sources chunk and hash their chunks as before.
+    doc_raw = txt_path.read_bytes()
+    doc_text = doc_raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    # Encode once; chunk texts and per-chunk token counts both come from the same windows.
+    doc_token_ids = enc.encode(doc_text)
+    doc_tokens = len(doc_token_ids)
+    windows = token_windows(doc_token_ids, chunk_size=chunk_size, overlap=overlap)
+    chunks = enc.decode_batch(windows)
+
+    source_plan = SourcePlan(
+        source_id=item["source_id"],
+        title=item["title"],
+        authority=item["authority"],
+        source_kind=str(item["kind"]).upper(),
+        source_url=item["url"],
+        local_txt_path=str(txt_path),
+        local_md_path=str(md_path),
+        content_sha256=_sha256_bytes(doc_raw),
+        char_count=len(doc_text),
+        token_count=doc_tokens,
+    )
+
+    # Mode and chunk count are per-source invariants; only the neighbour window depends on idx.
+    chunk_count = len(chunks)
+    last = chunk_count - 1
+    context_mode = "FULL_DOC" if doc_tokens <= full_doc_threshold_tokens else "SURROUNDING_CHUNKS"
+    task_plans: list[ChunkTaskPlan] = []
+    for idx, (raw_chunk, window) in enumerate(zip(chunks, windows)):
+        if context_mode == "FULL_DOC":
+            window_start, window_end = 0, last
+            context_indices: list[int] = []
+        else:
+            window_start = max(0, idx - SURROUNDING_CHUNK_RADIUS)
+            window_end = min(last, idx + SURROUNDING_CHUNK_RADIUS)
+            context_indices = [*range(window_start, idx), *range(idx + 1, window_end + 1)]
+        task_plans.append(
+            ChunkTaskPlan(
+                source_id=source_plan.source_id,
+                chunk_index=idx,
+                chunk_count=chunk_count,
+                raw_text=raw_chunk,
+                raw_text_sha256=_sha256_text(raw_chunk),
+                chunk_token_count=len(window),
+                doc_token_count=doc_tokens,
+                context_mode=context_mode,
+                context_window_start=window_start,
+                context_window_end=window_end,
+                context_chunk_indices=context_indices,
+            )
+        )
+    # Results are pickled back to the parent: the chunk texts already travel on the task plans, and the
+    # document text is only sent when FULL_DOC context needs it.
+    return source_plan, task_plans, doc_text if context_mode == "FULL_DOC" else None
 
 
 def plan_from_kb(
@@ -59,8 +137,9 @@ def plan_from_kb(
     full_doc_threshold_tokens: int,
     max_chunks: int | None = None,
 ) -> PlanningResult:
-    manifest, manifest_raw = _load_manifest(kb_dir)
-    enc = tokenizer()
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+    manifest, manifest_sha256 = _load_manifest(kb_dir)
 
     manifest_sources = manifest.get("sources", [])
     if source_filter:
@@ -68,76 +147,46 @@ def plan_from_kb(
     source_plans: list[SourcePlan] = []
     task_plans: list[ChunkTaskPlan] = []
     by_source: dict[str, dict] = {}
-
-    for item in manifest_sources:
-        txt_path = Path(item["txt_path"])
-        md_path = Path(item["md_path"])
-        if not txt_path.is_absolute():
-            txt_path = (kb_dir.parent / txt_path).resolve()
-        if not md_path.is_absolute():
-            md_path = (kb_dir.parent / md_path).resolve()
-        doc_text = txt_path.read_text(encoding="utf-8")
-        doc_tokens = len(enc.encode(doc_text))
-        chunks = chunk_tokens(enc, doc_text, chunk_size=chunk_size, overlap=overlap)
-
-        source_plans.append(
-            SourcePlan(
-                source_id=item["source_id"],
-                title=item["title"],
-                authority=item["authority"],
-                source_kind=str(item["kind"]).upper(),
-                source_url=item["url"],
-                local_txt_path=str(txt_path),
-                local_md_path=str(md_path),
-                content_sha256=_sha256_text(doc_text),
-                char_count=len(doc_text),
-                token_count=doc_tokens,
-            )
-        )
-
-        by_source[item["source_id"]] = {
-            "chunks": len(chunks),
-            "doc_tokens": doc_tokens,
-            "context_mode_counts": {"FULL_DOC": 0, "SURROUNDING_CHUNKS": 0},
-        }
-
-        for idx, raw_chunk in enumerate(chunks):
+    source_texts: dict[str, str] = {}
+    source_chunks: dict[str, list[str]] = {}
+
+    # Sources are independent and planning is CPU-bound (tokenize, decode, hash), so fan out across
+    # processes; results come back in manifest order and are merged below. executor.map submits every
+    # source up front, so a max_chunks plan (usually satisfied by the first source or two) plans lazily
+    # in-process instead.
+    workers = 1 if max_chunks is not None else min(len(manifest_sources), os.cpu_count() or 1)
+    plan_one = functools.partial(
+        _plan_one_source,
+        kb_dir=kb_dir,
+        chunk_size=chunk_size,
+        overlap=overlap,
+        full_doc_threshold_tokens=full_doc_threshold_tokens,
+    )
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        results = (executor.map if executor else map)(plan_one, manifest_sources)
+        for source_plan, source_tasks, doc_text in results:
+            source_id = source_plan.source_id
+            source_plans.append(source_plan)
+            if doc_text is not None:
+                source_texts[source_id] = doc_text
+            chunks = source_chunks[source_id] = [task.raw_text for task in source_tasks]
+            if max_chunks is not None:
+                source_tasks = source_tasks[: max(0, max_chunks - len(task_plans))]
+            context_mode_counts = {"FULL_DOC": 0, "SURROUNDING_CHUNKS": 0}
+            for task in source_tasks:
+                context_mode_counts[task.context_mode] += 1
+            by_source[source_id] = {
+                "chunks": len(chunks),
+                "doc_tokens": source_plan.token_count,
+                "context_mode_counts": context_mode_counts,
+            }
+            task_plans.extend(source_tasks)
             if max_chunks is not None and len(task_plans) >= max_chunks:
                 break
-            chunk_tokens_count = len(enc.encode(raw_chunk))
-            if doc_tokens <= full_doc_threshold_tokens:
-                context_mode = "FULL_DOC"
-                context_text = doc_text
-                window_start = 0
-                window_end = len(chunks) - 1
-            else:
-                context_mode = "SURROUNDING_CHUNKS"
-                top = max(0, idx - 3)
-                bottom = min(len(chunks) - 1, idx + 3)
-                neighbors = [
-                    f"[Chunk {n + 1}/{len(chunks)}]\n{chunks[n]}" for n in range(top, bottom + 1) if n != idx
-                ]
-                context_text = "\n\n".join(neighbors)
-                window_start = top
-                window_end = bottom
-            by_source[item["source_id"]]["context_mode_counts"][context_mode] += 1
-            task_plans.append(
-                ChunkTaskPlan(
-                    source_id=item["source_id"],
-                    chunk_index=idx,
-                    chunk_count=len(chunks),
-                    raw_text=raw_chunk,
-                    raw_text_sha256=_sha256_text(raw_chunk),
-                    chunk_token_count=chunk_tokens_count,
-                    doc_token_count=doc_tokens,
-                    context_mode=context_mode,
-                    context_window_start=window_start,
-                    context_window_end=window_end,
-                    context_text=context_text,
-                )
-            )
-        if max_chunks is not None and len(task_plans) >= max_chunks:
-            break
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
 
     summary = {
         "sources": len(source_plans),
@@ -149,8 +198,10 @@ def plan_from_kb(
     }
 
     return PlanningResult(
-        manifest_sha256=_sha256_bytes(manifest_raw),
+        manifest_sha256=manifest_sha256,
         sources=source_plans,
         tasks=task_plans,
         summary=summary,
+        source_texts=source_texts,
+        source_chunks=source_chunks,
     )
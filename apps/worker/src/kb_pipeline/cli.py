@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import argparse
 import asyncio
-import json
+import dataclasses
+import sys
 from datetime import UTC, datetime
 from pathlib import Path
 
+import orjson
 from dotenv import load_dotenv
 
 from kb_pipeline.config import PipelineConfig
@@ -24,8 +26,13 @@ def _common_args(parser: argparse.ArgumentParser) -> None:
 
 def _runtime_args(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--llm-concurrency", type=int, default=None)
+    parser.add_argument("--llm-batch-size", type=int, default=None, help="Chunks packed per LLM request (default 1)")
+    parser.add_argument("--llm-dedup", action="store_true", help="Reuse one extraction for chunks whose text repeats")
     parser.add_argument("--embed-concurrency", type=int, default=None)
+    parser.add_argument("--embed-batch-size", type=int, default=None, help="Chunks per embeddings request")
+    parser.add_argument("--embed-batch-max-tokens", type=int, default=None, help="Estimated token budget per embeddings request")
     parser.add_argument("--upsert-concurrency", type=int, default=None)
+    parser.add_argument("--upsert-batch-size", type=int, default=None, help="Chunks written per kb_chunks upsert")
     parser.add_argument("--request-retries", type=int, default=None)
     parser.add_argument("--timeout-seconds", type=int, default=None)
     parser.add_argument("--queue-maxsize", type=int, default=None)
@@ -57,67 +64,83 @@ def _parse_args() -> argparse.Namespace:
 
 
 def _build_config_from_args(args: argparse.Namespace) -> PipelineConfig:
-    cfg = PipelineConfig.from_env()
-
-    def maybe(name: str, value: object) -> None:
-        nonlocal cfg
-        if value is not None:
-            cfg = cfg.__class__(**{**cfg.__dict__, name: value})
-
-    maybe("chunk_size", getattr(args, "chunk_size", None))
-    maybe("chunk_overlap", getattr(args, "overlap", None))
-    maybe("full_doc_threshold_tokens", getattr(args, "full_doc_threshold", None))
-    maybe("llm_concurrency", getattr(args, "llm_concurrency", None))
-    maybe("embed_concurrency", getattr(args, "embed_concurrency", None))
-    maybe("upsert_concurrency", getattr(args, "upsert_concurrency", None))
-    maybe("request_retries", getattr(args, "request_retries", None))
-    maybe("request_timeout_seconds", getattr(args, "timeout_seconds", None))
-    maybe("queue_maxsize", getattr(args, "queue_maxsize", None))
-    return cfg
+    overrides = {
+        "chunk_size": getattr(args, "chunk_size", None),
+        "chunk_overlap": getattr(args, "overlap", None),
+        "full_doc_threshold_tokens": getattr(args, "full_doc_threshold", None),
+        "llm_concurrency": getattr(args, "llm_concurrency", None),
+        "llm_batch_size": getattr(args, "llm_batch_size", None),
+        "llm_dedup": True if getattr(args, "llm_dedup", False) else None,
+        "embed_concurrency": getattr(args, "embed_concurrency", None),
+        "embed_batch_size": getattr(args, "embed_batch_size", None),
+        "embed_batch_max_tokens": getattr(args, "embed_batch_max_tokens", None),
+        "upsert_concurrency": getattr(args, "upsert_concurrency", None),
+        "upsert_batch_size": getattr(args, "upsert_batch_size", None),
+        "request_retries": getattr(args, "request_retries", None),
+        "request_timeout_seconds": getattr(args, "timeout_seconds", None),
+        "queue_maxsize": getattr(args, "queue_maxsize", None),
+    }
+    return dataclasses.replace(
+        PipelineConfig.from_env(),
+        **{name: value for name, value in overrides.items() if value is not None},
+    )
+
+
+def _print_json(value: object) -> None:
+    # orjson emits bytes directly; flush text-mode stdout first so earlier progress lines stay ahead of it.
+    sys.stdout.flush()
+    sys.stdout.buffer.write(
+        orjson.dumps(value, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    )
+    sys.stdout.buffer.flush()
 
 
 async def _run_async(args: argparse.Namespace) -> int:
     cfg = _build_config_from_args(args)
     repo = KbRepository(cfg.database_url)
     orchestrator = KbPipelineOrchestrator(cfg, repo)
-
-    if args.command == "plan":
-        plan = orchestrator.build_plan(kb_dir=args.kb_dir, source_ids=args.source_id, max_chunks=args.max_chunks)
-        out = {
-            "generated_at_utc": datetime.now(UTC).isoformat(),
-            "manifest_sha256": plan.manifest_sha256,
-            **plan.summary,
-            "config": {
-                "chunk_size": cfg.chunk_size,
-                "chunk_overlap": cfg.chunk_overlap,
-                "full_doc_threshold_tokens": cfg.full_doc_threshold_tokens,
-            },
-        }
-        print(json.dumps(out, indent=2))
-        return 0
-
-    if args.command == "status":
-        repo.assert_schema_ready()
-        status = await asyncio.to_thread(repo.status, args.run_id)
-        print(json.dumps(status, indent=2, default=str))
-        return 0
-
-    cfg.require_runtime_secrets()
     try:
-        if args.command == "run":
-            result = await orchestrator.run_new(kb_dir=args.kb_dir, source_ids=args.source_id, max_chunks=args.max_chunks)
-        elif args.command == "resume":
-            result = await orchestrator.resume(args.run_id, failed_only=False)
-        elif args.command == "retry-failed":
-            result = await orchestrator.resume(args.run_id, failed_only=True)
-        else:
-            raise RuntimeError(f"Unsupported command: {args.command}")
-    except KeyboardInterrupt:
-        if hasattr(args, "run_id") and args.run_id:
-            await asyncio.to_thread(repo.cancel_run, args.run_id, "Interrupted by user")
-        raise
-    print(json.dumps(result, indent=2, default=str))
-    return 0
+        if args.command == "plan":
+            plan = orchestrator.build_plan(kb_dir=args.kb_dir, source_ids=args.source_id, max_chunks=args.max_chunks)
+            out = {
+                "generated_at_utc": datetime.now(UTC).isoformat(),
+                "manifest_sha256": plan.manifest_sha256,
+                **plan.summary,
+                "config": {
+                    "chunk_size": cfg.chunk_size,
+                    "chunk_overlap": cfg.chunk_overlap,
+                    "full_doc_threshold_tokens": cfg.full_doc_threshold_tokens,
+                },
+            }
+            _print_json(out)
+            return 0
+
+        if args.command == "status":
+            await repo.connect(max_size=1)
+            await repo.assert_schema_ready()
+            status = await repo.status(args.run_id)
+            _print_json(status)
+            return 0
+
+        cfg.require_runtime_secrets()
+        try:
+            if args.command == "run":
+                result = await orchestrator.run_new(kb_dir=args.kb_dir, source_ids=args.source_id, max_chunks=args.max_chunks)
+            elif args.command == "resume":
+                result = await orchestrator.resume(args.run_id, failed_only=False)
+            elif args.command == "retry-failed":
+                result = await orchestrator.resume(args.run_id, failed_only=True)
+            else:
+                raise RuntimeError(f"Unsupported command: {args.command}")
+        except KeyboardInterrupt:
+            if hasattr(args, "run_id") and args.run_id:
+                await orchestrator.connect()
+                await repo.cancel_run(args.run_id, "Interrupted by user")
+            raise
+        _print_json(result)
+        return 0
+    finally:
+        await orchestrator.aclose()
 
 
 def main() -> int:
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 
 
-@dataclass(frozen=True)
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+@dataclass(frozen=True, slots=True)
 class PipelineConfig:
     database_url: str
     openrouter_api_key: str
@@ -15,12 +22,23 @@ class PipelineConfig:
     chunk_overlap: int = 300
     full_doc_threshold_tokens: int = 50_000
     llm_concurrency: int = 4
+    # Chunks packed into one LLM request. 1 (default) keeps one chunk per call; larger values amortise the
+    # system prompt across the batch but can cost extraction quality or drop items at high values.
+    llm_batch_size: int = 1
+    # Opt-in: chunks with byte-identical text (boilerplate, repeated recitals) reuse the first extraction in a
+    # run. Off by default because article_no, citation_section and description depend on the chunk's source
+    # and context, so reused extractions can differ from what a fresh call would produce.
+    llm_dedup: bool = False
     embed_concurrency: int = 8
+    embed_batch_size: int = 16
+    embed_batch_max_tokens: int = 100_000
     upsert_concurrency: int = 8
+    upsert_batch_size: int = 32
     request_retries: int = 3
     request_timeout_seconds: int = 180
     queue_maxsize: int = 64
-    llm_validation_retries: int = 1
+    status_flush_batch_size: int = 50
+    status_flush_interval_ms: int = 200
     progress_heartbeat_seconds: int = 10
 
     @classmethod
@@ -28,24 +46,32 @@ class PipelineConfig:
         database_url = os.getenv("DATABASE_URL", "").strip()
         openrouter_api_key = os.getenv("OPENROUTER_API_KEY", "").strip()
         openai_api_key = os.getenv("OPENAI_API_KEY", "").strip()
+        # With slots=True the class attributes are slot descriptors, so read defaults from the fields.
+        defaults = {f.name: f.default for f in fields(cls)}
         return cls(
             database_url=database_url,
             openrouter_api_key=openrouter_api_key,
             openai_api_key=openai_api_key,
-            openrouter_model=os.getenv("OPENROUTER_MODEL", cls.openrouter_model),
-            openai_embedding_model=os.getenv("OPENAI_EMBEDDING_MODEL", cls.openai_embedding_model),
-            chunk_size=int(os.getenv("KB_CHUNK_SIZE", cls.chunk_size)),
-            chunk_overlap=int(os.getenv("KB_CHUNK_OVERLAP", cls.chunk_overlap)),
-            full_doc_threshold_tokens=int(os.getenv("KB_FULL_DOC_THRESHOLD_TOKENS", cls.full_doc_threshold_tokens)),
-            llm_concurrency=int(os.getenv("KB_LLM_CONCURRENCY", cls.llm_concurrency)),
-            embed_concurrency=int(os.getenv("KB_EMBED_CONCURRENCY", cls.embed_concurrency)),
-            upsert_concurrency=int(os.getenv("KB_UPSERT_CONCURRENCY", cls.upsert_concurrency)),
-            request_retries=int(os.getenv("KB_REQUEST_RETRIES", cls.request_retries)),
-            request_timeout_seconds=int(os.getenv("KB_REQUEST_TIMEOUT_SECONDS", cls.request_timeout_seconds)),
-            queue_maxsize=int(os.getenv("KB_QUEUE_MAXSIZE", cls.queue_maxsize)),
-            llm_validation_retries=int(os.getenv("KB_LLM_VALIDATION_RETRIES", cls.llm_validation_retries)),
+            openrouter_model=os.getenv("OPENROUTER_MODEL", defaults["openrouter_model"]),
+            openai_embedding_model=os.getenv("OPENAI_EMBEDDING_MODEL", defaults["openai_embedding_model"]),
+            chunk_size=int(os.getenv("KB_CHUNK_SIZE", defaults["chunk_size"])),
+            chunk_overlap=int(os.getenv("KB_CHUNK_OVERLAP", defaults["chunk_overlap"])),
+            full_doc_threshold_tokens=int(os.getenv("KB_FULL_DOC_THRESHOLD_TOKENS", defaults["full_doc_threshold_tokens"])),
+            llm_concurrency=int(os.getenv("KB_LLM_CONCURRENCY", defaults["llm_concurrency"])),
+            llm_batch_size=int(os.getenv("KB_LLM_BATCH_SIZE", defaults["llm_batch_size"])),
+            llm_dedup=_env_bool("KB_LLM_DEDUP", defaults["llm_dedup"]),
+            embed_concurrency=int(os.getenv("KB_EMBED_CONCURRENCY", defaults["embed_concurrency"])),
+            embed_batch_size=int(os.getenv("KB_EMBED_BATCH_SIZE", defaults["embed_batch_size"])),
+            embed_batch_max_tokens=int(os.getenv("KB_EMBED_BATCH_MAX_TOKENS", defaults["embed_batch_max_tokens"])),
+            upsert_concurrency=int(os.getenv("KB_UPSERT_CONCURRENCY", defaults["upsert_concurrency"])),
+            upsert_batch_size=int(os.getenv("KB_UPSERT_BATCH_SIZE", defaults["upsert_batch_size"])),
+            request_retries=int(os.getenv("KB_REQUEST_RETRIES", defaults["request_retries"])),
+            request_timeout_seconds=int(os.getenv("KB_REQUEST_TIMEOUT_SECONDS", defaults["request_timeout_seconds"])),
+            queue_maxsize=int(os.getenv("KB_QUEUE_MAXSIZE", defaults["queue_maxsize"])),
+            status_flush_batch_size=int(os.getenv("KB_STATUS_FLUSH_BATCH_SIZE", defaults["status_flush_batch_size"])),
+            status_flush_interval_ms=int(os.getenv("KB_STATUS_FLUSH_INTERVAL_MS", defaults["status_flush_interval_ms"])),
             progress_heartbeat_seconds=int(
-                os.getenv("KB_PROGRESS_HEARTBEAT_SECONDS", cls.progress_heartbeat_seconds)
+                os.getenv("KB_PROGRESS_HEARTBEAT_SECONDS", defaults["progress_heartbeat_seconds"])
             ),
         )
 
@@ -1,15 +1,16 @@
 from __future__ import annotations
 
 import asyncio
-import json
-import time
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
+from array import array
+
+import httpx
+import orjson
 
 from kb_pipeline.config import PipelineConfig
 from kb_pipeline.models import EmbedStageResult, TaskPayload
 
-OPENAI_EMBED_URL = "https://api.openai.com/v1/embeddings"
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+OPENAI_EMBED_PATH = "/embeddings"
 USER_AGENT = "AI-DPA-KB-Pipeline/1.0 (+local-dev)"
 
 
@@ -20,63 +21,86 @@ def combined_text_for_embedding(task: TaskPayload) -> str:
         "## RAW_TEXT_CHUNK\n"
         f"{task.raw_text.strip()}\n\n"
         "## STRUCTURED_OUTPUT\n"
-        f"{json.dumps(task.structured_json, ensure_ascii=False, indent=2)}\n"
+        f"{orjson.dumps(task.structured_json, option=orjson.OPT_INDENT_2).decode('utf-8')}\n"
     )
 
 
 class OpenAIEmbeddingClient:
-    def __init__(self, config: PipelineConfig) -> None:
+    def __init__(self, config: PipelineConfig, http: httpx.AsyncClient | None = None) -> None:
         self._config = config
+        # Auth and content headers never change per client; they ride on each request so a keep-alive
+        # pool handed in by the caller can be shared with the other provider's client.
+        self._headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {config.openai_api_key}",
+            "User-Agent": USER_AGENT,
+        }
+        self._owns_http = http is None
+        if http is None:
+            pool_size = max(1, config.embed_concurrency)
+            http = httpx.AsyncClient(
+                timeout=config.request_timeout_seconds,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            )
+        self._http = http
+
+    async def aclose(self) -> None:
+        if self._owns_http:
+            await self._http.aclose()
 
     async def embed(self, task: TaskPayload) -> EmbedStageResult:
-        return await asyncio.to_thread(self._embed_sync, task)
+        return (await self.embed_batch([task]))[0]
 
-    def _embed_sync(self, task: TaskPayload) -> EmbedStageResult:
-        combined_text = combined_text_for_embedding(task)
-        payload = {"model": self._config.openai_embedding_model, "input": combined_text}
+    async def embed_batch(self, tasks: list[TaskPayload]) -> list[EmbedStageResult]:
+        # One request for the whole batch; results are returned in the same order as `tasks`.
+        if not tasks:
+            return []
+        texts = [combined_text_for_embedding(task) for task in tasks]
+        body = orjson.dumps({"model": self._config.openai_embedding_model, "input": texts})
 
         attempts_used = 0
         last_exc: Exception | None = None
         for attempt in range(self._config.request_retries + 1):
             attempts_used = attempt + 1
             try:
-                res = self._json_request(payload)
-                embedding = res["data"][0]["embedding"]
-                if not isinstance(embedding, list) or not embedding:
-                    raise ValueError("Invalid embedding response payload")
-                return EmbedStageResult(
-                    task_id=task.task_id,
-                    embedding=[float(v) for v in embedding],
-                    embedding_dim=len(embedding),
-                    attempts_used=attempts_used,
-                )
-            except HTTPError as exc:
+                res = await self._json_request(body)
+                data = sorted(res["data"], key=lambda item: item["index"])
+                if len(data) != len(tasks):
+                    raise ValueError(f"Expected {len(tasks)} embeddings, got {len(data)}")
+                results: list[EmbedStageResult] = []
+                for task, text, item in zip(tasks, texts, data):
+                    embedding = item["embedding"]
+                    if not isinstance(embedding, list) or not embedding:
+                        raise ValueError("Invalid embedding response payload")
+                    results.append(
+                        EmbedStageResult(
+                            task_id=task.task_id,
+                            embedding=array("f", embedding),
+                            embedding_dim=len(embedding),
+                            attempts_used=attempts_used,
+                            combined_text=text,
+                        )
+                    )
+                return results
+            except httpx.HTTPStatusError as exc:
                 last_exc = exc
-                status = getattr(exc, "code", None)
-                retryable = status == 429 or (status is not None and 500 <= status < 600)
+                status = exc.response.status_code
+                retryable = status == 429 or 500 <= status < 600
                 if not retryable or attempt >= self._config.request_retries:
                     raise
-                retry_after = exc.headers.get("Retry-After") if exc.headers else None
+                retry_after = exc.response.headers.get("Retry-After")
                 delay = float(retry_after) if (retry_after and retry_after.isdigit()) else min(10.0, 0.75 * (2**attempt))
-                time.sleep(delay)
-            except URLError as exc:
+                await asyncio.sleep(delay)
+            except httpx.TransportError as exc:
                 last_exc = exc
                 if attempt >= self._config.request_retries:
                     raise
-                time.sleep(min(10.0, 0.75 * (2**attempt)))
+                await asyncio.sleep(min(10.0, 0.75 * (2**attempt)))
         if last_exc is not None:
             raise last_exc
         raise RuntimeError("Unexpected embedding request loop exit")
 
-    def _json_request(self, payload: dict) -> dict:
-        req = Request(
-            OPENAI_EMBED_URL,
-            data=json.dumps(payload).encode("utf-8"),
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self._config.openai_api_key}",
-                "User-Agent": USER_AGENT,
-            },
-        )
-        with urlopen(req, timeout=self._config.request_timeout_seconds) as resp:  # noqa: S310
-            return json.loads(resp.read().decode("utf-8"))
+    async def _json_request(self, body: bytes) -> dict:
+        resp = await self._http.post(OPENAI_BASE_URL + OPENAI_EMBED_PATH, content=body, headers=self._headers)
+        resp.raise_for_status()
+        return orjson.loads(resp.content)
@@ -1,52 +1,125 @@
 from __future__ import annotations
 
 import asyncio
-import json
-import time
 from typing import Any
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
+
+import httpx
+import orjson
+from pydantic import ValidationError
 
 from kb_pipeline.config import PipelineConfig
-from kb_pipeline.models import KbStructureOutput, LlmStageResult, TaskPayload
-from kb_pipeline.prompts import system_prompt, user_prompt
+from kb_pipeline.models import KbStructureBatchOutput, KbStructureOutput, LlmStageResult, TaskPayload
+from kb_pipeline.prompts import system_prompt, system_prompt_batched, user_prompt, user_prompt_batched
 
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+OPENROUTER_CHAT_PATH = "/chat/completions"
 USER_AGENT = "AI-DPA-KB-Pipeline/1.0 (+local-dev)"
+# The schema is fixed per model class, so generate it once rather than on every request.
+RESPONSE_FORMAT: dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "KbStructureOutput",
+        "strict": True,
+        "schema": KbStructureOutput.model_json_schema(),
+    },
+}
+BATCH_RESPONSE_FORMAT: dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "KbStructureBatchOutput",
+        "strict": True,
+        "schema": KbStructureBatchOutput.model_json_schema(),
+    },
+}
 
 
 class OpenRouterClient:
-    def __init__(self, config: PipelineConfig) -> None:
+    def __init__(self, config: PipelineConfig, http: httpx.AsyncClient | None = None) -> None:
         self._config = config
+        # Auth and content headers never change per client; they ride on each request so a keep-alive
+        # pool handed in by the caller can be shared with the other provider's client.
+        self._headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {config.openrouter_api_key}",
+            "User-Agent": USER_AGENT,
+        }
+        self._owns_http = http is None
+        if http is None:
+            pool_size = max(1, config.llm_concurrency)
+            http = httpx.AsyncClient(
+                timeout=config.request_timeout_seconds,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            )
+        self._http = http
+
+    async def aclose(self) -> None:
+        if self._owns_http:
+            await self._http.aclose()
 
     async def extract(self, task: TaskPayload) -> LlmStageResult:
-        return await asyncio.to_thread(self._extract_sync, task)
+        raw_content, attempts_used = await self._complete(
+            system_prompt(), user_prompt(task), response_format=RESPONSE_FORMAT
+        )
+        try:
+            model_obj = KbStructureOutput.model_validate_json(raw_content)
+        except ValidationError as exc:  # schema/json validation failure
+            raise ValueError(f"LLM structured output validation failed: {exc}") from exc
+        return self._stage_result(task, model_obj.model_dump(), attempts_used)
+
+    async def extract_batch(self, tasks: list[TaskPayload]) -> dict[str, LlmStageResult]:
+        # One request for several chunks. Returns results keyed by task_id; items the model dropped or
+        # duplicated are simply absent, and the caller falls back to `extract` for them.
+        raw_content, attempts_used = await self._complete(
+            system_prompt_batched(), user_prompt_batched(tasks), response_format=BATCH_RESPONSE_FORMAT
+        )
+        try:
+            batch = KbStructureBatchOutput.model_validate_json(raw_content)
+        except ValidationError as exc:
+            raise ValueError(f"LLM structured batch output validation failed: {exc}") from exc
+        by_item_id = {str(position): task for position, task in enumerate(tasks, start=1)}
+        results: dict[str, LlmStageResult] = {}
+        for item in batch.results:
+            task = by_item_id.pop(item.id, None)
+            if task is not None:
+                results[task.task_id] = self._stage_result(task, item.model_dump(exclude={"id"}), attempts_used)
+        return results
 
-    def _extract_sync(self, task: TaskPayload) -> LlmStageResult:
+    @staticmethod
+    def rebind(task: TaskPayload, result: LlmStageResult) -> LlmStageResult:
+        # Reuse another chunk's extraction for `task` without a request, swapping in this task's source metadata.
+        return OpenRouterClient._stage_result(task, dict(result.structured_json), 1)
+
+    @staticmethod
+    def _stage_result(task: TaskPayload, out: dict[str, Any], attempts_used: int) -> LlmStageResult:
+        out["source_title"] = task.source_title
+        out["source_url"] = task.source_url
+        return LlmStageResult(
+            task_id=task.task_id,
+            structured_json=out,
+            structured_text=orjson.dumps(out).decode("utf-8"),
+            attempts_used=attempts_used,
+        )
+
+    async def _complete(
+        self, system_content: str, user_content: str, *, response_format: dict[str, Any]
+    ) -> tuple[str, int]:
         payload = {
             "model": self._config.openrouter_model,
             "temperature": 0,
             "reasoning": {"enabled": False},
             "messages": [
-                {"role": "system", "content": system_prompt()},
-                {"role": "user", "content": user_prompt(task)},
+                {"role": "system", "content": system_content},
+                {"role": "user", "content": user_content},
             ],
-            "response_format": {
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "KbStructureOutput",
-                    "strict": True,
-                    "schema": KbStructureOutput.model_json_schema(),
-                },
-            },
+            "response_format": response_format,
         }
+        # The prompts are built once per call; serialise the request body once too so retries resend the same bytes.
+        body = orjson.dumps(payload)
 
-        attempts_used = 0
         last_exc: Exception | None = None
         for attempt in range(self._config.request_retries + 1):
-            attempts_used = attempt + 1
             try:
-                response = self._json_request(payload)
+                response = await self._json_request(body)
                 raw_content = response["choices"][0]["message"]["content"]
                 if isinstance(raw_content, list):
                     raw_content = "".join(
@@ -54,58 +127,26 @@ class OpenRouterClient:
                     )
                 if not isinstance(raw_content, str):
                     raise ValueError(f"Unexpected OpenRouter response content type: {type(raw_content)}")
-
-                parsed = None
-                validation_attempts = max(1, self._config.llm_validation_retries + 1)
-                validation_errors: list[str] = []
-                for _ in range(validation_attempts):
-                    try:
-                        parsed = json.loads(raw_content)
-                        model_obj = KbStructureOutput.model_validate(parsed)
-                        out = model_obj.model_dump()
-                        out["source_title"] = task.source_title
-                        out["source_url"] = task.source_url
-                        return LlmStageResult(
-                            task_id=task.task_id,
-                            structured_json=out,
-                            structured_text=json.dumps(out, ensure_ascii=False),
-                            attempts_used=attempts_used,
-                        )
-                    except Exception as exc:  # schema/json validation failure
-                        validation_errors.append(str(exc))
-                        break
-                raise ValueError("LLM structured output validation failed: " + " | ".join(validation_errors))
-            except HTTPError as exc:
+                return raw_content, attempt + 1
+            except httpx.HTTPStatusError as exc:
                 last_exc = exc
-                status = getattr(exc, "code", None)
-                retryable = status == 429 or (status is not None and 500 <= status < 600)
+                status = exc.response.status_code
+                retryable = status == 429 or 500 <= status < 600
                 if not retryable or attempt >= self._config.request_retries:
                     raise
-                retry_after = exc.headers.get("Retry-After") if exc.headers else None
+                retry_after = exc.response.headers.get("Retry-After")
                 delay = float(retry_after) if (retry_after and retry_after.isdigit()) else min(10.0, 0.75 * (2**attempt))
-                time.sleep(delay)
-            except URLError as exc:
+                await asyncio.sleep(delay)
+            except httpx.TransportError as exc:
                 last_exc = exc
                 if attempt >= self._config.request_retries:
                     raise
-                time.sleep(min(10.0, 0.75 * (2**attempt)))
-            except Exception as exc:
-                last_exc = exc
-                # Validation and non-network errors are not retried by default.
-                raise
+                await asyncio.sleep(min(10.0, 0.75 * (2**attempt)))
         if last_exc is not None:
             raise last_exc
         raise RuntimeError("Unexpected LLM request loop exit")
 
-    def _json_request(self, payload: dict[str, Any]) -> dict[str, Any]:
-        req = Request(
-            OPENROUTER_URL,
-            data=json.dumps(payload).encode("utf-8"),
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self._config.openrouter_api_key}",
-                "User-Agent": USER_AGENT,
-            },
-        )
-        with urlopen(req, timeout=self._config.request_timeout_seconds) as resp:  # noqa: S310
-            return json.loads(resp.read().decode("utf-8"))
+    async def _json_request(self, body: bytes) -> dict[str, Any]:
+        resp = await self._http.post(OPENROUTER_BASE_URL + OPENROUTER_CHAT_PATH, content=body, headers=self._headers)
+        resp.raise_for_status()
+        return orjson.loads(resp.content)
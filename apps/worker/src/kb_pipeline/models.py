@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from array import array
 from dataclasses import dataclass
 from typing import Any, Literal
 
@@ -30,7 +31,17 @@ class KbStructureOutput(BaseModel):
     citation_section: str | None = Field(default=None, description="Nearest heading/article label if visible, else null.")
 
 
-@dataclass(frozen=True)
+class KbStructureBatchItem(KbStructureOutput):
+    id: str = Field(description="Exact id of the BATCH_ITEMS entry this record describes.")
+
+
+class KbStructureBatchOutput(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    results: list[KbStructureBatchItem] = Field(description="One record per BATCH_ITEMS entry, in input order.")
+
+
+@dataclass(frozen=True, slots=True)
 class SourcePlan:
     source_id: str
     title: str
@@ -44,7 +55,7 @@ class SourcePlan:
     token_count: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ChunkTaskPlan:
     source_id: str
     chunk_index: int
@@ -56,18 +67,28 @@ class ChunkTaskPlan:
     context_mode: ContextMode
     context_window_start: int
     context_window_end: int
-    context_text: str
+    context_chunk_indices: list[int]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PlanningResult:
     manifest_sha256: str
     sources: list[SourcePlan]
     tasks: list[ChunkTaskPlan]
     summary: dict[str, Any]
+    # Shared per-source texts; tasks reference them by index instead of holding their own copies.
+    # source_texts only holds FULL_DOC sources, the only ones whose context is the whole document.
+    source_texts: dict[str, str]
+    source_chunks: dict[str, list[str]]
+
+    def context_text(self, task: ChunkTaskPlan) -> str:
+        if task.context_mode == "FULL_DOC":
+            return self.source_texts[task.source_id]
+        chunks = self.source_chunks[task.source_id]
+        return "\n\n".join(f"[Chunk {n + 1}/{len(chunks)}]\n{chunks[n]}" for n in task.context_chunk_indices)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TaskPayload:
     task_id: str
     run_id: str
@@ -86,10 +107,11 @@ class TaskPayload:
     context_text: str
     structured_json: dict[str, Any] | None = None
     structured_text: str | None = None
-    embedding: list[float] | None = None
+    # float32, matching pgvector storage; half the size of a list of boxed floats.
+    embedding: array[float] | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LlmStageResult:
     task_id: str
     structured_json: dict[str, Any]
@@ -97,20 +119,29 @@ class LlmStageResult:
     attempts_used: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EmbedStageResult:
     task_id: str
-    embedding: list[float]
+    embedding: array[float]
     embedding_dim: int
     attempts_used: int
+    # The exact text that was embedded; stored on the task so the upsert can copy it server-side.
+    combined_text: str
+
+
+@dataclass(frozen=True, slots=True)
+class StageFailure:
+    task_id: str
+    error: str
+    attempts_used: int = 1
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class UpsertStageResult:
     task_id: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RunQueueSeed:
     llm_task_ids: list[str]
     embed_task_ids: list[str]
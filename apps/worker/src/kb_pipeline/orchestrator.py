@@ -1,26 +1,90 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import dataclasses
+import sys
 import time
-from collections.abc import Mapping
+from array import array
+from collections.abc import Awaitable, Callable, Mapping
+from enum import IntEnum
 from pathlib import Path
 from typing import Any
 
+import httpx
+import orjson
+
 from kb_pipeline.chunking import plan_from_kb
 from kb_pipeline.config import PipelineConfig
 from kb_pipeline.embed_client import OpenAIEmbeddingClient
 from kb_pipeline.llm_client import OpenRouterClient
-from kb_pipeline.models import PlanningResult, RunQueueSeed, TaskPayload
+from kb_pipeline.models import EmbedStageResult, LlmStageResult, PlanningResult, RunQueueSeed, StageFailure, TaskPayload
 from kb_pipeline.repository import KbRepository
+from kb_pipeline.status_writer import StatusWriter
+
+
+class CounterIdx(IntEnum):
+    # Slot layout of the per-source progress arrays; names match progress_counts_by_source keys.
+    TOTAL_CHUNKS = 0
+    LLM_RUNNING = 1
+    LLM_SUCCEEDED = 2
+    LLM_FAILED = 3
+    EMBED_RUNNING = 4
+    EMBED_SUCCEEDED = 5
+    EMBED_FAILED = 6
+    UPSERT_RUNNING = 7
+    UPSERT_SUCCEEDED = 8
+    UPSERT_FAILED = 9
+
+
+# Same key order and compact layout as orjson.dumps of the full event dict in _log_event.
+_STAGE_EVENT_TEMPLATE = (
+    '{{"event":"kb_pipeline.chunk_stage","run_id":"{run_id}","stage":"{stage}","status":"{status}",'
+    '"latency_ms":{latency_ms},"retry_count":{retry_count},"worker_idx":{worker_idx},'
+    '"trace_id":"{run_id}:{task_id}:{stage}","source_id":{source_id},"chunk_index":{chunk_index},"chunk_count":{chunk_count}}}'
+)
+
+# Each stage's succeeded/failed slots follow its running slot.
+_STAGE_RUNNING = {"llm": CounterIdx.LLM_RUNNING, "embed": CounterIdx.EMBED_RUNNING, "upsert": CounterIdx.UPSERT_RUNNING}
 
 
 class KbPipelineOrchestrator:
     def __init__(self, config: PipelineConfig, repository: KbRepository) -> None:
         self.config = config
         self.repo = repository
-        self.llm_client = OpenRouterClient(config)
-        self.embed_client = OpenAIEmbeddingClient(config)
+        # One keep-alive pool for both providers, sized so every stage worker can hold a connection.
+        pool_size = max(1, config.llm_concurrency) + max(1, config.embed_concurrency)
+        self._http = httpx.AsyncClient(
+            timeout=config.request_timeout_seconds,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+        self.llm_client = OpenRouterClient(config, self._http)
+        self.embed_client = OpenAIEmbeddingClient(config, self._http)
+        self._status = StatusWriter(
+            repository,
+            batch_size=config.status_flush_batch_size,
+            interval_seconds=config.status_flush_interval_ms / 1000,
+            log=self._emit,
+        )
+        self._log_queue: asyncio.Queue[str | None] | None = None
+        # Bumped on every progress counter change so the heartbeat can skip idle ticks.
+        self._progress_version = 0
+        # raw_text_sha256 -> extraction for that text in the current run; None marks a failed attempt.
+        self._llm_by_text: dict[str, asyncio.Future[LlmStageResult | None]] = {}
+
+    async def aclose(self) -> None:
+        await self.llm_client.aclose()
+        await self.embed_client.aclose()
+        await self._http.aclose()
+        await self.repo.aclose()
+
+    async def connect(self) -> None:
+        # One pooled connection per stage worker plus one for the status writer.
+        await self.repo.connect(
+            max_size=max(1, self.config.llm_concurrency)
+            + max(1, self.config.embed_concurrency)
+            + max(1, self.config.upsert_concurrency)
+            + 1
+        )
 
     def build_plan(
         self,
@@ -39,271 +103,500 @@ class KbPipelineOrchestrator:
         )
 
     async def run_new(self, *, kb_dir: str, source_ids: list[str] | None = None, max_chunks: int | None = None) -> dict[str, Any]:
-        self.repo.assert_schema_ready()
+        await self.connect()
+        await self.repo.assert_schema_ready()
         plan = self.build_plan(kb_dir=kb_dir, source_ids=source_ids, max_chunks=max_chunks)
-        run_id = await asyncio.to_thread(self.repo.create_run_from_plan, plan, self.config)
+        run_id = await self.repo.create_run_from_plan(plan, self.config)
         try:
             await self._execute_run(run_id, failed_only=False)
         except BaseException:
-            await asyncio.to_thread(self.repo.cancel_run, run_id, "Interrupted during run execution")
+            await self.repo.cancel_run(run_id, "Interrupted during run execution")
             raise
-        status = await asyncio.to_thread(self.repo.finalize_run, run_id)
+        status = await self.repo.finalize_run(run_id)
         return {"run_id": run_id, "plan": plan.summary, "status": status}
 
     async def resume(self, run_id: str, *, failed_only: bool = False) -> dict[str, Any]:
-        self.repo.assert_schema_ready()
+        await self.connect()
+        await self.repo.assert_schema_ready()
         await self._execute_run(run_id, failed_only=failed_only)
-        return await asyncio.to_thread(self.repo.finalize_run, run_id)
+        return await self.repo.finalize_run(run_id)
 
     async def _execute_run(self, run_id: str, *, failed_only: bool) -> None:
-        await asyncio.to_thread(self.repo.mark_run_started, run_id)
-        seed = await asyncio.to_thread(self.repo.queue_seed, run_id, failed_only=failed_only)
-        progress = await asyncio.to_thread(self.repo.progress_counts_by_source, run_id)
-        progress_lock = asyncio.Lock()
+        self._log_queue = asyncio.Queue(maxsize=10_000)
+        log_drainer = asyncio.create_task(self._log_drainer(self._log_queue))
+        try:
+            await self._execute_stages(run_id, failed_only=failed_only)
+        finally:
+            log_queue, self._log_queue = self._log_queue, None
+            await log_queue.put(None)
+            await log_drainer
+
+    async def _execute_stages(self, run_id: str, *, failed_only: bool) -> None:
+        await self.repo.mark_run_started(run_id)
+        seed = await self.repo.queue_seed(run_id, failed_only=failed_only)
+        # Counters are only touched from the event loop between awaits, so they need no lock.
+        progress = self._progress_arrays(await self.repo.progress_counts_by_source(run_id))
         self._log_progress_init(run_id, progress)
         progress_stop = asyncio.Event()
-        progress_monitor = asyncio.create_task(self._progress_monitor(run_id, progress, progress_lock, progress_stop))
+        self._llm_by_text = {}
+        self._status.start()
 
-        llm_queue: asyncio.Queue[str] = asyncio.Queue(maxsize=self.config.queue_maxsize)
-        embed_queue: asyncio.Queue[str] = asyncio.Queue(maxsize=self.config.queue_maxsize)
-        upsert_queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max(self.config.queue_maxsize, 256))
-
-        llm_workers = [
-            asyncio.create_task(
-                self._llm_worker(
-                    run_id,
-                    llm_queue,
-                    embed_queue,
-                    worker_idx=i,
-                    progress=progress,
-                    progress_lock=progress_lock,
-                )
-            )
-            for i in range(max(1, self.config.llm_concurrency))
-        ]
-        embed_workers = [
-            asyncio.create_task(
-                self._embed_worker(
-                    run_id,
-                    embed_queue,
-                    upsert_queue,
-                    worker_idx=i,
-                    progress=progress,
-                    progress_lock=progress_lock,
-                )
-            )
-            for i in range(max(1, self.config.embed_concurrency))
-        ]
-        upsert_workers = [
-            asyncio.create_task(
-                self._upsert_worker(
-                    run_id,
-                    upsert_queue,
-                    worker_idx=i,
-                    progress=progress,
-                    progress_lock=progress_lock,
-                )
-            )
-            for i in range(max(1, self.config.upsert_concurrency))
-        ]
-
-        # Start consumers before seeding bounded queues; otherwise large runs can block
-        # during initial queue fill (e.g. > queue_maxsize tasks) and appear "hung".
-        for task_id in seed.llm_task_ids:
-            await llm_queue.put(task_id)
-        for task_id in seed.embed_task_ids:
-            await embed_queue.put(task_id)
-        for task_id in seed.upsert_task_ids:
-            await upsert_queue.put(task_id)
+        # Payloads travel through the stages in memory; only seeding reads them from the DB.
+        llm_queue: asyncio.Queue[TaskPayload] = asyncio.Queue(maxsize=self.config.queue_maxsize)
+        embed_queue: asyncio.Queue[TaskPayload] = asyncio.Queue(maxsize=self.config.queue_maxsize)
+        upsert_queue: asyncio.Queue[TaskPayload] = asyncio.Queue(maxsize=max(self.config.queue_maxsize, 256))
 
         try:
-            await llm_queue.join()
-            await embed_queue.join()
-            await upsert_queue.join()
+            # Each stage has one dispatcher; a dispatcher idles in queue.get() once its queue is drained and is
+            # cancelled there. A crashing batch makes the task group cancel the rest and surface the error.
+            async with asyncio.TaskGroup() as tg:
+                dispatchers = [
+                    tg.create_task(
+                        self._dispatch(
+                            llm_queue,
+                            concurrency=self.config.llm_concurrency,
+                            batch_size=self.config.llm_batch_size,
+                            handle=lambda batch, idx: self._llm_batch(
+                                run_id, batch, embed_queue, worker_idx=idx, progress=progress
+                            ),
+                        )
+                    ),
+                    tg.create_task(
+                        self._dispatch(
+                            embed_queue,
+                            concurrency=self.config.embed_concurrency,
+                            batch_size=self.config.embed_batch_size,
+                            handle=lambda batch, idx: self._embed_batch(
+                                run_id, batch, upsert_queue, worker_idx=idx, progress=progress
+                            ),
+                        )
+                    ),
+                    # Each upsert slot uses its own pool connection, so up to upsert_concurrency batches commit in parallel.
+                    tg.create_task(
+                        self._dispatch(
+                            upsert_queue,
+                            concurrency=self.config.upsert_concurrency,
+                            batch_size=self.config.upsert_batch_size,
+                            handle=lambda batch, idx: self._upsert_batch(run_id, batch, worker_idx=idx, progress=progress),
+                        )
+                    ),
+                ]
+                tg.create_task(self._progress_monitor(run_id, progress, progress_stop))
+
+                # Start consumers before seeding bounded queues; otherwise large runs can block
+                # during initial queue fill (e.g. > queue_maxsize tasks) and appear "hung".
+                await self._seed_queue(llm_queue, seed.llm_task_ids, stage="llm")
+                await self._seed_queue(embed_queue, seed.embed_task_ids, stage="embed")
+                await self._seed_queue(upsert_queue, seed.upsert_task_ids, stage="upsert")
+
+                await llm_queue.join()
+                await embed_queue.join()
+                await upsert_queue.join()
+                progress_stop.set()
+                for dispatcher in dispatchers:
+                    dispatcher.cancel()
         finally:
             progress_stop.set()
-            for q, workers in ((llm_queue, llm_workers), (embed_queue, embed_workers), (upsert_queue, upsert_workers)):
-                for _ in workers:
-                    await q.put("__STOP__")
-            await asyncio.gather(*llm_workers, *embed_workers, *upsert_workers, progress_monitor, return_exceptions=True)
+            # Everything buffered must be on disk before the caller finalizes the run.
+            await self._status.aclose()
+
+    @staticmethod
+    async def _log_drainer(queue: asyncio.Queue[str | None]) -> None:
+        # Single writer for stdout: whatever accumulated while the workers ran goes out in one
+        # write + flush instead of a flushed print per line. None marks the end of the run.
+        while True:
+            lines = [await queue.get()]
+            while not queue.empty() and lines[-1] is not None:
+                lines.append(queue.get_nowait())
+            stop = lines[-1] is None
+            text = "".join(f"{line}\n" for line in lines if line is not None)
+            if text:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            if stop:
+                return
+
+    def _emit(self, line: str) -> None:
+        # Outside a run (or if the drainer has fallen far behind) write straight through.
+        if self._log_queue is not None:
+            try:
+                self._log_queue.put_nowait(line)
+                return
+            except asyncio.QueueFull:
+                pass
+        sys.stdout.write(f"{line}\n")
+        sys.stdout.flush()
+
+    async def _seed_queue(self, queue: asyncio.Queue[TaskPayload], task_ids: list[str], *, stage: str) -> None:
+        # Hydrate in queue-sized slices so a large resume never holds every payload at once. Each slice is
+        # claimed (marked RUNNING for `stage`) by the same statement that loads it.
+        step = max(1, self.config.queue_maxsize)
+        for offset in range(0, len(task_ids), step):
+            for task in await self.repo.claim_task_payloads(task_ids[offset : offset + step], stage=stage):
+                # Only yield to the loop when the queue is actually full; otherwise enqueue synchronously.
+                try:
+                    queue.put_nowait(task)
+                except asyncio.QueueFull:
+                    await queue.put(task)
 
-    async def _llm_worker(
+    async def _dispatch(
+        self,
+        queue: asyncio.Queue[TaskPayload],
+        *,
+        concurrency: int,
+        batch_size: int,
+        handle: Callable[[list[TaskPayload], int], Awaitable[None]],
+    ) -> None:
+        # Free slot ids act as the stage's semaphore and double as worker_idx in the logs. A batch is only
+        # drained once a slot is free, so batches keep filling while every slot is busy.
+        slots: asyncio.Queue[int] = asyncio.Queue()
+        for idx in range(max(1, concurrency)):
+            slots.put_nowait(idx)
+        async with asyncio.TaskGroup() as tg:
+            while True:
+                worker_idx = await slots.get()
+                batch = await self._drain_batch(queue, max(1, batch_size))
+                tg.create_task(self._run_batch(queue, batch, slots, worker_idx, handle))
+
+    @staticmethod
+    async def _run_batch(
+        queue: asyncio.Queue[TaskPayload],
+        batch: list[TaskPayload],
+        slots: asyncio.Queue[int],
+        worker_idx: int,
+        handle: Callable[[list[TaskPayload], int], Awaitable[None]],
+    ) -> None:
+        try:
+            await handle(batch, worker_idx)
+        finally:
+            for _ in batch:
+                queue.task_done()
+            slots.put_nowait(worker_idx)
+
+    async def _llm_batch(
         self,
         run_id: str,
-        llm_queue: asyncio.Queue[str],
-        embed_queue: asyncio.Queue[str],
+        tasks: list[TaskPayload],
+        embed_queue: asyncio.Queue[TaskPayload],
         *,
         worker_idx: int,
-        progress: dict[str, dict[str, int]],
-        progress_lock: asyncio.Lock,
+        progress: dict[str, array[int]],
     ) -> None:
-        while True:
-            task_id = await llm_queue.get()
-            if task_id == "__STOP__":
-                llm_queue.task_done()
-                return
-            started = time.perf_counter()
+        started = time.perf_counter()
+        # Tasks reach a stage already marked RUNNING for it: claimed when seeded, or on hand-off below.
+        for task in tasks:
+            self._log_progress_stage_start(progress, task, stage="llm")
+
+        results: dict[str, LlmStageResult] = {}
+        if len(tasks) > 1:
             try:
-                await asyncio.to_thread(self.repo.mark_llm_running, task_id)
-                task = await asyncio.to_thread(self.repo.load_task_payload, task_id)
-                await self._log_progress_stage_start(progress, progress_lock, task, stage="llm")
-                result = await self.llm_client.extract(task)
-                await asyncio.to_thread(
-                    self.repo.save_llm_success,
-                    task_id,
-                    structured_json=result.structured_json,
-                    structured_text=result.structured_text,
-                    attempts_used=result.attempts_used,
-                )
-                await embed_queue.put(task_id)
-                self._log_event(
-                    run_id,
-                    task,
-                    stage="llm",
-                    status="SUCCEEDED",
-                    latency_ms=int((time.perf_counter() - started) * 1000),
-                    retry_count=max(0, result.attempts_used - 1),
-                    worker_idx=worker_idx,
-                )
-                await self._log_progress_update(progress, progress_lock, task, stage="llm", status="SUCCEEDED")
+                results = await self.llm_client.extract_batch(tasks)
             except Exception as exc:
-                task_for_log = None
-                try:
-                    task_for_log = await asyncio.to_thread(self.repo.load_task_payload, task_id)
-                except Exception:
-                    pass
-                await asyncio.to_thread(self.repo.save_llm_failure, task_id, error=str(exc), attempts_used=1)
+                # The whole packed request failed; every chunk falls back to its own request below.
                 self._log_event(
                     run_id,
-                    task_for_log,
+                    None,
                     stage="llm",
-                    status="FAILED",
+                    status="BATCH_FALLBACK",
                     latency_ms=int((time.perf_counter() - started) * 1000),
                     retry_count=0,
                     worker_idx=worker_idx,
                     error=str(exc),
                 )
-                if task_for_log is not None:
-                    await self._log_progress_update(progress, progress_lock, task_for_log, stage="llm", status="FAILED")
-            finally:
-                llm_queue.task_done()
 
-    async def _embed_worker(
-        self,
-        run_id: str,
-        embed_queue: asyncio.Queue[str],
-        upsert_queue: asyncio.Queue[str],
-        *,
-        worker_idx: int,
-        progress: dict[str, dict[str, int]],
-        progress_lock: asyncio.Lock,
-    ) -> None:
-        while True:
-            task_id = await embed_queue.get()
-            if task_id == "__STOP__":
-                embed_queue.task_done()
-                return
-            started = time.perf_counter()
+        for task in tasks:
             try:
-                await asyncio.to_thread(self.repo.mark_embed_running, task_id)
-                task = await asyncio.to_thread(self.repo.load_task_payload, task_id)
-                await self._log_progress_stage_start(progress, progress_lock, task, stage="embed")
-                result = await self.embed_client.embed(task)
-                await asyncio.to_thread(
-                    self.repo.save_embed_success,
-                    task_id,
-                    embedding=result.embedding,
-                    attempts_used=result.attempts_used,
+                result = results.get(task.task_id) or await self._extract_once(task)
+                # One write per task (success plus the embed hand-off) keeps a batch's writes adjacent in the
+                # status queue, so they coalesce into a single executemany.
+                self._status.enqueue("save_llm_success_start_embed_many", result)
+                await embed_queue.put(
+                    dataclasses.replace(task, structured_json=result.structured_json, structured_text=result.structured_text)
                 )
-                await upsert_queue.put(task_id)
                 self._log_event(
                     run_id,
                     task,
-                    stage="embed",
+                    stage="llm",
                     status="SUCCEEDED",
                     latency_ms=int((time.perf_counter() - started) * 1000),
                     retry_count=max(0, result.attempts_used - 1),
                     worker_idx=worker_idx,
                 )
-                await self._log_progress_update(progress, progress_lock, task, stage="embed", status="SUCCEEDED")
+                self._log_progress_update(progress, task, stage="llm", status="SUCCEEDED")
             except Exception as exc:
-                task_for_log = None
-                try:
-                    task_for_log = await asyncio.to_thread(self.repo.load_task_payload, task_id)
-                except Exception:
-                    pass
-                await asyncio.to_thread(self.repo.save_embed_failure, task_id, error=str(exc), attempts_used=1)
-                self._log_event(
+                await self._save_llm_failure(
                     run_id,
-                    task_for_log,
-                    stage="embed",
-                    status="FAILED",
-                    latency_ms=int((time.perf_counter() - started) * 1000),
-                    retry_count=0,
+                    task,
+                    exc,
+                    started=started,
                     worker_idx=worker_idx,
-                    error=str(exc),
+                    progress=progress,
                 )
-                if task_for_log is not None:
-                    await self._log_progress_update(progress, progress_lock, task_for_log, stage="embed", status="FAILED")
-            finally:
-                embed_queue.task_done()
 
-    async def _upsert_worker(
+    async def _extract_once(self, task: TaskPayload) -> LlmStageResult:
+        if not self.config.llm_dedup:
+            return await self.llm_client.extract(task)
+        key = task.raw_text_sha256
+        pending = self._llm_by_text.get(key)
+        if pending is not None:
+            shared = await asyncio.shield(pending)
+            if shared is not None:
+                return self.llm_client.rebind(task, shared)
+        # First copy of this text (or the earlier attempt failed): extract it and let later copies wait on us.
+        future: asyncio.Future[LlmStageResult | None] = asyncio.get_running_loop().create_future()
+        self._llm_by_text[key] = future
+        try:
+            result = await self.llm_client.extract(task)
+        except BaseException:
+            future.set_result(None)
+            if self._llm_by_text.get(key) is future:
+                del self._llm_by_text[key]
+            raise
+        future.set_result(result)
+        return result
+
+    async def _save_llm_failure(
         self,
         run_id: str,
-        upsert_queue: asyncio.Queue[str],
+        task: TaskPayload,
+        exc: Exception,
         *,
+        started: float,
         worker_idx: int,
-        progress: dict[str, dict[str, int]],
-        progress_lock: asyncio.Lock,
+        progress: dict[str, array[int]],
     ) -> None:
-        while True:
-            task_id = await upsert_queue.get()
-            if task_id == "__STOP__":
-                upsert_queue.task_done()
-                return
-            started = time.perf_counter()
+        self._status.enqueue("save_llm_failure_many", StageFailure(task_id=task.task_id, error=str(exc)))
+        self._log_event(
+            run_id,
+            task,
+            stage="llm",
+            status="FAILED",
+            latency_ms=int((time.perf_counter() - started) * 1000),
+            retry_count=0,
+            worker_idx=worker_idx,
+            error=str(exc),
+        )
+        self._log_progress_update(progress, task, stage="llm", status="FAILED")
+
+    @staticmethod
+    async def _drain_batch(queue: asyncio.Queue[TaskPayload], max_items: int) -> list[TaskPayload]:
+        # Block for the first item, then take whatever is already queued up to `max_items`.
+        # Every drained item still needs task_done().
+        items = [await queue.get()]
+        while len(items) < max_items:
             try:
-                await asyncio.to_thread(self.repo.mark_upsert_running, task_id)
-                task = await asyncio.to_thread(self.repo.load_task_payload, task_id)
-                await self._log_progress_stage_start(progress, progress_lock, task, stage="upsert")
-                await asyncio.to_thread(
-                    self.repo.save_upsert_success,
-                    task_id,
-                    llm_model=self.config.openrouter_model,
-                    embedding_model=self.config.openai_embedding_model,
-                )
-                self._log_event(
-                    run_id,
-                    task,
-                    stage="upsert",
-                    status="SUCCEEDED",
-                    latency_ms=int((time.perf_counter() - started) * 1000),
-                    retry_count=0,
-                    worker_idx=worker_idx,
-                )
-                await self._log_progress_update(progress, progress_lock, task, stage="upsert", status="SUCCEEDED")
+                items.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return items
+
+    @staticmethod
+    def _token_budget_groups(tasks: list[TaskPayload], max_tokens: int) -> list[list[TaskPayload]]:
+        # Split a drained batch so each embeddings request stays under the token budget. The estimate is the
+        # chunk's token count plus ~4 chars/token for the structured JSON appended by combined_text_for_embedding.
+        groups: list[list[TaskPayload]] = []
+        current: list[TaskPayload] = []
+        current_tokens = 0
+        for task in tasks:
+            estimate = task.chunk_token_count + len(task.structured_text or "") // 4
+            if current and current_tokens + estimate > max_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(task)
+            current_tokens += estimate
+        if current:
+            groups.append(current)
+        return groups
+
+    async def _embed_batch(
+        self,
+        run_id: str,
+        tasks: list[TaskPayload],
+        upsert_queue: asyncio.Queue[TaskPayload],
+        *,
+        worker_idx: int,
+        progress: dict[str, array[int]],
+    ) -> None:
+        started = time.perf_counter()
+        for task in tasks:
+            self._log_progress_stage_start(progress, task, stage="embed")
+
+        for group in self._token_budget_groups(tasks, self.config.embed_batch_max_tokens):
+            try:
+                results = await self.embed_client.embed_batch(group)
             except Exception as exc:
-                task_for_log = None
-                try:
-                    task_for_log = await asyncio.to_thread(self.repo.load_task_payload, task_id)
-                except Exception:
-                    pass
-                await asyncio.to_thread(self.repo.save_upsert_failure, task_id, error=str(exc))
-                self._log_event(
+                if len(group) > 1 and self._rejected_request(exc):
+                    # One bad input (e.g. over the model's token limit) gets the whole request rejected; re-issue
+                    # the group one chunk at a time so only that chunk fails.
+                    self._log_event(
+                        run_id,
+                        None,
+                        stage="embed",
+                        status="BATCH_FALLBACK",
+                        latency_ms=int((time.perf_counter() - started) * 1000),
+                        retry_count=0,
+                        worker_idx=worker_idx,
+                        error=str(exc),
+                    )
+                    for task in group:
+                        try:
+                            result = await self.embed_client.embed(task)
+                        except Exception as task_exc:
+                            await self._save_embed_failures(
+                                run_id,
+                                [task],
+                                task_exc,
+                                started=started,
+                                worker_idx=worker_idx,
+                                progress=progress,
+                            )
+                            continue
+                        await self._save_embed_success(
+                            run_id, task, result, upsert_queue, started=started, worker_idx=worker_idx, progress=progress
+                        )
+                    continue
+                await self._save_embed_failures(
                     run_id,
-                    task_for_log,
-                    stage="upsert",
-                    status="FAILED",
-                    latency_ms=int((time.perf_counter() - started) * 1000),
-                    retry_count=0,
+                    group,
+                    exc,
+                    started=started,
                     worker_idx=worker_idx,
-                    error=str(exc),
+                    progress=progress,
+                )
+                continue
+            for task, result in zip(group, results):
+                await self._save_embed_success(
+                    run_id, task, result, upsert_queue, started=started, worker_idx=worker_idx, progress=progress
                 )
-                if task_for_log is not None:
-                    await self._log_progress_update(progress, progress_lock, task_for_log, stage="upsert", status="FAILED")
-            finally:
-                upsert_queue.task_done()
+
+    @staticmethod
+    def _rejected_request(exc: Exception) -> bool:
+        # A 4xx other than 429 is not retried by the client, so re-sending the same packed input cannot succeed.
+        if not isinstance(exc, httpx.HTTPStatusError):
+            return False
+        status = exc.response.status_code
+        return 400 <= status < 500 and status != 429
+
+    async def _save_embed_success(
+        self,
+        run_id: str,
+        task: TaskPayload,
+        result: EmbedStageResult,
+        upsert_queue: asyncio.Queue[TaskPayload],
+        *,
+        started: float,
+        worker_idx: int,
+        progress: dict[str, array[int]],
+    ) -> None:
+        self._status.enqueue("save_embed_success_start_upsert_many", result)
+        # The upsert reads the stored vector back, so the payload does not need to carry it.
+        await upsert_queue.put(task)
+        self._log_event(
+            run_id,
+            task,
+            stage="embed",
+            status="SUCCEEDED",
+            latency_ms=int((time.perf_counter() - started) * 1000),
+            retry_count=max(0, result.attempts_used - 1),
+            worker_idx=worker_idx,
+        )
+        self._log_progress_update(progress, task, stage="embed", status="SUCCEEDED")
+
+    async def _save_embed_failures(
+        self,
+        run_id: str,
+        tasks: list[TaskPayload],
+        exc: Exception,
+        *,
+        started: float,
+        worker_idx: int,
+        progress: dict[str, array[int]],
+    ) -> None:
+        for task in tasks:
+            self._status.enqueue("save_embed_failure_many", StageFailure(task_id=task.task_id, error=str(exc)))
+            self._log_event(
+                run_id,
+                task,
+                stage="embed",
+                status="FAILED",
+                latency_ms=int((time.perf_counter() - started) * 1000),
+                retry_count=0,
+                worker_idx=worker_idx,
+                error=str(exc),
+            )
+            self._log_progress_update(progress, task, stage="embed", status="FAILED")
+
+    async def _upsert_batch(
+        self,
+        run_id: str,
+        tasks: list[TaskPayload],
+        *,
+        worker_idx: int,
+        progress: dict[str, array[int]],
+    ) -> None:
+        started = time.perf_counter()
+        for task in tasks:
+            self._log_progress_stage_start(progress, task, stage="upsert")
+        # save_upsert_success_many copies the structured output and embedding from kb_ingest_tasks, so the
+        # buffered llm/embed writes for these tasks must land first. A failed status write raises here and
+        # aborts the run rather than upserting from state that never reached the database.
+        await self._status.barrier()
+        try:
+            missing = await self.repo.save_upsert_success_many(
+                [task.task_id for task in tasks],
+                llm_model=self.config.openrouter_model,
+                embedding_model=self.config.openai_embedding_model,
+            )
+        except Exception as exc:
+            self._save_upsert_failures(run_id, tasks, str(exc), started=started, worker_idx=worker_idx, progress=progress)
+            return
+        # Tasks without stored stage output fail on their own; the rest of the batch is already committed.
+        missing_ids = set(missing)
+        self._save_upsert_failures(
+            run_id,
+            [task for task in tasks if task.task_id in missing_ids],
+            "Task lacks structured_json/embedding/combined_text for upsert",
+            started=started,
+            worker_idx=worker_idx,
+            progress=progress,
+        )
+        for task in tasks:
+            if task.task_id in missing_ids:
+                continue
+            self._log_event(
+                run_id,
+                task,
+                stage="upsert",
+                status="SUCCEEDED",
+                latency_ms=int((time.perf_counter() - started) * 1000),
+                retry_count=0,
+                worker_idx=worker_idx,
+            )
+            self._log_progress_update(progress, task, stage="upsert", status="SUCCEEDED")
+
+    def _save_upsert_failures(
+        self,
+        run_id: str,
+        tasks: list[TaskPayload],
+        error: str,
+        *,
+        started: float,
+        worker_idx: int,
+        progress: dict[str, array[int]],
+    ) -> None:
+        for task in tasks:
+            self._status.enqueue("save_upsert_failure_many", StageFailure(task_id=task.task_id, error=error))
+            self._log_event(
+                run_id,
+                task,
+                stage="upsert",
+                status="FAILED",
+                latency_ms=int((time.perf_counter() - started) * 1000),
+                retry_count=0,
+                worker_idx=worker_idx,
+                error=error,
+            )
+            self._log_progress_update(progress, task, stage="upsert", status="FAILED")
 
     def _log_event(
         self,
@@ -317,6 +610,24 @@ class KbPipelineOrchestrator:
         worker_idx: int,
         error: str | None = None,
     ) -> None:
+        if task is not None and not error:
+            # Hot path (one per chunk per stage): fill the fixed-layout template. Only source_id comes from
+            # outside the pipeline, so it is the one field that needs JSON escaping.
+            self._emit(
+                _STAGE_EVENT_TEMPLATE.format(
+                    run_id=run_id,
+                    task_id=task.task_id,
+                    stage=stage,
+                    status=status,
+                    latency_ms=latency_ms,
+                    retry_count=retry_count,
+                    worker_idx=worker_idx,
+                    source_id=orjson.dumps(task.source_id).decode("utf-8"),
+                    chunk_index=task.chunk_index,
+                    chunk_count=task.chunk_count,
+                )
+            )
+            return
         payload: dict[str, Any] = {
             "event": "kb_pipeline.chunk_stage",
             "run_id": run_id,
@@ -331,136 +642,105 @@ class KbPipelineOrchestrator:
             payload.update({"source_id": task.source_id, "chunk_index": task.chunk_index, "chunk_count": task.chunk_count})
         if error:
             payload["error"] = error[:500]
-        print(json.dumps(payload, ensure_ascii=False), flush=True)
+        self._emit(orjson.dumps(payload).decode("utf-8"))
 
-    def _log_progress_init(self, run_id: str, progress: Mapping[str, Mapping[str, int]]) -> None:
+    def _log_progress_init(self, run_id: str, progress: Mapping[str, array[int]]) -> None:
         if not progress:
-            print(f"[progress][init] run={run_id} no tasks queued", flush=True)
+            self._emit(f"[progress][init] run={run_id} no tasks queued")
             return
-        total_chunks = sum(int(counters.get("total_chunks", 0)) for counters in progress.values())
-        print(f"[progress][init] run={run_id} sources={len(progress)} total_chunks={total_chunks}", flush=True)
+        total_chunks = sum(counters[CounterIdx.TOTAL_CHUNKS] for counters in progress.values())
+        self._emit(f"[progress][init] run={run_id} sources={len(progress)} total_chunks={total_chunks}")
+
+    @staticmethod
+    def _progress_arrays(counts: Mapping[str, Mapping[str, int]]) -> dict[str, array[int]]:
+        return {
+            source_id: array("q", (int(counters.get(idx.name.lower(), 0)) for idx in CounterIdx))
+            for source_id, counters in counts.items()
+        }
+
+    @staticmethod
+    def _source_counters(progress: dict[str, array[int]], task: TaskPayload) -> array[int]:
+        counters = progress.get(task.source_id)
+        if counters is None:
+            counters = progress[task.source_id] = array("q", bytes(8 * len(CounterIdx)))
+            counters[CounterIdx.TOTAL_CHUNKS] = task.chunk_count
+        return counters
 
     async def _progress_monitor(
         self,
         run_id: str,
-        progress: dict[str, dict[str, int]],
-        progress_lock: asyncio.Lock,
+        progress: dict[str, array[int]],
         stop_event: asyncio.Event,
     ) -> None:
         interval = max(2, int(self.config.progress_heartbeat_seconds))
+        reported_version = -1
         while not stop_event.is_set():
             try:
                 await asyncio.wait_for(stop_event.wait(), timeout=interval)
                 break
             except asyncio.TimeoutError:
                 pass
-            async with progress_lock:
-                active_rows: list[str] = []
-                for source_id, counters in sorted(progress.items()):
-                    total = int(counters.get("total_chunks", 0))
-                    llm_running = int(counters.get("llm_running", 0))
-                    embed_running = int(counters.get("embed_running", 0))
-                    upsert_running = int(counters.get("upsert_running", 0))
-                    llm_done = int(counters.get("llm_succeeded", 0)) + int(counters.get("llm_failed", 0))
-                    embed_done = int(counters.get("embed_succeeded", 0)) + int(counters.get("embed_failed", 0))
-                    upsert_done = int(counters.get("upsert_succeeded", 0)) + int(counters.get("upsert_failed", 0))
-                    has_activity = any(
-                        [
-                            llm_running,
-                            embed_running,
-                            upsert_running,
-                            llm_done,
-                            embed_done,
-                            upsert_done,
-                        ]
+            if self._progress_version == reported_version:
+                continue
+            reported_version = self._progress_version
+            active_rows: list[str] = []
+            for source_id, counters in sorted(progress.items()):
+                total, llm_running, llm_ok, llm_fail, embed_running, embed_ok, embed_fail, upsert_running, upsert_ok, upsert_fail = counters
+                llm_done = llm_ok + llm_fail
+                embed_done = embed_ok + embed_fail
+                upsert_done = upsert_ok + upsert_fail
+                has_activity = any(
+                    [
+                        llm_running,
+                        embed_running,
+                        upsert_running,
+                        llm_done,
+                        embed_done,
+                        upsert_done,
+                    ]
+                )
+                is_complete = total > 0 and upsert_done >= total
+                if has_activity and not is_complete:
+                    active_rows.append(
+                        f"{source_id}: llm={llm_done}/{total} (running={llm_running}) "
+                        f"embed={embed_done}/{total} (running={embed_running}) "
+                        f"upsert={upsert_done}/{total} (running={upsert_running})"
                     )
-                    is_complete = total > 0 and upsert_done >= total
-                    if has_activity and not is_complete:
-                        active_rows.append(
-                            f"{source_id}: llm={llm_done}/{total} (running={llm_running}) "
-                            f"embed={embed_done}/{total} (running={embed_running}) "
-                            f"upsert={upsert_done}/{total} (running={upsert_running})"
-                        )
-                if active_rows:
-                    print(f"[progress][heartbeat] run={run_id}", flush=True)
-                    for row in active_rows:
-                        print(f"[progress][heartbeat] {row}", flush=True)
+            if active_rows:
+                self._emit(f"[progress][heartbeat] run={run_id}")
+                for row in active_rows:
+                    self._emit(f"[progress][heartbeat] {row}")
 
-    async def _log_progress_stage_start(
+    def _log_progress_stage_start(
         self,
-        progress: dict[str, dict[str, int]],
-        progress_lock: asyncio.Lock,
+        progress: dict[str, array[int]],
         task: TaskPayload,
         *,
         stage: str,
     ) -> None:
-        running_key = f"{stage}_running"
-        async with progress_lock:
-            source = progress.setdefault(
-                task.source_id,
-                {
-                    "total_chunks": task.chunk_count,
-                    "llm_running": 0,
-                    "llm_succeeded": 0,
-                    "llm_failed": 0,
-                    "embed_running": 0,
-                    "embed_succeeded": 0,
-                    "embed_failed": 0,
-                    "upsert_running": 0,
-                    "upsert_succeeded": 0,
-                    "upsert_failed": 0,
-                },
-            )
-            source[running_key] = int(source.get(running_key, 0)) + 1
-            print(
-                f"[progress][{stage}-start] {task.source_id} chunk={task.chunk_index + 1}/{task.chunk_count}",
-                flush=True,
-            )
+        counters = self._source_counters(progress, task)
+        counters[_STAGE_RUNNING[stage]] += 1
+        self._progress_version += 1
+        self._emit(f"[progress][{stage}-start] {task.source_id} chunk={task.chunk_index + 1}/{task.chunk_count}")
 
-    async def _log_progress_update(
+    def _log_progress_update(
         self,
-        progress: dict[str, dict[str, int]],
-        progress_lock: asyncio.Lock,
+        progress: dict[str, array[int]],
         task: TaskPayload,
         *,
         stage: str,
         status: str,
     ) -> None:
-        stage_key_prefix = f"{stage}_{'succeeded' if status == 'SUCCEEDED' else 'failed'}"
-        running_key = f"{stage}_running"
-        async with progress_lock:
-            source = progress.setdefault(
-                task.source_id,
-                {
-                    "total_chunks": task.chunk_count,
-                    "llm_running": 0,
-                    "llm_succeeded": 0,
-                    "llm_failed": 0,
-                    "embed_running": 0,
-                    "embed_succeeded": 0,
-                    "embed_failed": 0,
-                    "upsert_running": 0,
-                    "upsert_succeeded": 0,
-                    "upsert_failed": 0,
-                },
-            )
-            source[running_key] = max(0, int(source.get(running_key, 0)) - 1)
-            source[stage_key_prefix] = int(source.get(stage_key_prefix, 0)) + 1
-            total = int(source.get("total_chunks", task.chunk_count))
-            llm_running = int(source.get("llm_running", 0))
-            llm_ok = int(source.get("llm_succeeded", 0))
-            llm_fail = int(source.get("llm_failed", 0))
-            embed_running = int(source.get("embed_running", 0))
-            embed_ok = int(source.get("embed_succeeded", 0))
-            embed_fail = int(source.get("embed_failed", 0))
-            upsert_running = int(source.get("upsert_running", 0))
-            upsert_ok = int(source.get("upsert_succeeded", 0))
-            upsert_fail = int(source.get("upsert_failed", 0))
-            print(
-                f"[progress][{stage.lower()}] {task.source_id} "
-                f"chunks={task.chunk_count} "
-                f"llm={llm_ok + llm_fail}/{total} (ok={llm_ok}, fail={llm_fail}, running={llm_running}) "
-                f"embed={embed_ok + embed_fail}/{total} (ok={embed_ok}, fail={embed_fail}, running={embed_running}) "
-                f"upsert={upsert_ok + upsert_fail}/{total} (ok={upsert_ok}, fail={upsert_fail}, running={upsert_running})",
-                flush=True,
-            )
+        counters = self._source_counters(progress, task)
+        running = _STAGE_RUNNING[stage]
+        counters[running] = max(0, counters[running] - 1)
+        counters[running + (1 if status == "SUCCEEDED" else 2)] += 1
+        self._progress_version += 1
+        total, llm_running, llm_ok, llm_fail, embed_running, embed_ok, embed_fail, upsert_running, upsert_ok, upsert_fail = counters
+        self._emit(
+            f"[progress][{stage.lower()}] {task.source_id} "
+            f"chunks={task.chunk_count} "
+            f"llm={llm_ok + llm_fail}/{total} (ok={llm_ok}, fail={llm_fail}, running={llm_running}) "
+            f"embed={embed_ok + embed_fail}/{total} (ok={embed_ok}, fail={embed_fail}, running={embed_running}) "
+            f"upsert={upsert_ok + upsert_fail}/{total} (ok={upsert_ok}, fail={upsert_fail}, running={upsert_running})"
+        )
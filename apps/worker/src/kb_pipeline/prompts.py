@@ -1,57 +1,74 @@
 from __future__ import annotations
 
-import json
+import orjson
 
-from kb_pipeline.models import KbStructureOutput, TaskPayload
+from kb_pipeline.models import KbStructureBatchOutput, KbStructureOutput, TaskPayload
+
+
+def _dumps(value: object) -> str:
+    return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode("utf-8")
+
+
+_EXAMPLE = {
+    "source_title": "GDPR (Regulation (EU) 2016/679) - EUR-Lex EN",
+    "source_url": "https://eur-lex.europa.eu/legal-content/EN/TXT/?uri=CELEX:32016R0679",
+    "article_no": "Article 28(3)",
+    "short_description": "Requires processor terms to include mandatory clauses and bind processor actions to controller instructions.",
+    "consequences": "Missing or weak processor clauses can create GDPR non-compliance and contract remediation risk.",
+    "possible_reasons": [
+        "No clause limiting processing to documented controller instructions",
+        "Processor obligations are stated only at a high level without required specifics",
+        "Template omits audit/assistance requirements in processor terms",
+    ],
+    "citation_quote": "The processing by a processor shall be governed by a contract ... processes the personal data only on documented instructions from the controller...",
+    "citation_section": "Article 28(3)",
+}
+_EXAMPLE_AMBIGUOUS = {
+    "source_title": "EDPB Opinion 22/2024 on processor/sub-processor obligations (EN PDF)",
+    "source_url": "https://www.edpb.europa.eu/system/files/2024-10/edpb_opinion_202422_relianceonprocessors-sub-processors_en.pdf",
+    "article_no": "Section 4.2",
+    "short_description": "Explains practical interpretation boundaries for processor/sub-processor obligation chains.",
+    "consequences": None,
+    "possible_reasons": [
+        "Flow-down clauses are incomplete across the processor/sub-processor chain",
+        "Responsibilities are allocated ambiguously between processor and sub-processor",
+    ],
+    "citation_quote": "The Board considers that the contractual chain must ensure that the obligations remain effective in practice...",
+    "citation_section": "Section 4.2",
+}
+# Everything below is constant, so the prompts and schema JSON are rendered once at import rather than
+# on every chunk.
+_SYSTEM_PROMPT = (
+    "You perform contextual compression for regulatory/legal text chunks used in a DPA compliance knowledge base.\n"
+    "Task: convert one CURRENT_CHUNK_TEXT into a compact, faithful structured record for downstream RAG retrieval.\n"
+    "Return only JSON matching the provided schema. No markdown, no prose, no code fences.\n"
+    "Ground the output in CURRENT_CHUNK_TEXT first. Use extra context only for disambiguation.\n"
+    "Prioritize faithfulness over completeness. Do not invent obligations, article numbers, citations, or legal claims.\n"
+    "Copy source_title and source_url exactly from SOURCE_TITLE and SOURCE_URL metadata.\n"
+    "citation_quote must be a short verbatim quote from CURRENT_CHUNK_TEXT.\n"
+    "citation_section should be the nearest visible article/clause/heading label if present, else null.\n"
+    "If consequences are not explicit, infer practical consequences briefly or set it to null.\n"
+    "Keep short_description to 1-2 lines and possible_reasons concise (0-3 items).\n"
+    "Internal method (do not output): identify legal point in chunk -> disambiguate using context -> compress -> attach exact quote.\n"
+    f"Example JSON (clear):\n{_dumps(_EXAMPLE)}\n\n"
+    f"Example JSON (ambiguous but grounded):\n{_dumps(_EXAMPLE_AMBIGUOUS)}"
+)
+_SYSTEM_PROMPT_BATCHED = (
+    f"{_SYSTEM_PROMPT}\n\n"
+    "BATCH MODE: the user message carries several chunks in BATCH_ITEMS.\n"
+    "Treat every item independently, exactly as if it were the only CURRENT_CHUNK_TEXT (its chunk_text).\n"
+    "Each item's context lives in SHARED_CONTEXTS under its context_ref; use it only for disambiguation.\n"
+    "Return one record per item in `results`, in input order, with `id` copied exactly from the item."
+)
+_SCHEMA_JSON = _dumps(KbStructureOutput.model_json_schema())
+_BATCH_SCHEMA_JSON = _dumps(KbStructureBatchOutput.model_json_schema())
 
 
 def system_prompt() -> str:
-    example = {
-        "source_title": "GDPR (Regulation (EU) 2016/679) - EUR-Lex EN",
-        "source_url": "https://eur-lex.europa.eu/legal-content/EN/TXT/?uri=CELEX:32016R0679",
-        "article_no": "Article 28(3)",
-        "short_description": "Requires processor terms to include mandatory clauses and bind processor actions to controller instructions.",
-        "consequences": "Missing or weak processor clauses can create GDPR non-compliance and contract remediation risk.",
-        "possible_reasons": [
-            "No clause limiting processing to documented controller instructions",
-            "Processor obligations are stated only at a high level without required specifics",
-            "Template omits audit/assistance requirements in processor terms",
-        ],
-        "citation_quote": "The processing by a processor shall be governed by a contract ... processes the personal data only on documented instructions from the controller...",
-        "citation_section": "Article 28(3)",
-    }
-    example_ambiguous = {
-        "source_title": "EDPB Opinion 22/2024 on processor/sub-processor obligations (EN PDF)",
-        "source_url": "https://www.edpb.europa.eu/system/files/2024-10/edpb_opinion_202422_relianceonprocessors-sub-processors_en.pdf",
-        "article_no": "Section 4.2",
-        "short_description": "Explains practical interpretation boundaries for processor/sub-processor obligation chains.",
-        "consequences": None,
-        "possible_reasons": [
-            "Flow-down clauses are incomplete across the processor/sub-processor chain",
-            "Responsibilities are allocated ambiguously between processor and sub-processor",
-        ],
-        "citation_quote": "The Board considers that the contractual chain must ensure that the obligations remain effective in practice...",
-        "citation_section": "Section 4.2",
-    }
-    return (
-        "You perform contextual compression for regulatory/legal text chunks used in a DPA compliance knowledge base.\n"
-        "Task: convert one CURRENT_CHUNK_TEXT into a compact, faithful structured record for downstream RAG retrieval.\n"
-        "Return only JSON matching the provided schema. No markdown, no prose, no code fences.\n"
-        "Ground the output in CURRENT_CHUNK_TEXT first. Use extra context only for disambiguation.\n"
-        "Prioritize faithfulness over completeness. Do not invent obligations, article numbers, citations, or legal claims.\n"
-        "Copy source_title and source_url exactly from SOURCE_TITLE and SOURCE_URL metadata.\n"
-        "citation_quote must be a short verbatim quote from CURRENT_CHUNK_TEXT.\n"
-        "citation_section should be the nearest visible article/clause/heading label if present, else null.\n"
-        "If consequences are not explicit, infer practical consequences briefly or set it to null.\n"
-        "Keep short_description to 1-2 lines and possible_reasons concise (0-3 items).\n"
-        "Internal method (do not output): identify legal point in chunk -> disambiguate using context -> compress -> attach exact quote.\n"
-        f"Example JSON (clear):\n{json.dumps(example, indent=2)}\n\n"
-        f"Example JSON (ambiguous but grounded):\n{json.dumps(example_ambiguous, indent=2)}"
-    )
+    return _SYSTEM_PROMPT
 
 
 def user_prompt(task: TaskPayload) -> str:
-    schema = KbStructureOutput.model_json_schema()
     context_header = (
         f"FULL_DOCUMENT_CONTEXT (doc tokens={task.doc_token_count})\n{task.context_text}"
         if task.context_mode == "FULL_DOC"
@@ -67,7 +84,38 @@ def user_prompt(task: TaskPayload) -> str:
         f"CHUNK_INDEX: {task.chunk_index + 1}/{task.chunk_count}\n"
         f"CHUNK_TOKEN_COUNT_EST: {task.chunk_token_count}\n"
         f"CONTEXT_MODE: {task.context_mode}\n\n"
-        f"JSON_SCHEMA:\n{json.dumps(schema, indent=2)}\n\n"
+        f"JSON_SCHEMA:\n{_SCHEMA_JSON}\n\n"
         f"CURRENT_CHUNK_TEXT:\n{task.raw_text}\n\n"
         f"{context_header}\n"
     )
+
+
+def system_prompt_batched() -> str:
+    return _SYSTEM_PROMPT_BATCHED
+
+
+def user_prompt_batched(tasks: list[TaskPayload]) -> str:
+    # FULL_DOC items from the same source share one context; send it once and reference it by key.
+    context_refs: dict[str, str] = {}
+    items = []
+    for position, task in enumerate(tasks, start=1):
+        context_ref = context_refs.setdefault(task.context_text, f"ctx{len(context_refs) + 1}")
+        items.append(
+            {
+                "id": str(position),
+                "source_id": task.source_id,
+                "source_title": task.source_title,
+                "source_url": task.source_url,
+                "chunk_index": f"{task.chunk_index + 1}/{task.chunk_count}",
+                "chunk_token_count_est": task.chunk_token_count,
+                "context_mode": task.context_mode,
+                "context_ref": context_ref,
+                "chunk_text": task.raw_text,
+            }
+        )
+    shared_contexts = [{"ref": ref, "text": text} for text, ref in context_refs.items()]
+    return (
+        f"JSON_SCHEMA:\n{_BATCH_SCHEMA_JSON}\n\n"
+        f"BATCH_ITEMS:\n{_dumps(items)}\n\n"
+        f"SHARED_CONTEXTS:\n{_dumps(shared_contexts)}\n"
+    )
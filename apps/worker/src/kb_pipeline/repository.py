@@ -1,40 +1,278 @@
 from __future__ import annotations
 
-import json
+import struct
+import sys
 import uuid
+from array import array
+from collections.abc import Sequence
 from dataclasses import asdict
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import psycopg
-from psycopg.rows import dict_row
+import orjson
+from psycopg import AsyncConnection
+from psycopg.adapt import Dumper, Loader
+from psycopg.pq import Format
+from psycopg.rows import dict_row, tuple_row
+from psycopg.types import TypeInfo
+from psycopg.types.json import Jsonb, set_json_dumps, set_json_loads
 
 from kb_pipeline.config import PipelineConfig
-from kb_pipeline.embed_client import combined_text_for_embedding
-from kb_pipeline.models import PlanningResult, RunQueueSeed, TaskPayload
+from kb_pipeline.models import EmbedStageResult, LlmStageResult, PlanningResult, RunQueueSeed, StageFailure, TaskPayload
+
+if TYPE_CHECKING:
+    from psycopg_pool import AsyncConnectionPool
+
+# Columns read into a TaskPayload (see _row_to_payload); `t` is kb_ingest_tasks and `s` is kb_sources.
+# Payload queries fetch in binary so integers, jsonb and the vector skip server-side text formatting.
+_TASK_PAYLOAD_COLUMNS = """
+  t.id::text AS task_id,
+  t.run_id::text AS run_id,
+  t.source_id,
+  s.title AS source_title,
+  s.source_url,
+  t.chunk_index,
+  t.chunk_count,
+  t.raw_text,
+  t.raw_text_sha256,
+  t.chunk_token_count,
+  t.doc_token_count,
+  t.context_mode,
+  t.context_window_start,
+  t.context_window_end,
+  t.context_text,
+  t.structured_json,
+  t.structured_text,
+  t.embedding
+"""
+
+_STAGES = ("llm", "embed", "upsert")
+
+# Per-stage statements are built once so each stage always sends the identical SQL text and psycopg can
+# keep one server-side prepared statement per pooled connection for it.
+_CLAIM_SQL = {
+    stage: f"""
+    UPDATE kb_ingest_tasks t
+    SET {stage}_status = 'RUNNING',
+        {stage}_started_at = now(),
+        {stage}_error = NULL,
+        updated_at = now()
+    FROM kb_sources s
+    WHERE s.source_id = t.source_id
+      AND t.id = ANY(%(task_ids)s::uuid[])
+    RETURNING {_TASK_PAYLOAD_COLUMNS}
+    """
+    for stage in _STAGES
+}
+
+_MARK_RUNNING_SQL = {
+    stage: f"""
+    UPDATE kb_ingest_tasks
+    SET {stage}_status = 'RUNNING',
+        {stage}_started_at = now(),
+        {stage}_error = NULL,
+        updated_at = now()
+    WHERE id = ANY(%(task_ids)s::uuid[])
+    """
+    for stage in _STAGES
+}
+
+_STAGE_FAILURE_SQL = {
+    stage: f"""
+    UPDATE kb_ingest_tasks t
+    SET {stage}_status = 'FAILED',
+        {stage}_retry_count = f.retry_count,
+        {stage}_error = f.error,
+        {stage}_completed_at = now(),
+        final_status = 'FAILED',
+        updated_at = now()
+    FROM unnest(%(task_ids)s::uuid[], %(retry_counts)s::int[], %(errors)s::text[]) AS f(task_id, retry_count, error)
+    WHERE t.id = f.task_id
+    """
+    for stage in _STAGES
+}
+
+
+def _next_stage_set(stage: str, *, start: bool) -> str:
+    # SET clause for the stage after a successful one: left PENDING for a later claim, or moved straight to
+    # RUNNING when the pipeline hands the task on in the same write (what mark_*_running would have done).
+    if start:
+        return f"{stage}_status = 'RUNNING', {stage}_started_at = now(), {stage}_error = NULL"
+    return f"{stage}_status = CASE WHEN {stage}_status = 'SUCCEEDED' THEN {stage}_status ELSE 'PENDING' END"
+
+
+_LLM_SUCCESS_SQL = {
+    start: f"""
+    UPDATE kb_ingest_tasks
+    SET llm_status = 'SUCCEEDED',
+        llm_retry_count = %(retry_count)s,
+        llm_completed_at = now(),
+        structured_json = %(structured_json)s,
+        structured_text = %(structured_text)s,
+        {_next_stage_set("embed", start=start)},
+        upsert_status = CASE WHEN upsert_status = 'SUCCEEDED' THEN upsert_status ELSE 'PENDING' END,
+        final_status = CASE WHEN upsert_status = 'SUCCEEDED' THEN 'COMPLETED' ELSE 'PENDING' END,
+        updated_at = now()
+    WHERE id = %(task_id)s
+    """
+    for start in (False, True)
+}
+
+_EMBED_SUCCESS_SQL = {
+    start: f"""
+    UPDATE kb_ingest_tasks
+    SET embed_status = 'SUCCEEDED',
+        embed_retry_count = %(retry_count)s,
+        embed_completed_at = now(),
+        embedding_dim = %(embedding_dim)s,
+        embedding = %(embedding)s,
+        combined_text = %(combined_text)s,
+        {_next_stage_set("upsert", start=start)},
+        final_status = CASE WHEN upsert_status = 'SUCCEEDED' THEN 'COMPLETED' ELSE 'PENDING' END,
+        updated_at = now()
+    WHERE id = %(task_id)s
+    """
+    for start in (False, True)
+}
+
+
+# status() task_counts key -> predicate over the run's kb_ingest_tasks rows.
+_STATUS_TASK_COUNTS = {
+    "total": "true",
+    "completed": "final_status = 'COMPLETED'",
+    "failed": "final_status = 'FAILED'",
+    "llm_running": "llm_status = 'RUNNING'",
+    "llm_pending": "llm_status = 'PENDING'",
+    "embed_running": "embed_status = 'RUNNING'",
+    "embed_pending_ready": "embed_status = 'PENDING' AND llm_status = 'SUCCEEDED'",
+    "upsert_running": "upsert_status = 'RUNNING'",
+    "upsert_pending_ready": "upsert_status = 'PENDING' AND embed_status = 'SUCCEEDED'",
+}
+
+# Extra counts finalize_run() needs for the final status and error_summary.
+_FINALIZE_TASK_COUNTS = {
+    "pending": "final_status = 'PENDING'",
+    "llm_failed": "llm_status = 'FAILED'",
+    "embed_failed": "embed_status = 'FAILED'",
+    "upsert_failed": "upsert_status = 'FAILED'",
+}
+
+
+def _task_counts_select(counts: dict[str, str]) -> str:
+    return ",\n  ".join(f"COUNT(*) FILTER (WHERE {predicate}) AS {key}" for key, predicate in counts.items())
+
+
+# Appended to a select list with the aggregate row in scope as `c`: the status() task_counts as one jsonb.
+_TASK_COUNTS_JSON = (
+    "jsonb_build_object(" + ", ".join(f"'{key}', c.{key}" for key in _STATUS_TASK_COUNTS) + ") AS task_counts"
+)
+
+
+# Appended to a kb_ingest_runs select list: up to 20 failed tasks of that run as a jsonb array.
+_SAMPLE_FAILURES = """
+  (
+    SELECT COALESCE(jsonb_agg(f ORDER BY f.source_id, f.chunk_index), '[]'::jsonb)
+    FROM (
+      SELECT source_id, chunk_index, llm_error, embed_error, upsert_error
+      FROM kb_ingest_tasks
+      WHERE run_id = kb_ingest_runs.id AND final_status = 'FAILED'
+      ORDER BY source_id, chunk_index
+      LIMIT 20
+    ) f
+  ) AS sample_failures
+"""
+
+
+class _VectorDumper(Dumper):
+    # Sends array('f') embeddings in pgvector's binary format; `oid` is filled in per database.
+    format = Format.BINARY
+
+    def dump(self, obj: array[float]) -> bytes:
+        return KbRepository._vector_binary(obj)
+
+
+class _VectorBinaryLoader(Loader):
+    format = Format.BINARY
+
+    def load(self, data: Any) -> array[float]:
+        return KbRepository._parse_vector_binary(data)
+
+
+class _VectorTextLoader(Loader):
+    def load(self, data: Any) -> array[float] | None:
+        return KbRepository._parse_vector_text(bytes(data).decode())
 
 
 class KbRepository:
     def __init__(self, database_url: str) -> None:
         self._database_url = database_url.replace("postgresql+psycopg://", "postgresql://")
+        self._pool: AsyncConnectionPool | None = None
+        self._vector_oid: int | None = None
+        self._schema_ready = False
+
+    async def connect(self, *, max_size: int) -> None:
+        # Every query below shares one async pool sized for every stage worker, so none of them opens a
+        # connection per call or hops through worker threads. Leaving a `connection()` block commits.
+        if self._pool is not None:
+            return
+        from psycopg_pool import AsyncConnectionPool
+
+        pool = AsyncConnectionPool(
+            self._database_url,
+            kwargs={"row_factory": dict_row},
+            min_size=1,
+            max_size=max(1, max_size),
+            configure=self._configure_connection,
+            open=False,
+        )
+        await pool.open()
+        self._pool = pool
+
+    async def aclose(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
 
-    def _conn(self) -> psycopg.Connection[Any]:
-        return psycopg.connect(self._database_url, row_factory=dict_row)
+    async def _configure_connection(self, conn: AsyncConnection[Any]) -> None:
+        # jsonb parameters (wrapped in Jsonb) and results go through orjson instead of the stdlib json module.
+        set_json_dumps(orjson.dumps, conn)
+        set_json_loads(orjson.loads, conn)
+        # pgvector's type oid differs per database; look it up once and reuse it for every pooled connection.
+        # Without the extension the adapters are skipped and assert_schema_ready reports the missing schema.
+        if self._vector_oid is None:
+            info = await TypeInfo.fetch(conn, "vector")
+            if info is None:
+                return
+            self._vector_oid = info.oid
+        dumper = type("VectorDumper", (_VectorDumper,), {"oid": self._vector_oid})
+        conn.adapters.register_dumper(array, dumper)
+        conn.adapters.register_loader(self._vector_oid, _VectorTextLoader)
+        conn.adapters.register_loader(self._vector_oid, _VectorBinaryLoader)
 
-    def assert_schema_ready(self) -> None:
-        with self._conn() as conn:
-            row = conn.execute(
+    def _apool(self) -> AsyncConnectionPool:
+        if self._pool is None:
+            raise RuntimeError("KbRepository.connect() must be awaited before running async queries")
+        return self._pool
+
+    async def assert_schema_ready(self) -> None:
+        # Tables don't disappear mid-process, so one successful check per repository is enough.
+        if self._schema_ready:
+            return
+        async with self._apool().connection() as conn:
+            cur = await conn.execute(
                 "SELECT to_regclass('public.kb_ingest_runs') AS reg"
-            ).fetchone()
+            )
+            row = await cur.fetchone()
             if not row or row["reg"] is None:
                 raise RuntimeError(
                     "kb_* tables are missing. Run `make db-upgrade` to apply the kb pipeline migration."
                 )
+        self._schema_ready = True
 
-    def create_run_from_plan(self, plan: PlanningResult, config: PipelineConfig) -> str:
+    async def create_run_from_plan(self, plan: PlanningResult, config: PipelineConfig) -> str:
         run_id = str(uuid.uuid4())
-        with self._conn() as conn:
-            with conn.transaction():
-                conn.execute(
+        async with self._apool().connection() as conn:
+            async with conn.transaction():
+                await conn.execute(
                     """
                     INSERT INTO kb_ingest_runs (
                       id, status, kb_manifest_sha256, chunk_size, chunk_overlap, full_doc_threshold,
@@ -61,8 +299,8 @@ class KbRepository:
                         "total_chunks": len(plan.tasks),
                     },
                 )
-                for src in plan.sources:
-                    conn.execute(
+                async with conn.cursor() as cur:
+                    await cur.executemany(
                         """
                         INSERT INTO kb_sources (
                           source_id, title, authority, source_kind, source_url, local_txt_path, local_md_path,
@@ -84,32 +322,47 @@ class KbRepository:
                           active = true,
                           updated_at = now()
                         """,
-                        asdict(src),
+                        # Last entry wins per source_id, matching what sequential upserts would leave behind.
+                        [asdict(src) for src in {src.source_id: src for src in plan.sources}.values()],
                     )
-                for task in plan.tasks:
-                    conn.execute(
+                # Tasks are fresh rows with no conflicts to resolve, so stream them in one COPY; ids come from
+                # the column's gen_random_uuid() default.
+                async with conn.cursor() as cur:
+                    async with cur.copy(
                         """
-                        INSERT INTO kb_ingest_tasks (
-                          id, run_id, source_id, chunk_index, chunk_count, raw_text, raw_text_sha256,
+                        COPY kb_ingest_tasks (
+                          run_id, source_id, chunk_index, chunk_count, raw_text, raw_text_sha256,
                           chunk_token_count, doc_token_count, context_mode, context_window_start, context_window_end,
                           context_text, llm_status, embed_status, upsert_status, final_status
-                        ) VALUES (
-                          %(id)s, %(run_id)s, %(source_id)s, %(chunk_index)s, %(chunk_count)s, %(raw_text)s, %(raw_text_sha256)s,
-                          %(chunk_token_count)s, %(doc_token_count)s, %(context_mode)s, %(context_window_start)s, %(context_window_end)s,
-                          %(context_text)s, 'PENDING', 'PENDING', 'PENDING', 'PENDING'
-                        )
-                        """,
-                        {
-                            "id": str(uuid.uuid4()),
-                            "run_id": run_id,
-                            **asdict(task),
-                        },
-                    )
+                        ) FROM STDIN
+                        """
+                    ) as copy:
+                        for task in plan.tasks:
+                            await copy.write_row(
+                                (
+                                    run_id,
+                                    task.source_id,
+                                    task.chunk_index,
+                                    task.chunk_count,
+                                    task.raw_text,
+                                    task.raw_text_sha256,
+                                    task.chunk_token_count,
+                                    task.doc_token_count,
+                                    task.context_mode,
+                                    task.context_window_start,
+                                    task.context_window_end,
+                                    plan.context_text(task),
+                                    "PENDING",
+                                    "PENDING",
+                                    "PENDING",
+                                    "PENDING",
+                                )
+                            )
         return run_id
 
-    def mark_run_started(self, run_id: str) -> None:
-        with self._conn() as conn:
-            conn.execute(
+    async def mark_run_started(self, run_id: str) -> None:
+        async with self._apool().connection() as conn:
+            await conn.execute(
                 """
                 UPDATE kb_ingest_runs
                 SET status = 'RUNNING', started_at = COALESCE(started_at, now())
@@ -117,11 +370,10 @@ class KbRepository:
                 """,
                 {"run_id": run_id},
             )
-            conn.commit()
 
-    def cancel_run(self, run_id: str, reason: str) -> None:
-        with self._conn() as conn:
-            conn.execute(
+    async def cancel_run(self, run_id: str, reason: str) -> None:
+        async with self._apool().connection() as conn:
+            await conn.execute(
                 """
                 UPDATE kb_ingest_runs
                 SET status = 'CANCELLED', completed_at = now(), error_summary = jsonb_build_object('reason', %(reason)s)
@@ -129,80 +381,80 @@ class KbRepository:
                 """,
                 {"run_id": run_id, "reason": reason},
             )
-            conn.commit()
 
-    def queue_seed(self, run_id: str, *, failed_only: bool = False) -> RunQueueSeed:
-        with self._conn() as conn:
-            rows = conn.execute(
-                """
-                SELECT id, final_status, llm_status, embed_status, upsert_status
-                FROM kb_ingest_tasks
-                WHERE run_id = %(run_id)s
-                ORDER BY source_id, chunk_index
-                """,
-                {"run_id": run_id},
-            ).fetchall()
-        llm_ids: list[str] = []
-        embed_ids: list[str] = []
-        upsert_ids: list[str] = []
-        for row in rows:
-            if row["final_status"] == "COMPLETED":
-                continue
-            llm_status = row["llm_status"]
-            embed_status = row["embed_status"]
-            upsert_status = row["upsert_status"]
-
-            if llm_status != "SUCCEEDED":
-                if failed_only and llm_status != "FAILED":
-                    continue
-                llm_ids.append(str(row["id"]))
-                continue
-            if embed_status != "SUCCEEDED":
-                if failed_only and embed_status != "FAILED":
-                    continue
-                embed_ids.append(str(row["id"]))
-                continue
-            if upsert_status != "SUCCEEDED":
-                if failed_only and upsert_status != "FAILED":
-                    continue
-                upsert_ids.append(str(row["id"]))
-        return RunQueueSeed(llm_task_ids=llm_ids, embed_task_ids=embed_ids, upsert_task_ids=upsert_ids)
-
-    def load_task_payload(self, task_id: str) -> TaskPayload:
-        with self._conn() as conn:
-            row = conn.execute(
+    async def queue_seed(self, run_id: str, *, failed_only: bool = False) -> RunQueueSeed:
+        # Each unfinished task resumes at its first stage that has not succeeded; with failed_only it is
+        # only picked up if that stage FAILED. Bucketing happens server-side and each stage's ids come back
+        # as one array, so the result is a single row however large the run is.
+        async with self._apool().connection() as conn:
+            cur = await conn.execute(
                 """
                 SELECT
-                  t.id::text AS task_id,
-                  t.run_id::text AS run_id,
-                  t.source_id,
-                  s.title AS source_title,
-                  s.source_url,
-                  t.chunk_index,
-                  t.chunk_count,
-                  t.raw_text,
-                  t.raw_text_sha256,
-                  t.chunk_token_count,
-                  t.doc_token_count,
-                  t.context_mode,
-                  t.context_window_start,
-                  t.context_window_end,
-                  t.context_text,
-                  t.structured_json,
-                  t.structured_text,
-                  CASE WHEN t.embedding IS NULL THEN NULL ELSE t.embedding::text END AS embedding_text
+                  COALESCE(array_agg(id::text ORDER BY source_id, chunk_index) FILTER (WHERE stage = 'llm'), '{}') AS llm,
+                  COALESCE(array_agg(id::text ORDER BY source_id, chunk_index) FILTER (WHERE stage = 'embed'), '{}') AS embed,
+                  COALESCE(array_agg(id::text ORDER BY source_id, chunk_index) FILTER (WHERE stage = 'upsert'), '{}') AS upsert
+                FROM (
+                  SELECT
+                    id, source_id, chunk_index,
+                    CASE
+                      WHEN llm_status <> 'SUCCEEDED' THEN 'llm'
+                      WHEN embed_status <> 'SUCCEEDED' THEN 'embed'
+                      WHEN upsert_status <> 'SUCCEEDED' THEN 'upsert'
+                    END AS stage,
+                    CASE
+                      WHEN llm_status <> 'SUCCEEDED' THEN llm_status
+                      WHEN embed_status <> 'SUCCEEDED' THEN embed_status
+                      ELSE upsert_status
+                    END AS stage_status
+                  FROM kb_ingest_tasks
+                  WHERE run_id = %(run_id)s AND final_status <> 'COMPLETED'
+                ) pending
+                WHERE stage IS NOT NULL AND (NOT %(failed_only)s OR stage_status = 'FAILED')
+                """,
+                {"run_id": run_id, "failed_only": failed_only},
+            )
+            row = await cur.fetchone()
+        assert row is not None
+        return RunQueueSeed(llm_task_ids=row["llm"], embed_task_ids=row["embed"], upsert_task_ids=row["upsert"])
+
+    async def load_task_payload(self, task_id: str) -> TaskPayload:
+        payloads = await self.load_task_payloads([task_id])
+        if not payloads:
+            raise KeyError(f"Task not found: {task_id}")
+        return payloads[0]
+
+    async def load_task_payloads(self, task_ids: list[str]) -> list[TaskPayload]:
+        # One round-trip for many tasks; unknown ids are skipped and input order is preserved.
+        async with self._apool().connection() as conn:
+            cur = await conn.execute(
+                f"""
+                SELECT {_TASK_PAYLOAD_COLUMNS}
                 FROM kb_ingest_tasks t
                 JOIN kb_sources s ON s.source_id = t.source_id
-                WHERE t.id = %(task_id)s
+                WHERE t.id = ANY(%(task_ids)s::uuid[])
                 """,
-                {"task_id": task_id},
-            ).fetchone()
-        if not row:
-            raise KeyError(f"Task not found: {task_id}")
-        embedding = self._parse_vector_text(row.get("embedding_text")) if row.get("embedding_text") else None
+                {"task_ids": task_ids},
+                prepare=True,
+                binary=True,
+            )
+            rows = await cur.fetchall()
+        by_id = {row["task_id"]: self._row_to_payload(row) for row in rows}
+        return [by_id[task_id] for task_id in task_ids if task_id in by_id]
+
+    async def claim_task_payloads(self, task_ids: list[str], *, stage: str) -> list[TaskPayload]:
+        # Marks the tasks RUNNING for `stage` and returns their payloads in the same round-trip.
+        # Unknown ids are skipped and input order is preserved.
+        async with self._apool().connection() as conn:
+            cur = await conn.execute(_CLAIM_SQL[stage], {"task_ids": task_ids}, prepare=True, binary=True)
+            rows = await cur.fetchall()
+        by_id = {row["task_id"]: self._row_to_payload(row) for row in rows}
+        return [by_id[task_id] for task_id in task_ids if task_id in by_id]
+
+    @staticmethod
+    def _row_to_payload(row: dict[str, Any]) -> TaskPayload:
         structured_json = row.get("structured_json")
         if isinstance(structured_json, str):
-            structured_json = json.loads(structured_json)
+            structured_json = orjson.loads(structured_json)
         return TaskPayload(
             task_id=row["task_id"],
             run_id=row["run_id"],
@@ -221,319 +473,337 @@ class KbRepository:
             context_text=row["context_text"],
             structured_json=structured_json,
             structured_text=row.get("structured_text"),
-            embedding=embedding,
+            # Loaded as array('f') by the vector adapters registered on pooled connections.
+            embedding=row.get("embedding"),
         )
 
-    def mark_llm_running(self, task_id: str) -> None:
-        self._mark_stage_running(task_id, stage="llm")
+    async def mark_llm_running(self, task_id: str) -> None:
+        await self._mark_stage_running(task_id, stage="llm")
 
-    def mark_embed_running(self, task_id: str) -> None:
-        self._mark_stage_running(task_id, stage="embed")
+    async def mark_llm_running_many(self, task_ids: list[str]) -> None:
+        await self._mark_stage_running_many(task_ids, stage="llm")
 
-    def mark_upsert_running(self, task_id: str) -> None:
-        self._mark_stage_running(task_id, stage="upsert")
+    async def mark_embed_running(self, task_id: str) -> None:
+        await self._mark_stage_running(task_id, stage="embed")
 
-    def _mark_stage_running(self, task_id: str, *, stage: str) -> None:
-        with self._conn() as conn:
-            conn.execute(
-                f"""
-                UPDATE kb_ingest_tasks
-                SET {stage}_status = 'RUNNING',
-                    {stage}_started_at = now(),
-                    {stage}_error = NULL,
-                    updated_at = now()
-                WHERE id = %(task_id)s
-                """,
-                {"task_id": task_id},
-            )
-            conn.commit()
+    async def mark_embed_running_many(self, task_ids: list[str]) -> None:
+        await self._mark_stage_running_many(task_ids, stage="embed")
 
-    def save_llm_success(self, task_id: str, *, structured_json: dict[str, Any], structured_text: str, attempts_used: int) -> None:
-        with self._conn() as conn:
-            conn.execute(
-                """
-                UPDATE kb_ingest_tasks
-                SET llm_status = 'SUCCEEDED',
-                    llm_retry_count = %(retry_count)s,
-                    llm_completed_at = now(),
-                    structured_json = %(structured_json)s::jsonb,
-                    structured_text = %(structured_text)s,
-                    embed_status = CASE WHEN embed_status = 'SUCCEEDED' THEN embed_status ELSE 'PENDING' END,
-                    upsert_status = CASE WHEN upsert_status = 'SUCCEEDED' THEN upsert_status ELSE 'PENDING' END,
-                    final_status = CASE WHEN upsert_status = 'SUCCEEDED' THEN 'COMPLETED' ELSE 'PENDING' END,
-                    updated_at = now()
-                WHERE id = %(task_id)s
-                """,
-                {
-                    "task_id": task_id,
-                    "retry_count": max(0, attempts_used - 1),
-                    "structured_json": json.dumps(structured_json, ensure_ascii=False),
-                    "structured_text": structured_text,
-                },
-            )
-            conn.commit()
+    async def mark_upsert_running(self, task_id: str) -> None:
+        await self._mark_stage_running(task_id, stage="upsert")
 
-    def save_llm_failure(self, task_id: str, *, error: str, attempts_used: int) -> None:
-        self._save_stage_failure(task_id, stage="llm", error=error, attempts_used=attempts_used)
+    async def mark_upsert_running_many(self, task_ids: list[str]) -> None:
+        await self._mark_stage_running_many(task_ids, stage="upsert")
 
-    def save_embed_success(self, task_id: str, *, embedding: list[float], attempts_used: int) -> None:
-        with self._conn() as conn:
-            conn.execute(
-                """
-                UPDATE kb_ingest_tasks
-                SET embed_status = 'SUCCEEDED',
-                    embed_retry_count = %(retry_count)s,
-                    embed_completed_at = now(),
-                    embedding_dim = %(embedding_dim)s,
-                    embedding = %(embedding)s::vector,
-                    upsert_status = CASE WHEN upsert_status = 'SUCCEEDED' THEN upsert_status ELSE 'PENDING' END,
-                    final_status = CASE WHEN upsert_status = 'SUCCEEDED' THEN 'COMPLETED' ELSE 'PENDING' END,
-                    updated_at = now()
-                WHERE id = %(task_id)s
-                """,
-                {
-                    "task_id": task_id,
-                    "retry_count": max(0, attempts_used - 1),
-                    "embedding_dim": len(embedding),
-                    "embedding": self._vector_literal(embedding),
-                },
-            )
-            conn.commit()
-
-    def save_embed_failure(self, task_id: str, *, error: str, attempts_used: int) -> None:
-        self._save_stage_failure(task_id, stage="embed", error=error, attempts_used=attempts_used)
-
-    def save_upsert_success(self, task_id: str, *, llm_model: str, embedding_model: str) -> None:
-        task = self.load_task_payload(task_id)
-        if task.structured_json is None or task.embedding is None:
-            raise ValueError("Task missing structured_json or embedding for upsert")
-        combined_text = combined_text_for_embedding(task)
-        with self._conn() as conn:
-            with conn.transaction():
-                conn.execute(
-                    """
-                    INSERT INTO kb_chunks (
-                      source_id, source_title, source_url, chunk_index, chunk_count, chunk_token_count, doc_token_count,
-                      context_mode, context_window_start, context_window_end, raw_text, structured_json, structured_text,
-                      combined_text, raw_text_sha256, llm_model, embedding_model, embedding
-                    ) VALUES (
-                      %(source_id)s, %(source_title)s, %(source_url)s, %(chunk_index)s, %(chunk_count)s, %(chunk_token_count)s, %(doc_token_count)s,
-                      %(context_mode)s, %(context_window_start)s, %(context_window_end)s, %(raw_text)s, %(structured_json)s::jsonb, %(structured_text)s,
-                      %(combined_text)s, %(raw_text_sha256)s, %(llm_model)s, %(embedding_model)s, %(embedding)s::vector
-                    )
-                    ON CONFLICT (source_id, chunk_index) DO UPDATE SET
-                      source_title = EXCLUDED.source_title,
-                      source_url = EXCLUDED.source_url,
-                      chunk_count = EXCLUDED.chunk_count,
-                      chunk_token_count = EXCLUDED.chunk_token_count,
-                      doc_token_count = EXCLUDED.doc_token_count,
-                      context_mode = EXCLUDED.context_mode,
-                      context_window_start = EXCLUDED.context_window_start,
-                      context_window_end = EXCLUDED.context_window_end,
-                      raw_text = EXCLUDED.raw_text,
-                      structured_json = EXCLUDED.structured_json,
-                      structured_text = EXCLUDED.structured_text,
-                      combined_text = EXCLUDED.combined_text,
-                      raw_text_sha256 = EXCLUDED.raw_text_sha256,
-                      llm_model = EXCLUDED.llm_model,
-                      embedding_model = EXCLUDED.embedding_model,
-                      embedding = EXCLUDED.embedding,
-                      updated_at = now()
-                    """,
-                    {
-                        "source_id": task.source_id,
-                        "source_title": task.source_title,
-                        "source_url": task.source_url,
-                        "chunk_index": task.chunk_index,
-                        "chunk_count": task.chunk_count,
-                        "chunk_token_count": task.chunk_token_count,
-                        "doc_token_count": task.doc_token_count,
-                        "context_mode": task.context_mode,
-                        "context_window_start": task.context_window_start,
-                        "context_window_end": task.context_window_end,
-                        "raw_text": task.raw_text,
-                        "structured_json": json.dumps(task.structured_json, ensure_ascii=False),
-                        "structured_text": task.structured_text or json.dumps(task.structured_json, ensure_ascii=False),
-                        "combined_text": combined_text,
-                        "raw_text_sha256": task.raw_text_sha256,
-                        "llm_model": llm_model,
-                        "embedding_model": embedding_model,
-                        "embedding": self._vector_literal(task.embedding),
-                    },
+    async def _mark_stage_running(self, task_id: str, *, stage: str) -> None:
+        await self._mark_stage_running_many([task_id], stage=stage)
+
+    async def _mark_stage_running_many(self, task_ids: list[str], *, stage: str) -> None:
+        # One UPDATE for the whole batch rather than a statement per task.
+        async with self._apool().connection() as conn:
+            await conn.execute(_MARK_RUNNING_SQL[stage], {"task_ids": task_ids}, prepare=True)
+
+    async def save_llm_success(self, task_id: str, *, structured_json: dict[str, Any], structured_text: str, attempts_used: int) -> None:
+        await self.save_llm_success_many(
+            [
+                LlmStageResult(
+                    task_id=task_id,
+                    structured_json=structured_json,
+                    structured_text=structured_text,
+                    attempts_used=attempts_used,
+                )
+            ]
+        )
+
+    async def save_llm_success_many(self, results: list[LlmStageResult]) -> None:
+        await self._save_llm_success_many(results, start_embed=False)
+
+    async def save_llm_success_start_embed_many(self, results: list[LlmStageResult]) -> None:
+        # Stores the extraction and marks the embed stage RUNNING in the same UPDATE, so a hand-off is one
+        # coalescable write per task instead of two alternating ones.
+        await self._save_llm_success_many(results, start_embed=True)
+
+    async def _save_llm_success_many(self, results: list[LlmStageResult], *, start_embed: bool) -> None:
+        async with self._apool().connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.executemany(
+                    _LLM_SUCCESS_SQL[start_embed],
+                    [
+                        {
+                            "task_id": result.task_id,
+                            "retry_count": max(0, result.attempts_used - 1),
+                            "structured_json": Jsonb(result.structured_json),
+                            "structured_text": result.structured_text,
+                        }
+                        for result in results
+                    ],
+                )
+
+    async def save_llm_failure(self, task_id: str, *, error: str, attempts_used: int) -> None:
+        await self._save_stage_failure(task_id, stage="llm", error=error, attempts_used=attempts_used)
+
+    async def save_llm_failure_many(self, failures: list[StageFailure]) -> None:
+        await self._save_stage_failure_many(failures, stage="llm")
+
+    async def save_embed_success(
+        self, task_id: str, *, embedding: Sequence[float], combined_text: str, attempts_used: int
+    ) -> None:
+        await self.save_embed_success_many(
+            [
+                EmbedStageResult(
+                    task_id=task_id,
+                    embedding=array("f", embedding),
+                    embedding_dim=len(embedding),
+                    attempts_used=attempts_used,
+                    combined_text=combined_text,
+                )
+            ]
+        )
+
+    async def save_embed_success_many(self, results: list[EmbedStageResult]) -> None:
+        await self._save_embed_success_many(results, start_upsert=False)
+
+    async def save_embed_success_start_upsert_many(self, results: list[EmbedStageResult]) -> None:
+        await self._save_embed_success_many(results, start_upsert=True)
+
+    async def _save_embed_success_many(self, results: list[EmbedStageResult], *, start_upsert: bool) -> None:
+        async with self._apool().connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.executemany(
+                    _EMBED_SUCCESS_SQL[start_upsert],
+                    [
+                        {
+                            "task_id": result.task_id,
+                            "retry_count": max(0, result.attempts_used - 1),
+                            "embedding_dim": len(result.embedding),
+                            "embedding": result.embedding,
+                            "combined_text": result.combined_text,
+                        }
+                        for result in results
+                    ],
                 )
-                conn.execute(
+
+    async def save_embed_failure(self, task_id: str, *, error: str, attempts_used: int) -> None:
+        await self._save_stage_failure(task_id, stage="embed", error=error, attempts_used=attempts_used)
+
+    async def save_embed_failure_many(self, failures: list[StageFailure]) -> None:
+        await self._save_stage_failure_many(failures, stage="embed")
+
+    async def save_upsert_success(self, task_id: str, *, llm_model: str, embedding_model: str) -> None:
+        if await self.save_upsert_success_many([task_id], llm_model=llm_model, embedding_model=embedding_model):
+            raise ValueError(f"Task {task_id} is missing or lacks structured_json/embedding/combined_text")
+
+    async def save_upsert_success_many(self, task_ids: list[str], *, llm_model: str, embedding_model: str) -> list[str]:
+        # kb_chunks rows are copied server-side from kb_ingest_tasks (the combined text was stored with the
+        # embedding), so only ids cross the wire. Rows are inserted in (source_id, chunk_index) order so
+        # concurrent batches take kb_chunks key locks in the same order and cannot deadlock. Only tasks that
+        # produced a chunk row are marked upserted; the ids of the rest are returned for the caller to fail.
+        task_ids = list(dict.fromkeys(task_ids))
+        async with self._apool().connection() as conn:
+            async with conn.transaction():
+                cur = await conn.execute(
                     """
-                    UPDATE kb_ingest_tasks
+                    WITH upserted AS (
+                      INSERT INTO kb_chunks (
+                        source_id, source_title, source_url, chunk_index, chunk_count, chunk_token_count, doc_token_count,
+                        context_mode, context_window_start, context_window_end, raw_text, structured_json, structured_text,
+                        combined_text, raw_text_sha256, llm_model, embedding_model, embedding
+                      )
+                      SELECT
+                        t.source_id, s.title, s.source_url, t.chunk_index, t.chunk_count, t.chunk_token_count, t.doc_token_count,
+                        t.context_mode, t.context_window_start, t.context_window_end, t.raw_text, t.structured_json,
+                        COALESCE(NULLIF(t.structured_text, ''), t.structured_json::text),
+                        t.combined_text, t.raw_text_sha256, %(llm_model)s, %(embedding_model)s, t.embedding
+                      FROM kb_ingest_tasks t
+                      JOIN kb_sources s ON s.source_id = t.source_id
+                      WHERE t.id = ANY(%(task_ids)s::uuid[])
+                        AND t.structured_json IS NOT NULL
+                        AND t.embedding IS NOT NULL
+                        AND t.combined_text IS NOT NULL
+                      ORDER BY t.source_id, t.chunk_index
+                      ON CONFLICT (source_id, chunk_index) DO UPDATE SET
+                        source_title = EXCLUDED.source_title,
+                        source_url = EXCLUDED.source_url,
+                        chunk_count = EXCLUDED.chunk_count,
+                        chunk_token_count = EXCLUDED.chunk_token_count,
+                        doc_token_count = EXCLUDED.doc_token_count,
+                        context_mode = EXCLUDED.context_mode,
+                        context_window_start = EXCLUDED.context_window_start,
+                        context_window_end = EXCLUDED.context_window_end,
+                        raw_text = EXCLUDED.raw_text,
+                        structured_json = EXCLUDED.structured_json,
+                        structured_text = EXCLUDED.structured_text,
+                        combined_text = EXCLUDED.combined_text,
+                        raw_text_sha256 = EXCLUDED.raw_text_sha256,
+                        llm_model = EXCLUDED.llm_model,
+                        embedding_model = EXCLUDED.embedding_model,
+                        embedding = EXCLUDED.embedding,
+                        updated_at = now()
+                      RETURNING source_id, chunk_index
+                    )
+                    UPDATE kb_ingest_tasks t
                     SET upsert_status = 'SUCCEEDED',
                         upsert_completed_at = now(),
                         final_status = 'COMPLETED',
                         updated_at = now()
-                    WHERE id = %(task_id)s
+                    FROM upserted u
+                    WHERE t.id = ANY(%(task_ids)s::uuid[])
+                      AND t.source_id = u.source_id
+                      AND t.chunk_index = u.chunk_index
+                    RETURNING t.id::text
                     """,
-                    {"task_id": task_id},
+                    {
+                        "task_ids": task_ids,
+                        "llm_model": llm_model,
+                        "embedding_model": embedding_model,
+                    },
+                    prepare=True,
                 )
-            conn.commit()
-
-    def save_upsert_failure(self, task_id: str, *, error: str) -> None:
-        self._save_stage_failure(task_id, stage="upsert", error=error, attempts_used=1)
-
-    def _save_stage_failure(self, task_id: str, *, stage: str, error: str, attempts_used: int) -> None:
-        retry_col = f"{stage}_retry_count"
-        status_col = f"{stage}_status"
-        error_col = f"{stage}_error"
-        completed_col = f"{stage}_completed_at"
-        with self._conn() as conn:
-            conn.execute(
-                f"""
-                UPDATE kb_ingest_tasks
-                SET {status_col} = 'FAILED',
-                    {retry_col} = %(retry_count)s,
-                    {error_col} = %(error)s,
-                    {completed_col} = now(),
-                    final_status = CASE WHEN %(stage)s = 'upsert' OR %(stage)s = 'embed' OR %(stage)s = 'llm' THEN 'FAILED' ELSE final_status END,
-                    updated_at = now()
-                WHERE id = %(task_id)s
-                """,
+                upserted = {row["id"] for row in await cur.fetchall()}
+        return [task_id for task_id in task_ids if task_id not in upserted]
+
+    async def save_upsert_failure(self, task_id: str, *, error: str) -> None:
+        await self._save_stage_failure(task_id, stage="upsert", error=error, attempts_used=1)
+
+    async def save_upsert_failure_many(self, failures: list[StageFailure]) -> None:
+        await self._save_stage_failure_many(failures, stage="upsert")
+
+    async def _save_stage_failure(self, task_id: str, *, stage: str, error: str, attempts_used: int) -> None:
+        await self._save_stage_failure_many([StageFailure(task_id=task_id, error=error, attempts_used=attempts_used)], stage=stage)
+
+    async def _save_stage_failure_many(self, failures: list[StageFailure], *, stage: str) -> None:
+        # One UPDATE joined against the unnested failure arrays rather than a statement per task.
+        async with self._apool().connection() as conn:
+            await conn.execute(
+                _STAGE_FAILURE_SQL[stage],
                 {
-                    "task_id": task_id,
-                    "retry_count": max(0, attempts_used - 1),
-                    "error": error[:2000],
-                    "stage": stage,
+                    "task_ids": [failure.task_id for failure in failures],
+                    "retry_counts": [max(0, failure.attempts_used - 1) for failure in failures],
+                    "errors": [failure.error[:2000] for failure in failures],
                 },
+                prepare=True,
             )
-            conn.commit()
 
-    def finalize_run(self, run_id: str) -> dict[str, Any]:
-        with self._conn() as conn:
-            counts = conn.execute(
-                """
-                SELECT
-                  COUNT(*) AS total,
-                  COUNT(*) FILTER (WHERE final_status = 'COMPLETED') AS completed,
-                  COUNT(*) FILTER (WHERE final_status = 'FAILED') AS failed,
-                  COUNT(*) FILTER (WHERE final_status = 'PENDING') AS pending,
-                  COUNT(*) FILTER (WHERE llm_status = 'FAILED') AS llm_failed,
-                  COUNT(*) FILTER (WHERE embed_status = 'FAILED') AS embed_failed,
-                  COUNT(*) FILTER (WHERE upsert_status = 'FAILED') AS upsert_failed
-                FROM kb_ingest_tasks
-                WHERE run_id = %(run_id)s
-                """,
-                {"run_id": run_id},
-            ).fetchone()
-            if not counts:
-                raise KeyError(f"Run not found: {run_id}")
-            total = counts["total"]
-            completed = counts["completed"]
-            failed = counts["failed"]
-            if completed == total and total > 0:
-                status = "COMPLETED"
-            elif completed > 0 and failed > 0:
-                status = "PARTIAL_FAILURE"
-            elif failed == total and total > 0:
-                status = "FAILED"
-            elif completed > 0 and counts["pending"] > 0:
-                status = "PARTIAL_FAILURE"
-            else:
-                status = "FAILED" if failed > 0 else "RUNNING"
-            error_summary = {
-                "llm_failed": counts["llm_failed"],
-                "embed_failed": counts["embed_failed"],
-                "upsert_failed": counts["upsert_failed"],
-            }
-            conn.execute(
-                """
+    async def finalize_run(self, run_id: str) -> dict[str, Any]:
+        # Counts are aggregated from the run's tasks in the same statement that sets the final status, and
+        # RETURNING hands back the status payload, so finalizing is a single round-trip.
+        async with self._apool().connection() as conn:
+            cur = await conn.execute(
+                f"""
+                WITH c AS (
+                  SELECT
+                  {_task_counts_select(_STATUS_TASK_COUNTS | _FINALIZE_TASK_COUNTS)}
+                  FROM kb_ingest_tasks
+                  WHERE run_id = %(run_id)s
+                )
                 UPDATE kb_ingest_runs
-                SET status = %(status)s,
-                    completed_chunks = %(completed)s,
-                    failed_chunks = %(failed)s,
+                SET status = CASE
+                      WHEN c.completed = c.total AND c.total > 0 THEN 'COMPLETED'
+                      WHEN c.completed > 0 AND c.failed > 0 THEN 'PARTIAL_FAILURE'
+                      WHEN c.failed = c.total AND c.total > 0 THEN 'FAILED'
+                      WHEN c.completed > 0 AND c.pending > 0 THEN 'PARTIAL_FAILURE'
+                      WHEN c.failed > 0 THEN 'FAILED'
+                      ELSE 'RUNNING'
+                    END,
+                    completed_chunks = c.completed,
+                    failed_chunks = c.failed,
                     completed_at = now(),
-                    error_summary = %(error_summary)s::jsonb
-                WHERE id = %(run_id)s
+                    error_summary = jsonb_build_object(
+                      'llm_failed', c.llm_failed,
+                      'embed_failed', c.embed_failed,
+                      'upsert_failed', c.upsert_failed
+                    )
+                FROM c
+                WHERE kb_ingest_runs.id = %(run_id)s
+                RETURNING kb_ingest_runs.*, {_TASK_COUNTS_JSON}, {_SAMPLE_FAILURES}
                 """,
-                {
-                    "run_id": run_id,
-                    "status": status,
-                    "completed": completed,
-                    "failed": failed,
-                    "error_summary": json.dumps(error_summary),
-                },
+                {"run_id": run_id},
             )
-            conn.commit()
-        return self.status(run_id)
+            row = await cur.fetchone()
+        if not row:
+            raise KeyError(f"Run not found: {run_id}")
+        return self._status_payload(row)
 
-    def status(self, run_id: str) -> dict[str, Any]:
-        with self._conn() as conn:
-            run_row = conn.execute(
-                "SELECT * FROM kb_ingest_runs WHERE id = %(run_id)s",
-                {"run_id": run_id},
-            ).fetchone()
-            if not run_row:
-                raise KeyError(f"Run not found: {run_id}")
-            task_counts = conn.execute(
-                """
-                SELECT
-                  COUNT(*) AS total,
-                  COUNT(*) FILTER (WHERE final_status = 'COMPLETED') AS completed,
-                  COUNT(*) FILTER (WHERE final_status = 'FAILED') AS failed,
-                  COUNT(*) FILTER (WHERE llm_status = 'RUNNING') AS llm_running,
-                  COUNT(*) FILTER (WHERE llm_status = 'PENDING') AS llm_pending,
-                  COUNT(*) FILTER (WHERE embed_status = 'RUNNING') AS embed_running,
-                  COUNT(*) FILTER (WHERE embed_status = 'PENDING' AND llm_status = 'SUCCEEDED') AS embed_pending_ready,
-                  COUNT(*) FILTER (WHERE upsert_status = 'RUNNING') AS upsert_running,
-                  COUNT(*) FILTER (WHERE upsert_status = 'PENDING' AND embed_status = 'SUCCEEDED') AS upsert_pending_ready
-                FROM kb_ingest_tasks
-                WHERE run_id = %(run_id)s
-                """,
-                {"run_id": run_id},
-            ).fetchone()
-            failures = conn.execute(
-                """
-                SELECT source_id, chunk_index, llm_error, embed_error, upsert_error
-                FROM kb_ingest_tasks
-                WHERE run_id = %(run_id)s
-                  AND final_status = 'FAILED'
-                ORDER BY source_id, chunk_index
-                LIMIT 20
+    async def status(self, run_id: str) -> dict[str, Any]:
+        async with self._apool().connection() as conn:
+            cur = await conn.execute(
+                f"""
+                SELECT kb_ingest_runs.*, {_TASK_COUNTS_JSON}, {_SAMPLE_FAILURES}
+                FROM kb_ingest_runs
+                CROSS JOIN LATERAL (
+                  SELECT
+                  {_task_counts_select(_STATUS_TASK_COUNTS)}
+                  FROM kb_ingest_tasks
+                  WHERE run_id = kb_ingest_runs.id
+                ) c
+                WHERE kb_ingest_runs.id = %(run_id)s
                 """,
                 {"run_id": run_id},
-            ).fetchall()
+            )
+            row = await cur.fetchone()
+        if not row:
+            raise KeyError(f"Run not found: {run_id}")
+        return self._status_payload(row)
+
+    @staticmethod
+    def _status_payload(row: dict[str, Any]) -> dict[str, Any]:
+        # `row` is a kb_ingest_runs row plus the task_counts and sample_failures columns appended by
+        # _TASK_COUNTS_JSON and _SAMPLE_FAILURES.
         return {
-            "run": {k: (str(v) if k == "id" else v) for k, v in dict(run_row).items()},
-            "task_counts": dict(task_counts) if task_counts else {},
-            "sample_failures": [dict(row) for row in failures],
+            "run": {k: (str(v) if k == "id" else v) for k, v in row.items() if k not in ("task_counts", "sample_failures")},
+            "task_counts": row["task_counts"],
+            "sample_failures": row["sample_failures"],
         }
 
-    def progress_counts_by_source(self, run_id: str) -> dict[str, dict[str, int]]:
-        with self._conn() as conn:
-            rows = conn.execute(
-                """
-                SELECT
-                  source_id,
-                  COUNT(*) AS total_chunks,
-                  COUNT(*) FILTER (WHERE llm_status = 'RUNNING') AS llm_running,
-                  COUNT(*) FILTER (WHERE llm_status = 'SUCCEEDED') AS llm_succeeded,
-                  COUNT(*) FILTER (WHERE llm_status = 'FAILED') AS llm_failed,
-                  COUNT(*) FILTER (WHERE embed_status = 'RUNNING') AS embed_running,
-                  COUNT(*) FILTER (WHERE embed_status = 'SUCCEEDED') AS embed_succeeded,
-                  COUNT(*) FILTER (WHERE embed_status = 'FAILED') AS embed_failed,
-                  COUNT(*) FILTER (WHERE upsert_status = 'RUNNING') AS upsert_running,
-                  COUNT(*) FILTER (WHERE upsert_status = 'SUCCEEDED') AS upsert_succeeded,
-                  COUNT(*) FILTER (WHERE upsert_status = 'FAILED') AS upsert_failed
-                FROM kb_ingest_tasks
-                WHERE run_id = %(run_id)s
-                GROUP BY source_id
-                ORDER BY source_id
-                """,
-                {"run_id": run_id},
-            ).fetchall()
-        return {str(row["source_id"]): {k: int(v) for k, v in dict(row).items() if k != "source_id"} for row in rows}
+    async def progress_counts_by_source(self, run_id: str) -> dict[str, dict[str, int]]:
+        # Plain tuples plus the column names read once from the cursor description; COUNT(*) already
+        # arrives as int, so rows are zipped straight into the per-source dicts.
+        async with self._apool().connection() as conn:
+            async with conn.cursor(row_factory=tuple_row) as cur:
+                await cur.execute(
+                    """
+                    SELECT
+                      source_id,
+                      COUNT(*) AS total_chunks,
+                      COUNT(*) FILTER (WHERE llm_status = 'RUNNING') AS llm_running,
+                      COUNT(*) FILTER (WHERE llm_status = 'SUCCEEDED') AS llm_succeeded,
+                      COUNT(*) FILTER (WHERE llm_status = 'FAILED') AS llm_failed,
+                      COUNT(*) FILTER (WHERE embed_status = 'RUNNING') AS embed_running,
+                      COUNT(*) FILTER (WHERE embed_status = 'SUCCEEDED') AS embed_succeeded,
+                      COUNT(*) FILTER (WHERE embed_status = 'FAILED') AS embed_failed,
+                      COUNT(*) FILTER (WHERE upsert_status = 'RUNNING') AS upsert_running,
+                      COUNT(*) FILTER (WHERE upsert_status = 'SUCCEEDED') AS upsert_succeeded,
+                      COUNT(*) FILTER (WHERE upsert_status = 'FAILED') AS upsert_failed
+                    FROM kb_ingest_tasks
+                    WHERE run_id = %(run_id)s
+                    GROUP BY source_id
+                    ORDER BY source_id
+                    """,
+                    {"run_id": run_id},
+                )
+                rows = await cur.fetchall()
+                names = [column.name for column in (cur.description or [])[1:]]
+        return {source_id: dict(zip(names, counts)) for source_id, *counts in rows}
+
+    @staticmethod
+    def _vector_binary(vec: Sequence[float]) -> bytes:
+        # pgvector binary layout: uint16 dim, uint16 unused, then big-endian float4 values.
+        values = array("f", vec)
+        if sys.byteorder == "little":
+            values.byteswap()
+        return struct.pack(">HH", len(values), 0) + values.tobytes()
 
     @staticmethod
-    def _vector_literal(vec: list[float]) -> str:
-        return "[" + ",".join(f"{float(v):.10f}" for v in vec) + "]"
+    def _parse_vector_binary(data: Any) -> array[float]:
+        dim, _ = struct.unpack_from(">HH", data)
+        values = array("f")
+        values.frombytes(bytes(data[4 : 4 + 4 * dim]))
+        if sys.byteorder == "little":
+            values.byteswap()
+        return values
 
     @staticmethod
-    def _parse_vector_text(value: str | None) -> list[float] | None:
+    def _parse_vector_text(value: str | None) -> array[float] | None:
         if value is None:
             return None
         stripped = value.strip()
@@ -542,5 +812,5 @@ class KbRepository:
         if stripped[0] == "[" and stripped[-1] == "]":
             stripped = stripped[1:-1]
         if not stripped:
-            return []
-        return [float(part) for part in stripped.split(",")]
+            return array("f")
+        return array("f", map(float, stripped.split(",")))
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from itertools import groupby
+from typing import Any
+
+import orjson
+
+from kb_pipeline.repository import KbRepository
+
+
+class StatusWriter:
+    # Coalesces per-task status writes into executemany flushes. Writes are applied strictly in enqueue
+    # order (consecutive writes for the same repository method share one call), so per-task transitions
+    # never reorder. `barrier()` returns once everything enqueued before it has reached the database, and
+    # raises instead if any write since the last barrier failed: those tasks were never persisted, so later
+    # stages must not build on them. After a failure every later write of the run is dropped as well: it could
+    # advance a task past a stage whose output never landed, and dropping it leaves every task resumable from
+    # its last persisted state.
+    def __init__(
+        self, repo: KbRepository, *, batch_size: int, interval_seconds: float, log: Callable[[str], None]
+    ) -> None:
+        self._repo = repo
+        self._log = log
+        self._error: Exception | None = None
+        self._error_raised = False
+        self._batch_size = max(1, batch_size)
+        self._interval_seconds = max(0.0, interval_seconds)
+        self._queue: asyncio.Queue[tuple[str, Any] | asyncio.Future[None]] = asyncio.Queue()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self._error, self._error_raised = None, False
+        self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, method: str, row: Any) -> None:
+        self._queue.put_nowait((method, row))
+
+    async def barrier(self) -> None:
+        done: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(done)
+        await done
+        self._raise_if_failed()
+
+    async def aclose(self) -> None:
+        if self._task is None:
+            return
+        try:
+            await self.barrier()
+        finally:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _raise_if_failed(self) -> None:
+        # The failure is raised once; the caller aborts the run, which leaves the affected tasks resumable.
+        if self._error is not None and not self._error_raised:
+            self._error_raised = True
+            raise RuntimeError(f"kb status write failed: {self._error}") from self._error
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + self._interval_seconds
+            while len(items) < self._batch_size and not isinstance(items[-1], asyncio.Future):
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(items)
+
+    async def _flush(self, items: list[tuple[str, Any] | asyncio.Future[None]]) -> None:
+        pending: list[tuple[str, Any]] = []
+        for item in items:
+            if isinstance(item, asyncio.Future):
+                await self._write(pending)
+                pending = []
+                if not item.done():
+                    item.set_result(None)
+            else:
+                pending.append(item)
+        await self._write(pending)
+
+    async def _write(self, writes: list[tuple[str, Any]]) -> None:
+        for method, group in groupby(writes, key=lambda write: write[0]):
+            rows = [row for _, row in group]
+            if self._error is not None:
+                self._log_write(event="kb_pipeline.status_write_dropped", method=method, rows=len(rows))
+                continue
+            try:
+                await getattr(self._repo, method)(rows)
+            except Exception as exc:
+                self._error = exc
+                self._log_write(event="kb_pipeline.status_write_failed", method=method, rows=len(rows), error=str(exc)[:500])
+
+    def _log_write(self, **event: Any) -> None:
+        self._log(orjson.dumps(event).decode("utf-8"))
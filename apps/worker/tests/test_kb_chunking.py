@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
-from kb_pipeline.chunking import chunk_tokens, plan_from_kb, tokenizer
+from kb_pipeline.chunking import chunk_tokens, plan_from_kb, token_windows, tokenizer
 
 
 def test_chunk_tokens_overlap_behavior() -> None:
@@ -17,6 +17,14 @@ def test_chunk_tokens_overlap_behavior() -> None:
     assert len(second_tokens) <= 100
 
 
+def test_token_windows_overlap_and_tail() -> None:
+    windows = token_windows(list(range(250)), chunk_size=100, overlap=20)
+    assert [len(window) for window in windows] == [100, 100, 90]
+    assert windows[1][:20] == windows[0][-20:]
+    assert windows[-1][-1] == 249
+    assert token_windows([], chunk_size=100, overlap=20) == []
+
+
 def test_plan_from_kb_uses_surrounding_context_above_threshold(tmp_path: Path) -> None:
     kb_dir = tmp_path / "kb"
     kb_dir.mkdir()
@@ -49,6 +57,9 @@ def test_plan_from_kb_uses_surrounding_context_above_threshold(tmp_path: Path) -
     )
     assert plan.tasks
     assert all(task.context_mode == "SURROUNDING_CHUNKS" for task in plan.tasks)
+    second = plan.tasks[1]
+    assert second.context_chunk_indices == [0, 2, 3, 4]
+    assert plan.context_text(second).startswith(f"[Chunk 1/{second.chunk_count}]\n")
 
 
 def test_plan_from_kb_uses_full_doc_below_threshold(tmp_path: Path) -> None:
@@ -77,3 +88,81 @@ def test_plan_from_kb_uses_full_doc_below_threshold(tmp_path: Path) -> None:
     plan = plan_from_kb(kb_dir, source_filter=None, chunk_size=80, overlap=20, full_doc_threshold_tokens=50000)
     assert plan.tasks
     assert all(task.context_mode == "FULL_DOC" for task in plan.tasks)
+    assert plan.context_text(plan.tasks[0]) == text
+
+
+def test_plan_from_kb_merges_sources_in_manifest_order(tmp_path: Path) -> None:
+    kb_dir = tmp_path / "kb"
+    kb_dir.mkdir()
+    sources = []
+    for source_id in ("doc_b", "doc_a", "doc_c"):
+        src_dir = kb_dir / source_id
+        src_dir.mkdir()
+        (src_dir / "content.txt").write_text(f"{source_id} processor obligations. " * 40, encoding="utf-8")
+        (src_dir / "content.md").write_text(f"# {source_id}", encoding="utf-8")
+        sources.append(
+            {
+                "source_id": source_id,
+                "title": source_id,
+                "authority": "Test",
+                "kind": "html",
+                "url": f"https://example.com/{source_id}",
+                "txt_path": str((src_dir / "content.txt").relative_to(tmp_path)),
+                "md_path": str((src_dir / "content.md").relative_to(tmp_path)),
+            }
+        )
+    (kb_dir / "manifest.json").write_text(json.dumps({"sources": sources}), encoding="utf-8")
+
+    plan = plan_from_kb(kb_dir, source_filter=None, chunk_size=80, overlap=20, full_doc_threshold_tokens=50000)
+    assert [src.source_id for src in plan.sources] == ["doc_b", "doc_a", "doc_c"]
+    assert [task.source_id for task in plan.tasks] == sorted(
+        (task.source_id for task in plan.tasks), key=["doc_b", "doc_a", "doc_c"].index
+    )
+
+    per_source = plan.summary["by_source"]["doc_b"]["chunks"]
+    # Sources past max_chunks are never planned, so a missing file there cannot fail the plan.
+    (kb_dir / "doc_c" / "content.txt").unlink()
+    limited = plan_from_kb(
+        kb_dir,
+        source_filter=None,
+        chunk_size=80,
+        overlap=20,
+        full_doc_threshold_tokens=50000,
+        max_chunks=per_source + 1,
+    )
+    assert len(limited.tasks) == per_source + 1
+    assert [src.source_id for src in limited.sources] == ["doc_b", "doc_a"]
+    assert limited.summary["by_source"]["doc_a"]["context_mode_counts"]["FULL_DOC"] == 1
+
+
+
+def test_plan_from_kb_normalizes_crlf_like_read_text(tmp_path: Path) -> None:
+    text = "Article 28\nProcessor obligations.\n" * 40
+    plans = []
+    for name, newline in (("lf", "\n"), ("crlf", "\r\n")):
+        kb_dir = tmp_path / name / "kb"
+        src_dir = kb_dir / "doc1"
+        src_dir.mkdir(parents=True)
+        (src_dir / "content.txt").write_bytes(text.replace("\n", newline).encode("utf-8"))
+        (src_dir / "content.md").write_text("# doc1", encoding="utf-8")
+        manifest = {
+            "sources": [
+                {
+                    "source_id": "doc1",
+                    "title": "Doc1",
+                    "authority": "Test",
+                    "kind": "html",
+                    "url": "https://example.com/doc1",
+                    "txt_path": str((src_dir / "content.txt").relative_to(tmp_path / name)),
+                    "md_path": str((src_dir / "content.md").relative_to(tmp_path / name)),
+                }
+            ]
+        }
+        (kb_dir / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+        plans.append(plan_from_kb(kb_dir, source_filter=None, chunk_size=40, overlap=10, full_doc_threshold_tokens=50000))
+
+    lf, crlf = plans
+    assert crlf.source_texts["doc1"] == text
+    assert [(task.raw_text_sha256, task.chunk_token_count) for task in crlf.tasks] == [
+        (task.raw_text_sha256, task.chunk_token_count) for task in lf.tasks
+    ]
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import json
+from array import array
+
+import httpx
+
+from kb_pipeline.config import PipelineConfig
+from kb_pipeline.llm_client import OpenRouterClient
+from kb_pipeline.models import EmbedStageResult, LlmStageResult, StageFailure, TaskPayload
+from kb_pipeline.orchestrator import KbPipelineOrchestrator
+from kb_pipeline.status_writer import StatusWriter
+
+
+def test_drain_batch_caps_size_without_waiting_for_more() -> None:
+    async def scenario() -> list[list[str]]:
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        for item in ("a", "b", "c"):
+            queue.put_nowait(item)
+        first = await KbPipelineOrchestrator._drain_batch(queue, 2)  # type: ignore[arg-type]
+        second = await KbPipelineOrchestrator._drain_batch(queue, 2)  # type: ignore[arg-type]
+        return [first, second]
+
+    assert asyncio.run(scenario()) == [["a", "b"], ["c"]]
+
+
+def _task(task_id: str, chunk_token_count: int) -> TaskPayload:
+    return TaskPayload(
+        task_id=task_id,
+        run_id="r1",
+        source_id="doc1",
+        source_title="Doc1",
+        source_url="https://example.com/doc1",
+        chunk_index=0,
+        chunk_count=1,
+        raw_text="text",
+        raw_text_sha256="a" * 64,
+        chunk_token_count=chunk_token_count,
+        doc_token_count=chunk_token_count,
+        context_mode="FULL_DOC",
+        context_window_start=0,
+        context_window_end=0,
+        context_text="text",
+        structured_text="x" * 40,
+    )
+
+
+def test_token_budget_groups_split_on_estimated_tokens() -> None:
+    tasks = [_task("a", 40), _task("b", 40), _task("c", 90), _task("d", 500)]
+    groups = KbPipelineOrchestrator._token_budget_groups(tasks, max_tokens=100)
+    assert [[task.task_id for task in group] for group in groups] == [["a", "b"], ["c"], ["d"]]
+
+
+def test_log_drainer_writes_queued_lines_until_end_marker(capsys) -> None:  # type: ignore[no-untyped-def]
+    async def scenario() -> None:
+        queue: asyncio.Queue[str | None] = asyncio.Queue()
+        for line in ("one", "two", None, "after-stop"):
+            queue.put_nowait(line)
+        await KbPipelineOrchestrator._log_drainer(queue)
+
+    asyncio.run(scenario())
+    assert capsys.readouterr().out == "one\ntwo\n"
+
+
+def test_progress_counters_track_stage_transitions(capsys) -> None:  # type: ignore[no-untyped-def]
+    orchestrator = object.__new__(KbPipelineOrchestrator)
+    orchestrator._log_queue = None
+    orchestrator._progress_version = 0
+    progress = KbPipelineOrchestrator._progress_arrays({"doc1": {"total_chunks": 3, "llm_succeeded": 1}})
+    task = _task("a", 10)
+    orchestrator._log_progress_stage_start(progress, task, stage="llm")
+    orchestrator._log_progress_update(progress, task, stage="llm", status="SUCCEEDED")
+    orchestrator._log_progress_stage_start(progress, dataclasses.replace(task, source_id="doc2"), stage="embed")
+    assert list(progress["doc1"]) == [3, 0, 2, 0, 0, 0, 0, 0, 0, 0]
+    assert list(progress["doc2"]) == [1, 0, 0, 0, 1, 0, 0, 0, 0, 0]
+    assert "llm=2/3 (ok=2, fail=0, running=0)" in capsys.readouterr().out
+    assert orchestrator._progress_version == 3
+
+
+def test_stage_event_template_matches_full_event_json(capsys) -> None:  # type: ignore[no-untyped-def]
+    orchestrator = object.__new__(KbPipelineOrchestrator)
+    orchestrator._log_queue = None
+    task = dataclasses.replace(_task("a", 10), source_id='doc "1"')
+    orchestrator._log_event("r1", task, stage="llm", status="SUCCEEDED", latency_ms=12, retry_count=1, worker_idx=3)
+    orchestrator._log_event("r1", task, stage="llm", status="FAILED", latency_ms=12, retry_count=1, worker_idx=3, error="x")
+    succeeded, failed = (json.loads(line) for line in capsys.readouterr().out.splitlines())
+    assert succeeded == {key: value for key, value in failed.items() if key != "error"} | {"status": "SUCCEEDED"}
+    assert list(succeeded) == [key for key in failed if key != "error"]
+
+
+def test_extract_once_shares_result_between_identical_chunks() -> None:
+    class _Client:
+        rebind = staticmethod(OpenRouterClient.rebind)
+
+        def __init__(self) -> None:
+            self.calls: list[str] = []
+
+        async def extract(self, task: TaskPayload) -> LlmStageResult:
+            self.calls.append(task.task_id)
+            await asyncio.sleep(0)
+            return LlmStageResult(task.task_id, {"article_no": "Art. 28"}, "{}", 2)
+
+    orchestrator = object.__new__(KbPipelineOrchestrator)
+    orchestrator.config = PipelineConfig(database_url="", openrouter_api_key="", openai_api_key="", llm_dedup=True)
+    orchestrator.llm_client = _Client()  # type: ignore[assignment]
+    orchestrator._llm_by_text = {}
+    first = _task("a", 10)
+    copy = dataclasses.replace(first, task_id="b", source_id="doc2", source_title="Doc2")
+
+    async def scenario() -> list[LlmStageResult]:
+        return list(await asyncio.gather(orchestrator._extract_once(first), orchestrator._extract_once(copy)))
+
+    _, reused = asyncio.run(scenario())
+    assert orchestrator.llm_client.calls == ["a"]  # type: ignore[attr-defined]
+    assert reused.task_id == "b" and reused.attempts_used == 1
+    assert reused.structured_json == {"article_no": "Art. 28", "source_title": "Doc2", "source_url": copy.source_url}
+
+
+def test_llm_batch_hand_offs_coalesce_into_one_status_write(capsys) -> None:  # type: ignore[no-untyped-def]
+    class _Client:
+        async def extract_batch(self, tasks: list[TaskPayload]) -> dict[str, LlmStageResult]:
+            return {task.task_id: LlmStageResult(task.task_id, {}, "{}", 1) for task in tasks}
+
+    class _Repo:
+        def __init__(self) -> None:
+            self.calls: list[tuple[str, int]] = []
+
+        def __getattr__(self, method: str):  # type: ignore[no-untyped-def]
+            async def write(rows: list[LlmStageResult]) -> None:
+                self.calls.append((method, len(rows)))
+
+            return write
+
+    repo = _Repo()
+    orchestrator = object.__new__(KbPipelineOrchestrator)
+    orchestrator.llm_client = _Client()  # type: ignore[assignment]
+    orchestrator._log_queue = None
+    orchestrator._progress_version = 0
+    tasks = [dataclasses.replace(_task(f"t{idx}", 10), chunk_index=idx, chunk_count=16) for idx in range(16)]
+    progress = KbPipelineOrchestrator._progress_arrays({})
+
+    async def scenario() -> int:
+        orchestrator._status = StatusWriter(repo, batch_size=64, interval_seconds=60, log=print)  # type: ignore[arg-type]
+        orchestrator._status.start()
+        embed_queue: asyncio.Queue[TaskPayload] = asyncio.Queue()
+        await orchestrator._llm_batch("r1", tasks, embed_queue, worker_idx=0, progress=progress)
+        await orchestrator._status.aclose()
+        return embed_queue.qsize()
+
+    assert asyncio.run(scenario()) == 16
+    assert repo.calls == [("save_llm_success_start_embed_many", 16)]
+
+
+def test_upsert_batch_fails_only_tasks_missing_stage_output(capsys) -> None:  # type: ignore[no-untyped-def]
+    class _Repo:
+        def __init__(self) -> None:
+            self.failures: list[StageFailure] = []
+
+        async def save_upsert_success_many(self, task_ids: list[str], *, llm_model: str, embedding_model: str) -> list[str]:
+            return ["t1"]
+
+        async def save_upsert_failure_many(self, failures: list[StageFailure]) -> None:
+            self.failures.extend(failures)
+
+    repo = _Repo()
+    orchestrator = object.__new__(KbPipelineOrchestrator)
+    orchestrator.config = PipelineConfig(database_url="", openrouter_api_key="", openai_api_key="")
+    orchestrator.repo = repo  # type: ignore[assignment]
+    orchestrator._log_queue = None
+    orchestrator._progress_version = 0
+    tasks = [dataclasses.replace(_task(f"t{idx}", 10), chunk_index=idx, chunk_count=3) for idx in range(3)]
+    progress = KbPipelineOrchestrator._progress_arrays({})
+
+    async def scenario() -> None:
+        orchestrator._status = StatusWriter(repo, batch_size=64, interval_seconds=60, log=print)  # type: ignore[arg-type]
+        orchestrator._status.start()
+        await orchestrator._upsert_batch("r1", tasks, worker_idx=0, progress=progress)
+        await orchestrator._status.aclose()
+
+    asyncio.run(scenario())
+    assert [failure.task_id for failure in repo.failures] == ["t1"]
+    statuses = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    assert [(event["chunk_index"], event["status"]) for event in statuses if event.get("stage") == "upsert"] == [
+        (1, "FAILED"),
+        (0, "SUCCEEDED"),
+        (2, "SUCCEEDED"),
+    ]
+
+
+def test_embed_batch_rejected_by_provider_retries_chunks_one_at_a_time(capsys) -> None:  # type: ignore[no-untyped-def]
+    class _Client:
+        async def embed_batch(self, tasks: list[TaskPayload]) -> list[EmbedStageResult]:
+            request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+            raise httpx.HTTPStatusError("400 Bad Request", request=request, response=httpx.Response(400, request=request))
+
+        async def embed(self, task: TaskPayload) -> EmbedStageResult:
+            if task.task_id == "t1":
+                raise ValueError("input too long")
+            return EmbedStageResult(task.task_id, array("f", [0.1]), 1, 1, "x")
+
+    class _Repo:
+        def __init__(self) -> None:
+            self.calls: list[tuple[str, list[str]]] = []
+
+        def __getattr__(self, method: str):  # type: ignore[no-untyped-def]
+            async def write(rows: list[EmbedStageResult | StageFailure]) -> None:
+                self.calls.append((method, [row.task_id for row in rows]))
+
+            return write
+
+    repo = _Repo()
+    orchestrator = object.__new__(KbPipelineOrchestrator)
+    orchestrator.config = PipelineConfig(database_url="", openrouter_api_key="", openai_api_key="")
+    orchestrator.embed_client = _Client()  # type: ignore[assignment]
+    orchestrator._log_queue = None
+    orchestrator._progress_version = 0
+    tasks = [dataclasses.replace(_task(f"t{idx}", 10), chunk_index=idx, chunk_count=3) for idx in range(3)]
+    progress = KbPipelineOrchestrator._progress_arrays({})
+
+    async def scenario() -> int:
+        orchestrator._status = StatusWriter(repo, batch_size=64, interval_seconds=60, log=print)  # type: ignore[arg-type]
+        orchestrator._status.start()
+        upsert_queue: asyncio.Queue[TaskPayload] = asyncio.Queue()
+        await orchestrator._embed_batch("r1", tasks, upsert_queue, worker_idx=0, progress=progress)
+        await orchestrator._status.aclose()
+        return upsert_queue.qsize()
+
+    assert asyncio.run(scenario()) == 2
+    assert repo.calls == [
+        ("save_embed_success_start_upsert_many", ["t0"]),
+        ("save_embed_failure_many", ["t1"]),
+        ("save_embed_success_start_upsert_many", ["t2"]),
+    ]
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import dataclasses
+import json
+
 from kb_pipeline.models import TaskPayload
-from kb_pipeline.prompts import system_prompt, user_prompt
+from kb_pipeline.prompts import system_prompt, system_prompt_batched, user_prompt, user_prompt_batched
 
 
 def _task(context_mode: str) -> TaskPayload:
@@ -40,3 +43,15 @@ def test_user_prompt_includes_full_doc_context() -> None:
 def test_user_prompt_includes_surrounding_context() -> None:
     prompt = user_prompt(_task("SURROUNDING_CHUNKS"))
     assert "SURROUNDING_CHUNK_CONTEXT" in prompt
+
+
+def test_batched_prompts_share_identical_contexts() -> None:
+    first = _task("FULL_DOC")
+    second = dataclasses.replace(first, task_id="t2", chunk_index=1, raw_text="Article 32 security")
+    other = dataclasses.replace(first, task_id="t3", source_id="other", context_text="Other context")
+    prompt = user_prompt_batched([first, second, other])
+    items = json.loads(prompt.split("BATCH_ITEMS:\n", 1)[1].split("\n\nSHARED_CONTEXTS:", 1)[0])
+    assert [item["id"] for item in items] == ["1", "2", "3"]
+    assert [item["context_ref"] for item in items] == ["ctx1", "ctx1", "ctx2"]
+    assert prompt.count("Full or surrounding context") == 1
+    assert "BATCH MODE" in system_prompt_batched()
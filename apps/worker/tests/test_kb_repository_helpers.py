@@ -1,14 +1,28 @@
 from __future__ import annotations
 
+import struct
+from array import array
+
 from kb_pipeline.repository import KbRepository
 
 
-def test_vector_literal_and_parse_roundtrip() -> None:
+def test_vector_binary_and_parse_roundtrip() -> None:
     vec = [0.1, 0.2, -0.3]
-    literal = KbRepository._vector_literal(vec)
-    assert literal.startswith("[") and literal.endswith("]")
-    parsed = KbRepository._parse_vector_text(literal)
+    data = KbRepository._vector_binary(vec)
+    assert struct.unpack(">HH3f", data) == (3, 0, *array("f", vec))
+    parsed = KbRepository._parse_vector_binary(data)
+    assert parsed.typecode == "f"
+    assert parsed == array("f", vec)
+
+
+def test_parse_vector_text() -> None:
+    parsed = KbRepository._parse_vector_text("[0.1,0.2,-0.3]")
     assert parsed is not None
-    assert len(parsed) == len(vec)
-    for a, b in zip(parsed, vec):
-        assert abs(a - b) < 1e-6
+    assert parsed.typecode == "f"
+    assert parsed == array("f", [0.1, 0.2, -0.3])
+
+
+def test_status_payload_keeps_aggregates_out_of_run() -> None:
+    row = {"id": 1, "status": "RUNNING", "task_counts": {"total": 2}, "sample_failures": []}
+    payload = KbRepository._status_payload(row)
+    assert payload == {"run": {"id": "1", "status": "RUNNING"}, "task_counts": {"total": 2}, "sample_failures": []}
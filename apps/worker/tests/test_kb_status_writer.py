@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from kb_pipeline.status_writer import StatusWriter
+
+
+class _RecordingRepo:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, list[str]]] = []
+
+    async def mark_llm_running_many(self, rows: list[str]) -> None:
+        self.calls.append(("mark_llm_running_many", rows))
+
+    async def save_llm_success_many(self, rows: list[str]) -> None:
+        self.calls.append(("save_llm_success_many", rows))
+
+
+def test_status_writer_coalesces_in_order_and_flushes_on_barrier() -> None:
+    repo = _RecordingRepo()
+
+    async def scenario() -> None:
+        writer = StatusWriter(repo, batch_size=50, interval_seconds=60, log=print)  # type: ignore[arg-type]
+        writer.start()
+        writer.enqueue("mark_llm_running_many", "t1")
+        writer.enqueue("mark_llm_running_many", "t2")
+        writer.enqueue("save_llm_success_many", "t1")
+        writer.enqueue("mark_llm_running_many", "t3")
+        await asyncio.wait_for(writer.barrier(), timeout=5)
+        writer.enqueue("save_llm_success_many", "t2")
+        await writer.aclose()
+
+    asyncio.run(scenario())
+    assert repo.calls == [
+        ("mark_llm_running_many", ["t1", "t2"]),
+        ("save_llm_success_many", ["t1"]),
+        ("mark_llm_running_many", ["t3"]),
+        ("save_llm_success_many", ["t2"]),
+    ]
+
+
+class _FailingRepo(_RecordingRepo):
+    async def save_llm_success_many(self, rows: list[str]) -> None:
+        raise ConnectionError("connection lost")
+
+
+def test_status_writer_stops_writing_after_a_failure_and_raises_it_once() -> None:
+    repo = _FailingRepo()
+    logged: list[str] = []
+
+    async def scenario() -> None:
+        writer = StatusWriter(repo, batch_size=50, interval_seconds=60, log=logged.append)  # type: ignore[arg-type]
+        writer.start()
+        writer.enqueue("mark_llm_running_many", "t1")
+        writer.enqueue("save_llm_success_many", "t1")
+        writer.enqueue("mark_llm_running_many", "t1")
+        with pytest.raises(RuntimeError, match="connection lost"):
+            await asyncio.wait_for(writer.barrier(), timeout=5)
+        writer.enqueue("mark_llm_running_many", "t2")
+        await writer.aclose()
+
+    asyncio.run(scenario())
+    # Nothing after the failed write is applied for the rest of the run, and aclose() does not raise it again.
+    assert repo.calls == [("mark_llm_running_many", ["t1"])]
+    assert [json.loads(line) for line in logged] == [
+        {"event": "kb_pipeline.status_write_failed", "method": "save_llm_success_many", "rows": 1, "error": "connection lost"},
+        {"event": "kb_pipeline.status_write_dropped", "method": "mark_llm_running_many", "rows": 1},
+        {"event": "kb_pipeline.status_write_dropped", "method": "mark_llm_running_many", "rows": 1},
+    ]
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import functools
 import json
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
+from typing import Annotated, Any, Literal
 
-from pydantic import BaseModel, ConfigDict, Field, HttpUrl, model_validator
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, HttpUrl, TypeAdapter, WithJsonSchema, model_validator
 
 
 class StrictModel(BaseModel):
@@ -19,6 +21,11 @@ class ChecklistSeverity(str, Enum):
     MANDATORY = "MANDATORY"
 
 
+# Schema fields use the Literal form: pydantic-core matches it without building an enum member, and the
+# validated value stays a plain str. Keep it in sync with ChecklistSeverity.
+ChecklistSeverityValue = Literal["LOW", "MEDIUM", "HIGH", "MANDATORY"]
+
+
 class ChecklistCategory(str, Enum):
     SCOPE_ROLES_AND_INSTRUCTIONS = "Scope, Roles & Instructions"
     SUBPROCESSORS_AND_PERSONNEL = "Subprocessors & Personnel"
@@ -75,17 +82,32 @@ class SourceType(str, Enum):
     INTERNAL_POLICY = "INTERNAL_POLICY"
 
 
+SourceTypeValue = Literal["LAW", "GUIDELINE", "INTERNAL_POLICY"]
+
+
 class ApprovalStatus(str, Enum):
     DRAFT = "DRAFT"
     REVIEWED = "REVIEWED"
     APPROVED = "APPROVED"
 
 
+_HTTP_URL_ADAPTER = TypeAdapter(HttpUrl)
+
+
+def _canonical_http_url(value: Any) -> str:
+    return str(_HTTP_URL_ADAPTER.validate_python(value))
+
+
+# Parsed as HttpUrl on validation but stored as its canonical string, so dumps and trusted reloads never
+# rebuild a Url object. The exported JSON schema is the same as for HttpUrl.
+HttpUrlStr = Annotated[str, BeforeValidator(_canonical_http_url), WithJsonSchema(_HTTP_URL_ADAPTER.json_schema())]
+
+
 class ChecklistSource(StrictModel):
-    source_type: SourceType
+    source_type: SourceTypeValue
     authority: str = Field(min_length=1)
     source_ref: str = Field(min_length=1)
-    source_url: HttpUrl
+    source_url: HttpUrlStr
     source_excerpt: str = Field(min_length=1)
     interpretation_notes: str | None = None
 
@@ -100,9 +122,10 @@ class ChecklistGovernance(StrictModel):
 
     @model_validator(mode="after")
     def validate_approval_state(self) -> "ChecklistGovernance":
-        if self.approval_status == ApprovalStatus.APPROVED:
-            if not self.approved_by or not self.approved_at:
-                raise ValueError("approved_by and approved_at are required when approval_status is APPROVED")
+        if self.approval_status is not ApprovalStatus.APPROVED:
+            return self
+        if not self.approved_by or not self.approved_at:
+            raise ValueError("approved_by and approved_at are required when approval_status is APPROVED")
         return self
 
 
@@ -110,12 +133,12 @@ class ChecklistItem(StrictModel):
     check_id: str = Field(pattern=r"^[A-Z0-9_.-]+$")
     title: str = Field(min_length=1)
     category: ChecklistCategory = Field(description="One approved checklist category from the fixed DPA category taxonomy.")
-    legal_basis: list[str] = Field(min_length=1)
+    legal_basis: tuple[str, ...] = Field(min_length=1)
     required: bool
-    severity: ChecklistSeverity
+    severity: ChecklistSeverityValue
     evidence_hint: str = Field(min_length=1)
-    pass_criteria: list[str] = Field(min_length=1)
-    fail_criteria: list[str] = Field(min_length=1)
+    pass_criteria: tuple[str, ...] = Field(min_length=1)
+    fail_criteria: tuple[str, ...] = Field(min_length=1)
     sources: list[ChecklistSource] = Field(min_length=1)
 
 
@@ -141,8 +164,62 @@ class ChecklistDocument(StrictModel):
     governance: ChecklistGovernance
     checks: list[ChecklistItem] = Field(min_length=1)
 
+    @classmethod
+    def from_trusted(cls, data: dict[str, Any]) -> "ChecklistDocument":
+        # Rebuilds a document from our own model_dump(mode="json") output without re-running field validation.
+        # Only for payloads stored after validation (approved checklists read back from the database);
+        # untrusted input must go through model_validate.
+        if not data.get("checks"):
+            # Purged projects keep their approved rows with "checks": []; validate so they fail as before
+            # instead of loading as empty documents.
+            return cls.model_validate(data)
+        governance = data["governance"]
+        approved_at = governance.get("approved_at")
+        return cls.model_construct(
+            version=data["version"],
+            governance=ChecklistGovernance.model_construct(
+                owner=governance["owner"],
+                approval_status=ApprovalStatus(governance["approval_status"]),
+                approved_by=governance.get("approved_by"),
+                approved_at=datetime.fromisoformat(approved_at) if isinstance(approved_at, str) else approved_at,
+                policy_version=governance["policy_version"],
+                change_note=governance.get("change_note"),
+            ),
+            checks=[
+                ChecklistItem.model_construct(
+                    check_id=check["check_id"],
+                    title=check["title"],
+                    category=ChecklistCategory(check["category"]),
+                    legal_basis=tuple(check["legal_basis"]),
+                    required=check["required"],
+                    severity=check["severity"],
+                    evidence_hint=check["evidence_hint"],
+                    pass_criteria=tuple(check["pass_criteria"]),
+                    fail_criteria=tuple(check["fail_criteria"]),
+                    sources=[
+                        ChecklistSource.model_construct(
+                            source_type=source["source_type"],
+                            authority=source["authority"],
+                            source_ref=source["source_ref"],
+                            source_url=source["source_url"],
+                            source_excerpt=source["source_excerpt"],
+                            interpretation_notes=source.get("interpretation_notes"),
+                        )
+                        for source in check["sources"]
+                    ],
+                )
+                for check in data["checks"]
+            ],
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def _checklist_schema_bytes() -> bytes:
+    # The model tree is fixed at import time, so build and format the schema once per process.
+    return json.dumps(ChecklistDocument.model_json_schema(), indent=2).encode("utf-8")
+
 
 def export_checklist_json_schema(path: str | Path) -> None:
     output_path = Path(path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(json.dumps(ChecklistDocument.model_json_schema(), indent=2), encoding="utf-8")
+    output_path.write_bytes(_checklist_schema_bytes())
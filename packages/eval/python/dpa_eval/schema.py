@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import json
 from datetime import datetime
 from pathlib import Path
@@ -27,7 +28,13 @@ class EvalBatch(StrictModel):
     records: list[EvalRecord] = Field(min_length=1)
 
 
+@functools.lru_cache(maxsize=1)
+def _eval_schema_bytes() -> bytes:
+    # The model tree is fixed at import time, so build and format the schema once per process.
+    return json.dumps(EvalBatch.model_json_schema(), indent=2).encode("utf-8")
+
+
 def export_eval_json_schema(path: str | Path) -> None:
     output_path = Path(path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(json.dumps(EvalBatch.model_json_schema(), indent=2), encoding="utf-8")
+    output_path.write_bytes(_eval_schema_bytes())